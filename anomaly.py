@@ -0,0 +1,233 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Alert kinds, indexed by the `kind` column of Alerts
+ALERT_KINDS = ["smoke_spike", "temperature_excursion", "humidity_drift"]
+SMOKE, TEMPERATURE, HUMIDITY = range(len(ALERT_KINDS))
+
+# Alert state changes produced by one batch; every field is an array
+Alerts = namedtuple("Alerts", ["device", "ts", "kind", "raised", "value", "score"])
+
+# Largest exponent (1 - alpha) ** -r may reach in one block of _ewma_runs
+_MAX_EXPONENT = 200.0
+
+
+def _runs(slots):
+    """Runs of equal, adjacent slots: (index of each reading's run start, rank in run, last-in-run mask)."""
+    n = len(slots)
+    starts = np.r_[True, slots[1:] != slots[:-1]] if n else np.zeros(0, dtype=bool)
+    first = np.maximum.accumulate(np.where(starts, np.arange(n), 0)) if n else np.zeros(0, dtype=np.int64)
+    last = np.r_[starts[1:], True] if n else starts
+    return first, np.arange(n) - first, last
+
+
+def _ewma_runs(alpha, start, x, first, rank):
+    """Apply y <- y + alpha * (x - y) along each run; return y before and after every reading.
+
+    `start` is y before each run (read at run starts). Within a run the
+    recurrence is y_r = (1 - alpha) ** r * (y_0 + alpha * sum_{j<r} x_j * (1 - alpha) ** -(j + 1)),
+    so one per-run cumulative sum covers the whole run; long runs are cut
+    into blocks of ranks so the negative powers stay finite.
+    """
+    start = np.asarray(start, dtype=np.float64)
+    decay = 1.0 - alpha
+    if decay <= 0:
+        # y is just the previous reading
+        before = np.where(rank == 0, start, np.r_[0.0, x[:-1]])
+        return before, before + alpha * (x - before)
+    growth = -np.log(decay)
+    block = max(1, int(_MAX_EXPONENT / growth)) if growth > 0 else max(len(x), 1)
+    before = np.empty(len(x))
+    carry = start.copy()  # y entering the current block, at run starts
+    for lo in range(0, int(rank.max()) + 1 if len(x) else 0, block):
+        picked = np.flatnonzero((rank >= lo) & (rank < lo + block))
+        runs = first[picked]
+        r = (rank[picked] - lo).astype(np.float64)
+        terms = alpha * x[picked] * decay ** -(r + 1)
+        inclusive = pd.Series(terms).groupby(runs, sort=False).cumsum().to_numpy()
+        before[picked] = decay ** r * (carry[runs] + inclusive - terms)
+        ends = np.r_[runs[1:] != runs[:-1], True]
+        carry[runs[ends]] = decay ** (r[ends] + 1) * (carry[runs[ends]] + inclusive[ends])
+    return before, before + alpha * (x - before)
+
+
+class AnomalyDetector:
+    """Streaming smoke/temperature/humidity anomaly detection for many boxes.
+
+    Per-device state (EWMA mean/variance, slow/fast humidity EWMAs, alert
+    flags) lives in NumPy arrays indexed by a device slot. A batch is sorted
+    into one time-ordered run per device and each recurrence is solved
+    along all runs at once (EWMAs in closed form via per-run cumulative
+    sums, alert state by carrying forward the last deciding reading), so a
+    device sending many readings in one batch costs array operations, not a
+    Python loop per reading. Alerts use separate raise/clear thresholds so
+    they do not flap; a reading meeting both raises.
+
+    - smoke spike: rolling z-score above `smoke_z` or the level above
+      `smoke_level`; clears below `smoke_z_clear` and `smoke_level_clear`.
+    - temperature excursion: outside `temperature_range` (cold chain);
+      clears once back inside by `temperature_margin`.
+    - humidity drift: fast and slow EWMAs differ by more than
+      `humidity_drift`; clears below `humidity_drift_clear`.
+    """
+
+    def __init__(self, alpha=0.1, warmup=10, smoke_z=4.0, smoke_z_clear=1.5,
+                 smoke_level=3.0, smoke_level_clear=2.5, temperature_range=(2.0, 8.0),
+                 temperature_margin=0.5, humidity_fast=0.3, humidity_slow=0.01,
+                 humidity_drift=10.0, humidity_drift_clear=5.0, capacity=1024):
+        self.alpha = alpha
+        self.warmup = warmup
+        self.smoke_z = smoke_z
+        self.smoke_z_clear = smoke_z_clear
+        self.smoke_level = smoke_level
+        self.smoke_level_clear = smoke_level_clear
+        self.temperature_range = temperature_range
+        self.temperature_margin = temperature_margin
+        self.humidity_fast = humidity_fast
+        self.humidity_slow = humidity_slow
+        self.humidity_drift = humidity_drift
+        self.humidity_drift_clear = humidity_drift_clear
+        self.slots = {}
+        self.device_ids = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        def grow(name, shape, fill, dtype):
+            new = np.full(shape, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                new[:len(old)] = old
+            setattr(self, name, new)
+
+        grow("count", (capacity, 3), 0, np.int64)
+        grow("mean", (capacity, 3), 0.0, np.float64)
+        grow("var", (capacity, 3), 0.0, np.float64)
+        grow("humidity_fast_mean", capacity, np.nan, np.float64)
+        grow("humidity_slow_mean", capacity, np.nan, np.float64)
+        grow("active", (capacity, len(ALERT_KINDS)), False, bool)
+
+    def slots_for(self, devices):
+        """Map device IDs to state slots, registering new devices."""
+        unique, inverse = np.unique(np.asarray(devices, dtype=object), return_inverse=True)
+        slots = np.empty(len(unique), dtype=np.int64)
+        for i, device in enumerate(unique):
+            slot = self.slots.get(device)
+            if slot is None:
+                slot = self.slots[device] = len(self.device_ids)
+                self.device_ids.append(device)
+            slots[i] = slot
+        if len(self.device_ids) > len(self.count):
+            self._allocate(max(len(self.device_ids), 2 * len(self.count)))
+        return slots[inverse.reshape(-1)]
+
+    def _ewma_z(self, slots, runs, channel, x):
+        """Score each reading against its device's EWMA, folding the run in; returns (z, count after)."""
+        first, rank, last = runs
+        count = self.count[slots, channel] + rank
+        # A device's first reading ever seeds its mean, with zero variance
+        new = self.count[slots, channel] == 0
+        mean, mean_after = _ewma_runs(self.alpha, np.where(new, x[first], self.mean[slots, channel]),
+                                      x, first, rank)
+        delta = x - mean
+        var, var_after = _ewma_runs(self.alpha, np.where(new, 0.0, self.var[slots, channel]),
+                                    (1 - self.alpha) * delta ** 2, first, rank)
+        z = np.where(count >= self.warmup, delta / np.sqrt(var + 1e-9), 0.0)
+        self.mean[slots[last], channel] = mean_after[last]
+        self.var[slots[last], channel] = var_after[last]
+        self.count[slots[last], channel] = count[last] + 1
+        return z, count + 1
+
+    def _transition(self, kind, slots, runs, raise_mask, clear_mask):
+        """Apply hysteresis along each run; return (state changed, state after) per reading."""
+        first, rank, last = runs
+        was = self.active[slots, kind]
+        # The latest reading that raised or cleared decides the state; before any, it is unchanged
+        deciding = np.maximum.accumulate(np.where(raise_mask | clear_mask, np.arange(len(slots)), -1))
+        now = np.where(deciding >= first, raise_mask[deciding.clip(0)], was)
+        before = np.where(rank == 0, was, np.r_[False, now[:-1]])
+        self.active[slots[last], kind] = now[last]
+        return now != before, now
+
+    def _score(self, slots, ts, values, devices, out):
+        """Score readings sorted by device, then time."""
+        smoke, temperature, humidity = values[:, 0], values[:, 1], values[:, 2]
+
+        ok = ~np.isnan(smoke)
+        if ok.any():
+            s, level = slots[ok], smoke[ok]
+            runs = _runs(s)
+            z, _ = self._ewma_z(s, runs, SMOKE, level)
+            raise_mask = (z > self.smoke_z) | (level > self.smoke_level)
+            clear_mask = (z < self.smoke_z_clear) & (level < self.smoke_level_clear)
+            changed, now = self._transition(SMOKE, s, runs, raise_mask, clear_mask)
+            out.append((devices[ok][changed], ts[ok][changed], SMOKE, now[changed], level[changed], z[changed]))
+
+        ok = ~np.isnan(temperature)
+        if ok.any():
+            s, t = slots[ok], temperature[ok]
+            runs = _runs(s)
+            low, high = self.temperature_range
+            margin = self.temperature_margin
+            self._ewma_z(s, runs, TEMPERATURE, t)
+            outside = np.maximum(low - t, t - high)
+            changed, now = self._transition(TEMPERATURE, s, runs, outside > 0, outside < -margin)
+            out.append((devices[ok][changed], ts[ok][changed], TEMPERATURE, now[changed], t[changed], outside[changed]))
+
+        ok = ~np.isnan(humidity)
+        if ok.any():
+            s, h = slots[ok], humidity[ok]
+            runs = _runs(s)
+            first, rank, last = runs
+            _, count = self._ewma_z(s, runs, HUMIDITY, h)
+            fast = self.humidity_fast_mean[s]
+            slow = self.humidity_slow_mean[s]
+            _, fast = _ewma_runs(self.humidity_fast, np.where(np.isnan(fast), h[first], fast), h, first, rank)
+            _, slow = _ewma_runs(self.humidity_slow, np.where(np.isnan(slow), h[first], slow), h, first, rank)
+            self.humidity_fast_mean[s[last]] = fast[last]
+            self.humidity_slow_mean[s[last]] = slow[last]
+            drift = np.abs(fast - slow)
+            warm = count >= self.warmup
+            changed, now = self._transition(
+                HUMIDITY, s, runs, warm & (drift > self.humidity_drift), drift < self.humidity_drift_clear
+            )
+            out.append((devices[ok][changed], ts[ok][changed], HUMIDITY, now[changed], h[changed], drift[changed]))
+
+    def update(self, devices, ts, smoke=None, temperature=None, humidity=None):
+        """Score a batch of readings and return the alert transitions it caused.
+
+        `devices` and `ts` are per-reading arrays; each channel is an array of
+        the same length (NaN or None for channels not sampled).
+        """
+        devices = np.asarray(devices, dtype=object)
+        n = len(devices)
+        ts = np.asarray(ts, dtype=np.float64)
+        values = np.column_stack([
+            np.full(n, np.nan) if column is None else np.asarray(column, dtype=np.float64)
+            for column in (smoke, temperature, humidity)
+        ])
+        slots = self.slots_for(devices)
+
+        # One time-ordered run per device
+        order = np.lexsort((ts, slots))
+        out = []
+        if n:
+            self._score(slots[order], ts[order], values[order], devices[order], out)
+        if not out:
+            return Alerts(*(np.empty(0),) * 6)
+        return Alerts(
+            np.concatenate([o[0] for o in out]),
+            np.concatenate([o[1] for o in out]),
+            np.concatenate([np.full(len(o[0]), o[2]) for o in out]),
+            np.concatenate([o[3] for o in out]),
+            np.concatenate([o[4] for o in out]),
+            np.concatenate([o[5] for o in out]),
+        )
+
+    def active_alerts(self, device):
+        """Return the names of alerts currently raised for `device`."""
+        slot = self.slots.get(device)
+        if slot is None:
+            return []
+        return [kind for kind, on in zip(ALERT_KINDS, self.active[slot]) if on]
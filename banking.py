@@ -1,24 +1,24 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import seaborn as sns
 
+from banking_store import get_store
+from charts import fingerprint, histogram_png, render
+from data_store import data_token, derived
+from projection import AccountProjection
+from tracing import get_tracer
+
 def display_banking():
     st.title("Banking Services - Post India")
     
-    try:
-        data = pd.read_csv("banking_data.csv")
-    except FileNotFoundError:
+    # Snapshot + append log; unchanged files are not re-read on rerun
+    store = get_store("banking_data.csv")
+    tracer = get_tracer()
+    with tracer.section("Banking Load"):
+        data = store.read()
+    if data.empty:
         st.warning("No existing data found. Add data to start analysis.")
-        data = pd.DataFrame(columns=[
-            "Account_ID", "Customer_Name", "Age", "Gender", "Marital_Status",
-            "Account_Type", "Balance", "Interest_Rate", "Account_Term", 
-            "Opening_Date", "Closing_Date", "Transaction_Status", 
-            "Transaction_Amount", "Transaction_Type", "Frequency", 
-            "Region", "Occupation", "Dependents", 
-            "Customer_Satisfaction_Rating"
-        ])
-    tabs = st.tabs(["Add Banking Data", "Insights & Visualization", "Predictions & Analysis"])
+    tabs = st.tabs(["Add Banking Data", "Insights & Visualization", "Predictions & Analysis", "Account Projections"])
     with tabs[0]:
         st.subheader("Add New Customer Data")
         account_id = st.text_input("Account ID")
@@ -50,48 +50,87 @@ def display_banking():
                 "Frequency": frequency, "Region": region, "Occupation": occupation, 
                 "Dependents": dependents, "Customer_Satisfaction_Rating": satisfaction_rating
             }
-            data = data.append(new_entry, ignore_index=True)
-            data.to_csv("banking_data.csv", index=False)
-            st.success("Banking details added successfully!")
+            try:
+                store.append(new_entry)
+            except (OSError, TypeError, ValueError) as error:
+                st.error(f"Could not save banking details: {error}")
+            else:
+                st.success("Banking details added successfully!")
 
     with tabs[1]:
-        st.subheader("Data Insights & Visualization")
+        with tracer.section("Banking Insights", rows=len(data)):
+            st.subheader("Data Insights & Visualization")
         
-        if not data.empty:
-            st.write("Dataset Overview:")
-            st.dataframe(data)
+            if not data.empty:
+                st.write("Dataset Overview:")
+                st.dataframe(data)
             
-            st.write("Customer Age Distribution")
-            sns.histplot(data["Age"], kde=True, bins=20, color="blue")
-            st.pyplot()
+                st.write("Customer Age Distribution")
+                st.image(histogram_png(data["Age"], 20, "blue", "", "Age", ylabel="Count", figsize=(6.4, 4.8),
+                                       key=data_token(data)))
             
-            st.write("Account Type Breakdown")
-            account_type_counts = data["Account_Type"].value_counts()
-            st.bar_chart(account_type_counts)
+                st.write("Account Type Breakdown")
+                # Served from running frequency tables, updated only with new entries
+                summary = store.summary()
+                account_type_counts = summary.counts("Account_Type")
+                st.bar_chart(account_type_counts)
             
-            st.write("Customer Satisfaction Rating Distribution")
-            satisfaction_counts = data["Customer_Satisfaction_Rating"].value_counts().sort_index()
-            fig, ax = plt.subplots()
-            satisfaction_counts.plot(kind="bar", ax=ax, color="green")
-            st.pyplot(fig)
-        else:
-            st.info("No data available for insights.")
+                st.write("Customer Satisfaction Rating Distribution")
+                satisfaction_counts = summary.counts("Customer_Satisfaction_Rating").sort_index()
+                st.image(render(fingerprint("satisfaction", satisfaction_counts),
+                                lambda ax: satisfaction_counts.plot(kind="bar", ax=ax, color="green"),
+                                figsize=(6.4, 4.8)))
+            else:
+                st.info("No data available for insights.")
 
     with tabs[2]:
-        st.subheader("Predictive Analysis")
+        with tracer.section("Banking Predictions", rows=len(data)):
+            st.subheader("Predictive Analysis")
         
-        if not data.empty:
-            st.write("Satisfaction Rating vs Account Balance")
-            fig, ax = plt.subplots()
-            sns.scatterplot(data=data, x="Balance", y="Customer_Satisfaction_Rating", hue="Account_Type", ax=ax)
-            st.pyplot(fig)
-            st.write("Transaction Frequency by Region")
-            region_frequency = data.groupby("Region")["Frequency"].value_counts().unstack(fill_value=0)
-            st.dataframe(region_frequency)
+            if not data.empty:
+                st.write("Satisfaction Rating vs Account Balance")
+                scatter_data = data[["Balance", "Customer_Satisfaction_Rating", "Account_Type"]]
+                st.image(render(fingerprint("balance_satisfaction", data_token(data)),
+                                lambda ax: sns.scatterplot(data=scatter_data, x="Balance",
+                                                           y="Customer_Satisfaction_Rating", hue="Account_Type", ax=ax),
+                                figsize=(6.4, 4.8)))
+                st.write("Transaction Frequency by Region")
+                region_frequency = data.groupby("Region")["Frequency"].value_counts().unstack(fill_value=0)
+                st.dataframe(region_frequency)
             
-            # Analysis of Transactions by Type
-            st.write("Transaction Amounts by Type")
-            transaction_analysis = data.groupby("Transaction_Type")["Transaction_Amount"].sum()
-            st.bar_chart(transaction_analysis)
-        else:
-            st.info("No data available for predictions.")
+                # Analysis of Transactions by Type
+                st.write("Transaction Amounts by Type")
+                transaction_analysis = data.groupby("Transaction_Type")["Transaction_Amount"].sum()
+                st.bar_chart(transaction_analysis)
+            else:
+                st.info("No data available for predictions.")
+
+    with tabs[3]:
+        with tracer.section("Banking Projections", rows=len(data)):
+            st.subheader("Account Projections")
+
+            if not data.empty:
+                # Built once per loaded frame; quarterly compounding from each Opening_Date
+                projection = derived(data, "projection", AccountProjection)
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Total Balance", f"₹{projection.principal.sum():,.0f}")
+                col2.metric("Accrued Interest", f"₹{projection.accrued_interest.sum():,.0f}")
+                col3.metric("Value at Maturity", f"₹{projection.maturity_value.sum():,.0f}")
+
+                st.write("Portfolio by Region and Account Type")
+                st.dataframe(projection.rollup())
+
+                st.write("Projected Balances by Account Type")
+                years = st.slider("Projection Horizon (years)", 1, 30, 10)
+                st.line_chart(projection.trajectory(years * 12, level="Account_Type"))
+
+                account_id = st.text_input("Project a Single Account (Account ID)")
+                if account_id:
+                    rows = (projection.account_ids == account_id).nonzero()[0]
+                    if len(rows):
+                        path = projection.paths(rows[:1], years * 12)[0]
+                        st.line_chart(pd.Series(path, index=projection.calendar(years * 12), name=account_id))
+                    else:
+                        st.warning(f"No account {account_id} found.")
+            else:
+                st.info("No data available for projections.")
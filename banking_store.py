@@ -0,0 +1,326 @@
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from summary_stats import FrameSummary
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+BANKING_COLUMNS = [
+    "Account_ID", "Customer_Name", "Age", "Gender", "Marital_Status",
+    "Account_Type", "Balance", "Interest_Rate", "Account_Term",
+    "Opening_Date", "Closing_Date", "Transaction_Status",
+    "Transaction_Amount", "Transaction_Type", "Frequency",
+    "Region", "Occupation", "Dependents",
+    "Customer_Satisfaction_Rating"
+]
+
+# First line of every log: {"_generation": n}. A snapshot records the last
+# log generation folded into it, so a log left behind by an interrupted
+# compaction is recognised and not read twice. Logs without the header
+# (written before it existed) are generation 0.
+_GENERATION = "_generation"
+
+# Size of the chunks read back when looking for the last complete log line
+_TAIL_CHUNK = 1 << 16
+
+# One store (and writer thread) per data file in this process
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+@contextmanager
+def _file_lock(path, shared=False):
+    """Hold an inter-process lock on `path` for the duration of the block."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _drop_torn_tail(log):
+    """Cut a partial last line (a write interrupted by a crash) off a binary log; returns its size."""
+    size = log.seek(0, os.SEEK_END)
+    if size == 0:
+        return 0
+    log.seek(size - 1)
+    if log.read(1) == b"\n":
+        return size
+    end = size
+    while end > 0:
+        start = max(end - _TAIL_CHUNK, 0)
+        log.seek(start)
+        newline = log.read(end - start).rfind(b"\n")
+        if newline >= 0:
+            end = start + newline + 1
+            break
+        end = start
+    log.truncate(end)
+    log.seek(end)
+    return end
+
+
+class BankingStore:
+    """Append-only storage for banking entries.
+
+    New rows go to a JSON-lines log through a single writer thread that
+    batches them and fsyncs once per batch, under a file lock shared with
+    other processes. The log is compacted into a Parquet snapshot once it
+    holds `compact_ratio` times the snapshot's rows (and at least
+    `compact_bytes`), so compaction work stays proportional to the rows
+    appended; reads return snapshot + log. The original CSV only seeds
+    the first snapshot. Compaction replaces the snapshot, then starts a new
+    log generation, so a crash in between cannot duplicate rows. A partial
+    last line left by a crash mid-write is ignored by readers and cut off
+    before the next append.
+    """
+
+    def __init__(self, path="banking_data.csv", batch_size=256, flush_interval=0.02,
+                 compact_bytes=1 << 20, compact_ratio=0.5):
+        base = os.path.splitext(path)[0]
+        self.csv_path = path
+        self.snapshot_path = base + ".parquet"
+        self.log_path = base + ".log"
+        self.lock_path = base + ".lock"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compact_bytes = compact_bytes
+        self.compact_ratio = compact_ratio
+        self._snapshot_meta = (None, (-1, 0))  # (snapshot file identity, _snapshot_info())
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._cache_key = None
+        self._cache = None
+        self._summary = None
+        self._summary_lock = threading.Lock()
+
+    # Write path
+
+    def append(self, entry, wait=True):
+        """Queue one entry for the log; returns a Future resolved once it is fsynced.
+
+        By default blocks until then and raises the error if the write failed.
+        """
+        done = Future()
+        self._ensure_writer()
+        self._queue.put((entry, done))
+        if wait:
+            done.result()
+        return done
+
+    def _ensure_writer(self):
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, daemon=True)
+                self._writer.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                lines = "".join(json.dumps(entry, default=str) + "\n" for entry, _ in batch)
+                with _file_lock(self.lock_path):
+                    self._ensure_log_locked()
+                    with open(self.log_path, "r+b") as log:
+                        _drop_torn_tail(log)
+                        log.write(lines.encode("utf-8"))
+                        log.flush()
+                        os.fsync(log.fileno())
+                        log_size = log.tell()
+                    # Log rows estimated from this batch's line size; a CSV seed has no
+                    # snapshot rows yet, so it is converted at the first threshold
+                    line_bytes = len(lines) / len(batch)
+                    compact_at = max(self.compact_bytes, self.compact_ratio * self._snapshot_info()[1] * line_bytes)
+            except Exception as error:
+                # Fail this batch's appends; the writer keeps serving the queue
+                for _, done in batch:
+                    done.set_exception(error)
+                continue
+            for _, done in batch:
+                done.set_result(None)
+            if log_size >= compact_at:
+                try:
+                    self.compact()
+                except Exception:
+                    pass  # the rows are in the log; compaction is retried on the next batch
+
+    # Snapshot and compaction
+
+    def _read_snapshot(self):
+        if os.path.exists(self.snapshot_path):
+            return pd.read_parquet(self.snapshot_path)
+        if os.path.exists(self.csv_path):
+            return pd.read_csv(self.csv_path)
+        return pd.DataFrame(columns=BANKING_COLUMNS)
+
+    def _snapshot_info(self):
+        """(last log generation folded in, row count) of the snapshot, or (-1, 0) if there is none.
+
+        The footer is read once per snapshot file, not on every batch.
+        """
+        try:
+            stat = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return -1, 0
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached_identity, info = self._snapshot_meta
+        if identity != cached_identity:
+            metadata = pq.read_metadata(self.snapshot_path)
+            info = (int((metadata.metadata or {}).get(b"log_generation", -1)), metadata.num_rows)
+            self._snapshot_meta = (identity, info)
+        return info
+
+    def _folded_generation(self):
+        """Last log generation folded into the snapshot (-1 if none)."""
+        return self._snapshot_info()[0]
+
+    def _log_generation(self):
+        """Generation of the current log (0 without a header), or None if it is empty or missing."""
+        try:
+            with open(self.log_path, encoding="utf-8") as log:
+                first = log.readline()
+        except FileNotFoundError:
+            return None
+        if not first.strip() or not first.endswith("\n"):
+            return None
+        return json.loads(first).get(_GENERATION, 0)
+
+    def _start_generation(self, generation):
+        """Atomically replace the log with an empty one of `generation`."""
+        tmp_path = self.log_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as log:
+            log.write(json.dumps({_GENERATION: generation}) + "\n")
+            log.flush()
+            os.fsync(log.fileno())
+        os.replace(tmp_path, self.log_path)
+
+    def _ensure_log_locked(self):
+        """Make sure appends land in a log newer than the snapshot (e.g. after an interrupted compaction)."""
+        folded = self._folded_generation()
+        generation = self._log_generation()
+        if generation is None or generation <= folded:
+            self._start_generation(folded + 1)
+
+    def _read_log(self):
+        """(generation, entries) of the log, without a partial last line."""
+        generation = 0
+        records = []
+        try:
+            with open(self.log_path, encoding="utf-8") as log:
+                for line in log:
+                    if line.endswith("\n") and line.strip():
+                        records.append(json.loads(line))
+        except FileNotFoundError:
+            pass
+        if records and _GENERATION in records[0]:
+            generation = records.pop(0)[_GENERATION]
+        return generation, pd.DataFrame.from_records(records, columns=BANKING_COLUMNS)
+
+    def _merged(self):
+        """(log generation included, entries): the snapshot plus the log unless already folded in."""
+        snapshot = self._read_snapshot()
+        folded = self._folded_generation()
+        generation, log = self._read_log()
+        if generation <= folded or log.empty:
+            return max(generation, folded), snapshot
+        if snapshot.empty:
+            return generation, log
+        return generation, pd.concat([snapshot, log], ignore_index=True)
+
+    def _compact_locked(self):
+        generation, data = self._merged()
+        for column in ("Opening_Date", "Closing_Date"):
+            data[column] = data[column].astype("string")
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               b"log_generation": str(generation).encode()})
+        tmp_path = self.snapshot_path + ".tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, self.snapshot_path)
+        # Until the next generation lands the old log is ignored, not re-read
+        self._start_generation(generation + 1)
+
+    def compact(self):
+        """Fold the log into a new Parquet snapshot and truncate the log."""
+        with _file_lock(self.lock_path):
+            self._compact_locked()
+
+    # Read path
+
+    def _version(self):
+        key = []
+        for path in (self.snapshot_path, self.log_path, self.csv_path):
+            try:
+                stat = os.stat(path)
+                key.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                key.append(None)
+        return tuple(key)
+
+    def read(self):
+        """Return all entries (snapshot + log), reusing the last read if unchanged."""
+        version = self._version()
+        if version != self._cache_key:
+            with _file_lock(self.lock_path, shared=True):
+                self._cache = self._merged()[1]
+                self._cache_key = self._version()
+        return self._cache
+
+    def summary(self):
+        """Running FrameSummary of all entries, fed only the rows added since the last call.
+
+        Compaction keeps row order, so entries are append-only and the rows
+        past the summarised count are exactly the new ones.
+        """
+        data = self.read()
+        with self._summary_lock:
+            if self._summary is None or len(data) < self._summary.rows:
+                self._summary = FrameSummary()
+            if len(data) > self._summary.rows:
+                self._summary.update(data.iloc[self._summary.rows:])
+            return self._summary
+
+
+def get_store(path="banking_data.csv"):
+    """Return the process-wide store for `path`, shared across sessions."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = BankingStore(path)
+        return _stores[key]
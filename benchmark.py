@@ -0,0 +1,466 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DATASETS = ["orders", "insurance", "banking", "sensors", "rfid"]
+
+REGIONS = ["East", "North", "South", "West"]
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+# Seeded generators matching the dashboards' schemas
+
+def _dates(rng, n, start, end):
+    days = (np.datetime64(end) - np.datetime64(start)).astype(np.int64)
+    return (np.datetime64(start) + rng.integers(0, days, n)).astype(str)
+
+
+def _ascii(columns):
+    """Join per-position byte columns (uint8 arrays) into an array of str."""
+    raw = np.ascontiguousarray(np.column_stack(columns).astype(np.uint8))
+    return raw.view(f"S{raw.shape[1]}").ravel().astype(str)
+
+
+def _ids(prefix, n):
+    return pd.Series(np.arange(1, n + 1)).astype(str).radd(prefix).to_numpy()
+
+
+def orders_frame(n, seed=0):
+    """Orders with the cleaned_amazon_dataset columns used by main.py/siih.py."""
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(0, 86400, n)
+    traffic = rng.choice(["Low", "Medium", "High", "Jam"], n)
+    return pd.DataFrame({
+        "Order_ID": _ids("ORD", n),
+        "Agent_Age": rng.integers(20, 40, n),
+        "Agent_Rating": rng.uniform(2.5, 5.0, n).round(1),
+        "Store_Latitude": 12.9 + rng.normal(0, 0.1, n),
+        "Store_Longitude": 77.6 + rng.normal(0, 0.1, n),
+        "Drop_Latitude": 12.9 + rng.normal(0, 0.15, n),
+        "Drop_Longitude": 77.6 + rng.normal(0, 0.15, n),
+        "Order_Date": _dates(rng, n, "2022-02-11", "2022-04-06"),
+        "Order_Time": _ascii([48 + seconds // 36000, 48 + seconds // 3600 % 10, np.full(n, 58),
+                              48 + seconds // 600 % 6, 48 + seconds // 60 % 10, np.full(n, 58),
+                              48 + seconds % 60 // 10, 48 + seconds % 10]),
+        "Weather": rng.choice(["Sunny", "Cloudy", "Fog", "Stormy", "Sandstorms", "Windy"], n),
+        "Traffic": traffic,
+        "Vehicle": rng.choice(["motorcycle", "scooter", "van", "bicycle"], n, p=[0.55, 0.3, 0.14, 0.01]),
+        "Area": rng.choice(["Metropolitian", "Urban", "Semi-Urban", "Other"], n, p=[0.75, 0.22, 0.01, 0.02]),
+        "Delivery_Time": (rng.gamma(6, 20, n) + (traffic == "Jam") * 30).round().astype(np.int64),
+        "Category": rng.choice(["Electronics", "Books", "Jewelry", "Toys", "Skincare", "Snacks", "Outdoors",
+                                "Apparel", "Sports", "Grocery", "Pet Supplies", "Home", "Cosmetics",
+                                "Kitchen", "Clothing", "Shoes"], n),
+    })
+
+
+def insurance_frame(n, seed=0):
+    """Rows shaped like insurance_data.csv."""
+    rng = np.random.default_rng(seed)
+    premium = rng.integers(500, 5001, n)
+    risk = rng.integers(10, 101, n)
+    claimed = rng.random(n) < 0.5
+    return pd.DataFrame({
+        "Policy_ID": _ids("P", n),
+        "Customer_Name": _ids("Customer_", n),
+        "Age": rng.integers(18, 71, n),
+        "Gender": rng.choice(["Female", "Male"], n),
+        "Marital_Status": rng.choice(["Single", "Married"], n),
+        "Policy_Type": rng.choice(["Health", "Life", "Accident"], n),
+        "Premium_Amount": premium,
+        "Policy_Term": rng.integers(1, 21, n),
+        "Coverage_Amount": premium * rng.integers(1000, 20000, n),
+        "Claim_Status": np.where(claimed, "Yes", "No"),
+        "Claim_Amount": np.where(claimed, (risk * rng.lognormal(10, 1, n)).astype(np.int64), 0),
+        "Region": rng.choice(REGIONS, n),
+        "Occupation": rng.choice(["Retired", "Self-Employed", "Salaried"], n),
+        "Start_Date": _dates(rng, n, "2000-01-01", "2020-01-01"),
+        "End_Date": _dates(rng, n, "2003-01-01", "2024-01-01"),
+        "Payment_Frequency": rng.choice(["Monthly", "Annually", "Quarterly"], n),
+        "Renewal_Status": rng.choice(["No", "Yes"], n),
+        "Customer_Satisfaction_Rating": rng.integers(1, 6, n),
+        "Dependents": rng.integers(0, 6, n),
+        "Health_Risk_Score": risk,
+    })
+
+
+def banking_frame(n, seed=0):
+    """Rows shaped like banking_data.csv."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Account_ID": _ids("A", n),
+        "Customer_Name": _ids("Customer_", n),
+        "Age": rng.integers(18, 71, n),
+        "Gender": rng.choice(["Female", "Male"], n),
+        "Marital_Status": rng.choice(["Divorced", "Single", "Married"], n),
+        "Account_Type": rng.choice(["Savings", "Current", "Fixed Deposit"], n),
+        "Balance": rng.integers(2000, 1_000_000, n),
+        "Interest_Rate": rng.uniform(2.0, 7.0, n),
+        "Account_Term": rng.integers(1, 21, n),
+        "Opening_Date": _dates(rng, n, "2000-01-01", "2021-01-01"),
+        "Closing_Date": _dates(rng, n, "2021-01-01", "2031-01-01"),
+        "Transaction_Status": rng.choice(["Success", "Failed"], n),
+        "Transaction_Amount": rng.integers(300, 100_000, n),
+        "Transaction_Type": rng.choice(["Withdrawal", "Transfer", "Deposit"], n),
+        "Frequency": rng.choice(["Monthly", "Yearly", "Quarterly"], n),
+        "Region": rng.choice(REGIONS, n),
+        "Occupation": rng.choice(["Self-Employed", "Employed", "Retired", "Student", "Unemployed"], n),
+        "Dependents": rng.integers(0, 6, n),
+        "Customer_Satisfaction_Rating": rng.integers(1, 6, n),
+    })
+
+
+def sensor_frame(n, seed=0, devices=1000):
+    """Interleaved DHT11/MQ-2/MPU6050 samples from `devices` boxes, 1 Hz each."""
+    rng = np.random.default_rng(seed)
+    box = np.arange(n) % devices
+    accel = rng.normal(0, 0.3, (n, 3))
+    accel[:, 2] += 9.81
+    return pd.DataFrame({
+        "device": pd.Categorical.from_codes(box, [f"box-{i + 1}" for i in range(devices)]),
+        "ts": 1.7e9 + np.arange(n) // devices,
+        "smoke": rng.gamma(2, 0.5, n),
+        "temperature": 5 + rng.normal(0, 1, n),
+        "humidity": 50 + rng.normal(0, 5, n),
+        "accel_x": accel[:, 0],
+        "accel_y": accel[:, 1],
+        "accel_z": accel[:, 2],
+    })
+
+
+def rfid_frame(n, seed=0):
+    """Tag registry rows (uid, customer, pincode, parcel) with 4-byte UIDs."""
+    rng = np.random.default_rng(seed)
+    raw = np.sort(rng.integers(0, 2 ** 32, int(n * 1.01) + 16, dtype=np.uint64))
+    raw = raw[np.r_[True, raw[1:] != raw[:-1]]]  # np.unique is far slower here
+    raw = rng.permutation(raw)[:n]
+    digits = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+    columns = []
+    for shift in (24, 16, 8, 0):
+        octet = (raw >> np.uint64(shift)) & np.uint64(255)
+        columns += [digits[octet >> np.uint64(4)], digits[octet & np.uint64(15)], np.full(n, 58)]
+    uids = _ascii(columns[:-1])
+    return pd.DataFrame({
+        "uid": uids,
+        "customer": _ids("Customer_", n),
+        "pincode": rng.integers(110001, 855118, n).astype(str),
+        "parcel": _ids("PCL", n),
+    })
+
+
+# Measurement
+
+def _rss():
+    """Current resident set size in bytes (Linux), or None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError):
+        return None
+
+
+def _max_rss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _RssSampler(threading.Thread):
+    """Polls RSS in the background to find the peak while a step runs."""
+
+    def __init__(self, interval=0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.start_rss = self.peak = _rss()
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            self.peak = max(self.peak, _rss())
+
+    def stop(self):
+        self.done.set()
+        self.join()
+        self.peak = max(self.peak, _rss())
+        return self.peak, self.peak - self.start_rss
+
+
+class Recorder:
+    """Times named steps and records their memory peaks.
+
+    Peaks come from sampling RSS on a background thread, which barely
+    perturbs the timings. With `trace_memory`, Python-level allocation
+    peaks from tracemalloc are recorded too, at a large cost in speed.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.results = []
+
+    def measure(self, dataset, rows, step, fn, repeat=1):
+        sampler = _RssSampler() if _rss() is not None else None
+        if sampler is not None:
+            sampler.start()
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            value = fn()
+        seconds = (time.perf_counter() - start) / repeat
+        traced = None
+        if self.trace_memory:
+            traced = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        peak, delta = sampler.stop() if sampler is not None else (None, None)
+        self.results.append({
+            "dataset": dataset, "rows": rows, "step": step, "seconds": seconds,
+            "peak_rss_bytes": peak, "rss_delta_bytes": delta, "traced_peak_bytes": traced,
+            "max_rss_bytes": _max_rss(),
+        })
+        print(f"{dataset:>9} {rows:>10,} {step:<18} {seconds * 1000:>10.1f} ms"
+              + (f" {delta / 2 ** 20:>+9.1f} MB" if delta is not None else ""), flush=True)
+        return value
+
+
+def _fresh_load(loader, path):
+    import data_store
+    data_store._loaded.clear()
+    return loader(path)
+
+
+def _clear_png_cache():
+    import charts
+    with charts._pngs_lock:
+        charts._pngs.clear()
+        charts._pngs_size = 0
+
+
+# Suites, one per dataset
+
+def bench_orders(rec, n, seed, workdir):
+    from charts import histogram_png
+    from data_store import load_orders
+    from filter_index import FilterIndex
+    from order_cube import OrderCube
+    from order_stream import aggregate_csv
+    from regression import delivery_time_engine
+
+    path = os.path.join(workdir, "orders.csv")
+    frame = rec.measure("orders", n, "generate", lambda: orders_frame(n, seed))
+    rec.measure("orders", n, "write_csv", lambda: frame.to_csv(path, index=False))
+    del frame
+    rec.measure("orders", n, "load_csv", lambda: _fresh_load(load_orders, path))
+    data = rec.measure("orders", n, "load_cached", lambda: _fresh_load(load_orders, path))
+    rec.measure("orders", n, "stream_aggregate", lambda: aggregate_csv(path, memory_bytes=128 << 20))
+
+    start, end = data["Order_Date"].min(), data["Order_Date"].max()
+    filters = {"Vehicle": ["motorcycle", "scooter"], "Area": ["Urban", "Metropolitian"],
+               "Category": ["Electronics", "Books", "Toys"]}
+    index = rec.measure("orders", n, "filter_build", lambda: FilterIndex(data))
+    rows = rec.measure("orders", n, "filter", lambda: index.select(start, end, filters), repeat=5)
+    rec.measure("orders", n, "filter_pandas", lambda: data[
+        data["Order_Date"].between(start, end) & data["Vehicle"].isin(filters["Vehicle"])
+        & data["Area"].isin(filters["Area"]) & data["Category"].isin(filters["Category"])])
+
+    cube = rec.measure("orders", n, "groupby_build", lambda: OrderCube(data))
+    rec.measure("orders", n, "groupby", lambda: [cube.rollup(by, start, end, filters)
+                                                 for by in ("Order_Date", "Order_Hour", "Weather")], repeat=5)
+    engine = rec.measure("orders", n, "regression_build", lambda: delivery_time_engine(data))
+    rec.measure("orders", n, "regression_fit",
+                lambda: (engine.models.clear(), engine.fit(filters, {"Order_Date": (start, end)})), repeat=5)
+
+    def render():
+        _clear_png_cache()
+        return histogram_png(data["Delivery_Time"].iloc[rows], 30, "royalblue", "Delivery", "minutes")
+    rec.measure("orders", n, "render", render)
+
+
+def bench_insurance(rec, n, seed, workdir):
+    from charts import downsample, histogram_png
+    from data_store import load_insurance
+    from name_index import TrigramIndex
+    from regression import claim_amount_engine, premium_claim_engine
+    from summary_stats import FrameSummary
+
+    path = os.path.join(workdir, "insurance.csv")
+    frame = rec.measure("insurance", n, "generate", lambda: insurance_frame(n, seed))
+    rec.measure("insurance", n, "write_csv", lambda: frame.to_csv(path, index=False))
+    del frame
+    rec.measure("insurance", n, "load_csv", lambda: _fresh_load(load_insurance, path))
+    data = rec.measure("insurance", n, "load_cached", lambda: _fresh_load(load_insurance, path))
+
+    summary = rec.measure("insurance", n, "summary_build", lambda: FrameSummary(data))
+    rec.measure("insurance", n, "summary", lambda: (setattr(summary, "_describe", None), summary.describe()))
+    rec.measure("insurance", n, "describe_pandas", data.describe)
+    rec.measure("insurance", n, "downsample",
+                lambda: downsample(data, "Health_Risk_Score", "Claim_Amount", group="Region"))
+    rec.measure("insurance", n, "regression", lambda: (claim_amount_engine(data).fit(),
+                                                       premium_claim_engine(data).fit()))
+    index = rec.measure("insurance", n, "name_index_build", lambda: TrigramIndex(data["Customer_Name"]))
+    queries = [f"customer_{i}" for i in np.random.default_rng(seed).integers(1, n + 1, 100)]
+    rec.measure("insurance", n, "name_search", lambda: [index.search(q) for q in queries])
+
+    def render():
+        _clear_png_cache()
+        return histogram_png(data["Age"], 20, "darkgreen", "Age", "Age")
+    rec.measure("insurance", n, "render", render)
+
+
+def bench_banking(rec, n, seed, workdir):
+    from banking_store import BankingStore
+    from projection import AccountProjection
+
+    path = os.path.join(workdir, "banking.csv")
+    frame = rec.measure("banking", n, "generate", lambda: banking_frame(n, seed))
+    frame.to_csv(path, index=False)
+    entries = banking_frame(min(n, 20_000), seed + 1).to_dict("records")
+    store = BankingStore(path)
+
+    def ingest():
+        pending = [store.append(entry, wait=False) for entry in entries]
+        for future in pending:
+            future.result()
+    rec.measure("banking", len(entries), "ingest", ingest)
+    rec.measure("banking", n, "read", store.read)
+    rec.measure("banking", n, "summary", lambda: store.summary().counts("Account_Type"))
+    rec.measure("banking", n, "compact", store.compact)
+    projection = rec.measure("banking", n, "project", lambda: AccountProjection(frame))
+    rec.measure("banking", n, "rollup", projection.rollup)
+    rec.measure("banking", n, "trajectory", lambda: projection.trajectory(240, level="Account_Type"))
+
+
+def bench_sensors(rec, n, seed, workdir):
+    from anomaly import AnomalyDetector
+    from live_buffer import LiveBuffer
+    from shock import handling_events
+    from timeseries import CHANNELS, TimeSeriesStore
+
+    frame = rec.measure("sensors", n, "generate", lambda: sensor_frame(n, seed))
+    devices = frame["device"].to_numpy(dtype=object)
+
+    def timeseries():
+        store = TimeSeriesStore(os.path.join(workdir, "ts_segments"), capacity=4096)
+        codes = frame["device"].cat.codes.to_numpy()
+        order = np.argsort(codes, kind="stable")
+        bounds = np.flatnonzero(np.r_[True, codes[order][1:] != codes[order][:-1], True])
+        values = frame[CHANNELS].to_numpy(dtype=np.float32)[order]
+        ts = frame["ts"].to_numpy()[order]
+        for i in range(len(bounds) - 1):
+            rows = slice(bounds[i], bounds[i + 1])
+            store.append(devices[order[bounds[i]]], ts[rows], values[rows])
+        return store
+    rec.measure("sensors", n, "ingest_timeseries", timeseries)
+
+    rec.measure("sensors", n, "anomaly", lambda: AnomalyDetector().update(
+        devices, frame["ts"], frame["smoke"], frame["temperature"], frame["humidity"]))
+
+    def live():
+        buffer = LiveBuffer()
+        buffer.append_many(devices, frame["ts"], frame[["smoke", "temperature", "humidity"]].to_numpy())
+        return buffer.since(max(buffer.seq - 10_000, 0))
+    rec.measure("sensors", n, "live_buffer", live)
+    rec.measure("sensors", n, "shock", lambda: handling_events(
+        devices, frame["ts"], frame["accel_x"], frame["accel_y"], frame["accel_z"]))
+
+
+def bench_rfid(rec, n, seed, workdir):
+    from journey import LOCATIONS, JourneyIndex
+    from rfid_registry import TagRegistry
+
+    tags = rec.measure("rfid", n, "generate", lambda: rfid_frame(n, seed))
+    registry = TagRegistry()
+    rec.measure("rfid", n, "registry_load", lambda: registry.load_frame(tags))
+    rng = np.random.default_rng(seed)
+    probe = tags["uid"].to_numpy()[rng.integers(0, n, min(n, 100_000))]
+    rec.measure("rfid", len(probe), "registry_lookup", lambda: registry.lookup_many(probe))
+
+    journey = JourneyIndex()
+    scans = rng.integers(0, n, n)
+    rec.measure("rfid", n, "journey_append", lambda: journey.append_many(
+        np.arange(n, dtype=np.float64), tags["uid"].to_numpy()[scans],
+        np.asarray(LOCATIONS, dtype=object)[rng.integers(0, len(LOCATIONS), n)]))
+    rec.measure("rfid", n, "journey_state_at", lambda: journey.status_counts_at(n / 2))
+
+
+SUITES = {
+    "orders": bench_orders,
+    "insurance": bench_insurance,
+    "banking": bench_banking,
+    "sensors": bench_sensors,
+    "rfid": bench_rfid,
+}
+
+
+def compare(results, baseline_path, threshold):
+    """Print steps that got slower than `threshold` x the baseline; returns their count."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["dataset"], r["rows"], r["step"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    for result in results:
+        old = baseline.get((result["dataset"], result["rows"], result["step"]))
+        if old is None or old["seconds"] <= 0:
+            continue
+        ratio = result["seconds"] / old["seconds"]
+        if ratio > threshold:
+            regressions += 1
+            print(f"REGRESSION {result['dataset']}/{result['step']} @ {result['rows']:,} rows: "
+                  f"{old['seconds'] * 1000:.1f} -> {result['seconds'] * 1000:.1f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard hot paths on synthetic data")
+    parser.add_argument("--rows", default="10000,100000,1000000",
+                        help="comma-separated row counts (10k to 50M)")
+    parser.add_argument("--datasets", default=",".join(DATASETS), help="comma-separated subset of "
+                        + ", ".join(DATASETS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="earlier results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also record tracemalloc peaks (much slower; distorts timings)")
+    args = parser.parse_args()
+
+    recorder = Recorder(trace_memory=args.trace_memory)
+    sizes = [int(float(size)) for size in args.rows.split(",")]
+    datasets = [name.strip() for name in args.datasets.split(",") if name.strip()]
+    started = time.strftime("%Y-%m-%dT%H:%M:%S")
+    for n in sizes:
+        for name in datasets:
+            with tempfile.TemporaryDirectory() as workdir:
+                SUITES[name](recorder, n, args.seed, workdir)
+
+    report = {
+        "started": started,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "seed": args.seed,
+        "results": recorder.results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(recorder.results)} results to {args.output}")
+    if args.compare and compare(recorder.results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
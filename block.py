@@ -1,18 +1,19 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
 import plotly.express as px
 
+from charts import downsample, fit_png, histogram_png
+from data_store import data_token, derived, load_insurance
+from name_index import TrigramIndex
+from regression import claim_amount_engine, premium_claim_engine
+from summary_stats import FrameSummary
+
 # Read Dataset
-@st.cache
 def load_data():
     # Ensure your `insurance.csv` file is in the correct directory
-    # Adjust the path if necessary
-    return pd.read_csv('insurance_data.csv')
+    # Adjust the path if necessary; the Arrow cache is rebuilt when it changes
+    return load_insurance('insurance_data.csv')
 
 # Load the dataset
 insurance_data = load_data()
@@ -33,24 +34,27 @@ if selected_dashboard == "🏥 Insurance Data":
     
     # Summary Statistics
     st.markdown("### Summary Statistics of the Data")
-    st.write(insurance_data.describe())
+    st.write(derived(insurance_data, "summary", FrameSummary).describe())
     
     # Individual Analytics
     st.subheader(":mag: Search Individual Analytics")
     name = st.text_input("Enter the Name:")
     if name:
-        person_data = insurance_data[insurance_data['Name'].str.contains(name, case=False)]
+        # Substring search through a trigram index built once per dataset version
+        name_column = 'Name' if 'Name' in insurance_data.columns else 'Customer_Name'
+        name_index = derived(insurance_data, "name_index", lambda d: TrigramIndex(d[name_column]))
+        person_data = insurance_data.iloc[name_index.search(name)]
         if not person_data.empty:
-            st.write(person_data)
             # Predict based on Premium Amount
             if 'Premium_Amount' in person_data.columns and 'Claim_Amount' in insurance_data.columns:
-                premium = person_data['Premium_Amount'].values[0]
-                # Simple model logic (placeholder)
-                claim_prediction_model = LinearRegression()
-                X = insurance_data[['Premium_Amount']]
-                y = insurance_data['Claim_Amount']
-                claim_prediction_model.fit(X, y)
-                predicted_claim = claim_prediction_model.predict([[premium]])[0]
+                # Fitted once per dataset version, then one batched prediction for all matches
+                claim_prediction_model = derived(insurance_data, "premium_claim_regression",
+                                                 premium_claim_engine).fit()
+                person_data = person_data.assign(
+                    Predicted_Claim_Amount=claim_prediction_model.predict(person_data['Premium_Amount']))
+            st.write(person_data)
+            if 'Predicted_Claim_Amount' in person_data.columns:
+                predicted_claim = person_data['Predicted_Claim_Amount'].iloc[0]
                 st.success(f"Predicted Claim Amount: ${predicted_claim:.2f}")
         else:
             st.warning("No data found for the given name.")
@@ -66,18 +70,17 @@ if selected_dashboard == "🏥 Insurance Data":
     
     # Age Distribution
     st.subheader(":bust_in_silhouette: Age Distribution")
-    fig, ax = plt.subplots(figsize=(5, 3))
-    sns.histplot(insurance_data['Age'], bins=20, kde=True, ax=ax, color="darkgreen")
-    ax.set_title("Age Distribution of Insurance Customers", fontsize=12)
-    ax.set_xlabel("Age", fontsize=10)
-    ax.set_ylabel("Frequency", fontsize=10)
-    st.pyplot(fig)
+    st.image(histogram_png(insurance_data['Age'], 20, "darkgreen", "Age Distribution of Insurance Customers",
+                           "Age", figsize=(5, 3), fontsize=12, key=data_token(insurance_data)))
     
     # Health Risk vs Claim Amount
     st.subheader(":bar_chart: Health Risk vs. Claim Amount Analysis")
     if 'Health_Risk_Score' in insurance_data.columns and 'Claim_Amount' in insurance_data.columns:
+        # At most 5000 points reach the browser; outliers and every Region are kept
+        scatter_rows = derived(insurance_data, "risk_claim_points", lambda d: downsample(
+            d, 'Health_Risk_Score', 'Claim_Amount', group='Region' if 'Region' in d.columns else None))
         fig = px.scatter(
-            insurance_data, 
+            scatter_rows, 
             x='Health_Risk_Score', 
             y='Claim_Amount', 
             color='Region' if 'Region' in insurance_data.columns else None, 
@@ -93,19 +96,14 @@ if selected_dashboard == "🏥 Insurance Data":
     # Predictive Insights
     st.subheader(":crystal_ball: Predictive Insights (Regression Analysis)")
     if 'Health_Risk_Score' in insurance_data.columns and 'Claim_Amount' in insurance_data.columns:
-        X = insurance_data[['Health_Risk_Score']]
-        y = insurance_data['Claim_Amount']
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        model = LinearRegression()
-        model.fit(X_train, y_train)
+        claim_engine = derived(insurance_data, "claim_regression", claim_amount_engine)
+        model = claim_engine.fit()
+        plot_rows = derived(insurance_data, "claim_fit_points",
+                            lambda d: downsample(d, 'Health_Risk_Score', 'Claim_Amount', max_points=2000))
+        X_test, y_test = plot_rows['Health_Risk_Score'], plot_rows['Claim_Amount']
         y_pred = model.predict(X_test)
-        fig, ax = plt.subplots(figsize=(5, 3))
-        ax.scatter(X_test, y_test, label="Actual Values", alpha=0.6)
-        ax.plot(X_test, y_pred, color='red', label="Predicted Values", linewidth=2)
-        ax.set_title("Health Risk Score vs. Predicted Claim Amount", fontsize=12)
-        ax.set_xlabel("Health Risk Score", fontsize=10)
-        ax.set_ylabel("Claim Amount", fontsize=10)
-        ax.legend(fontsize=10)
-        st.pyplot(fig)
+        st.image(fit_png(X_test, y_test, y_pred, "Health Risk Score vs. Predicted Claim Amount",
+                         "Health Risk Score", "Claim Amount", figsize=(5, 3), fontsize=12, alpha=0.6, linewidth=2,
+                         key=data_token(insurance_data)))
     else:
         st.error("Required columns for regression analysis are missing in the dataset.")
@@ -0,0 +1,213 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+# Rendered PNGs shared by every session, evicted least recently used first
+CACHE_BYTES = 64 << 20
+
+_pngs = OrderedDict()
+_pngs_size = 0
+_pngs_lock = threading.Lock()
+
+
+def fingerprint(*parts, **params):
+    """Stable hash of chart inputs: frames/series/arrays by content, anything else by repr.
+
+    Hashing by content is O(rows); callers that already know what the data
+    is (e.g. data_token plus the filter selection) should pass that instead.
+    """
+    digest = hashlib.sha1()
+    for part in list(parts) + sorted(params.items()):
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            names = part.columns if isinstance(part, pd.DataFrame) else part.name
+            digest.update(repr(names).encode())
+            digest.update(pd.util.hash_pandas_object(part).to_numpy().tobytes())
+        elif isinstance(part, np.ndarray) and part.dtype != object:
+            digest.update(f"{part.dtype}{part.shape}".encode())
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def render(key, draw, figsize=(5, 3), dpi=100):
+    """PNG bytes of the chart drawn by `draw(ax)`, rendered only on a cache miss.
+
+    Figures are created without pyplot, so nothing is left registered in
+    pyplot's figure manager; each one is released as soon as it is saved.
+    """
+    global _pngs_size
+    with _pngs_lock:
+        if key in _pngs:
+            _pngs.move_to_end(key)
+            return _pngs[key]
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    try:
+        draw(fig.add_subplot())
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png")
+    finally:
+        fig.clear()
+    png = buffer.getvalue()
+
+    with _pngs_lock:
+        if key not in _pngs:
+            _pngs[key] = png
+            _pngs_size += len(png)
+        while _pngs_size > CACHE_BYTES and len(_pngs) > 1:
+            _, old = _pngs.popitem(last=False)
+            _pngs_size -= len(old)
+    return png
+
+
+def binned_kde(values, grid_size=1024, bw_adjust=1.0, weights=None):
+    """Gaussian KDE on a regular grid via linear binning and an FFT convolution.
+
+    Uses Scott's rule like seaborn; costs O(n + grid_size log grid_size)
+    instead of O(n * grid_size). `weights` counts each value that many
+    times (pre-binned data). Returns (x, density) over the data range.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=np.float64)
+    finite = np.isfinite(values)
+    values, weights = values[finite], weights[finite]
+    n = weights.sum()
+    if n < 2 or values.min() == values.max():
+        return np.empty(0), np.empty(0)
+    mean = (weights * values).sum() / n
+    std = np.sqrt((weights * (values - mean) ** 2).sum() / (n - 1))
+    bandwidth = bw_adjust * std * n ** (-1 / 5)
+    low, high = values.min() - 3 * bandwidth, values.max() + 3 * bandwidth
+    step = (high - low) / (grid_size - 1)
+
+    # Linear binning: split each point's weight between its two grid neighbours
+    position = (values - low) / step
+    left = np.floor(position).astype(np.int64)
+    frac = position - left
+    binned = np.bincount(left, weights * (1 - frac), minlength=grid_size + 1)
+    binned += np.bincount(left + 1, weights * frac, minlength=grid_size + 1)
+    binned = binned[:grid_size]
+
+    offsets = np.arange(-grid_size + 1, grid_size) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+    size = 1 << int(2 * grid_size - 1 + grid_size - 1).bit_length()
+    density = np.fft.irfft(np.fft.rfft(binned, size) * np.fft.rfft(kernel, size), size)
+    density = density[grid_size - 1:2 * grid_size - 1] / n
+
+    x = low + np.arange(grid_size) * step
+    inside = (x >= values.min()) & (x <= values.max())
+    return x[inside], np.maximum(density[inside], 0.0)
+
+
+def downsample(frame, x, y, max_points=5000, group=None, bins=64, seed=0):
+    """At most `max_points` rows of `frame` that keep the shape of the x/y scatter.
+
+    Rows are binned on a bins x bins grid (per `group`, e.g. Region). One
+    random row of every occupied cell is kept first, sparsest cells first,
+    so outliers and small groups survive; the rest of the budget is a
+    uniform random sample, which keeps the relative density of busy areas.
+    """
+    if len(frame) <= max_points:
+        return frame
+    xs = frame[x].to_numpy(dtype=np.float64)
+    ys = frame[y].to_numpy(dtype=np.float64)
+    rows = np.flatnonzero(np.isfinite(xs) & np.isfinite(ys))
+    if len(rows) <= max_points:
+        return frame.iloc[rows]
+
+    def cell(values):
+        low, high = values.min(), values.max()
+        scaled = (values - low) / ((high - low) or 1.0) * bins
+        return np.minimum(scaled.astype(np.int64), bins - 1)
+
+    key = cell(xs[rows]) * bins + cell(ys[rows])
+    if group is not None:
+        codes, _ = pd.factorize(frame[group].iloc[rows])
+        key += (codes.astype(np.int64) + 1) * bins * bins
+    rng = np.random.default_rng(seed)
+    noise = rng.random(len(rows))
+
+    # One random representative per cell, in order of increasing cell count
+    order = np.lexsort((noise, key))
+    starts = np.flatnonzero(np.r_[True, key[order][1:] != key[order][:-1]])
+    counts = np.diff(np.r_[starts, len(order)])
+    representatives = order[starts]
+    representatives = representatives[np.lexsort((noise[representatives], counts))][:max_points]
+
+    chosen = np.zeros(len(rows), dtype=bool)
+    chosen[representatives] = True
+    fill = rng.choice(np.flatnonzero(~chosen), max_points - len(representatives), replace=False)
+    chosen[fill] = True
+    return frame.iloc[rows[chosen]]
+
+
+def histogram(ax, values, bins, color, kde=True, weights=None):
+    """Histogram bars plus a count-scaled KDE line, in the style of sns.histplot."""
+    values = np.asarray(values, dtype=np.float64)
+    weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=np.float64)
+    finite = np.isfinite(values)
+    values, weights = values[finite], weights[finite]
+    counts, edges = np.histogram(values, bins=bins, weights=weights)
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", color=color, alpha=0.5,
+           edgecolor="white", linewidth=0.5)
+    if kde:
+        x, density = binned_kde(values, weights=weights)
+        ax.plot(x, density * weights.sum() * (edges[1] - edges[0]), color=color, linewidth=1.5)
+
+
+def histogram_png(values, bins, color, title, xlabel, ylabel="Frequency", figsize=(5, 3), fontsize=None,
+                  weights=None, key=None):
+    """Cached histogram + KDE chart as PNG bytes; `weights` gives per-value counts.
+
+    `key` identifies the values (see fingerprint); without it they are hashed.
+    """
+    params = dict(bins=bins, color=color, title=title, xlabel=xlabel, ylabel=ylabel, figsize=figsize,
+                  fontsize=fontsize)
+    if key is None:
+        values = np.asarray(values, dtype=np.float64)
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64)
+        key = fingerprint("histogram", values, weights, **params)
+    else:
+        key = fingerprint("histogram", key, **params)
+
+    def draw(ax):
+        histogram(ax, values, bins, color, weights=weights)
+        ax.set_title(title, fontsize=fontsize)
+        ax.set_xlabel(xlabel, fontsize=fontsize and fontsize - 2)
+        ax.set_ylabel(ylabel, fontsize=fontsize and fontsize - 2)
+
+    return render(key, draw, figsize)
+
+
+def fit_png(x, y, y_pred, title, xlabel, ylabel, figsize=(5, 3), fontsize=None, alpha=None, linewidth=None,
+            key=None):
+    """Cached actual-vs-predicted chart (scatter of actual values, fitted line).
+
+    `key` identifies the points (see fingerprint); without it they are hashed.
+    """
+    params = dict(title=title, xlabel=xlabel, ylabel=ylabel, figsize=figsize, fontsize=fontsize, alpha=alpha,
+                  linewidth=linewidth)
+    if key is None:
+        x, y, y_pred = (np.asarray(v, dtype=np.float64) for v in (x, y, y_pred))
+        key = fingerprint("fit", x, y, y_pred, **params)
+    else:
+        key = fingerprint("fit", key, **params)
+
+    def draw(ax):
+        ax.scatter(x, y, label="Actual Values", alpha=alpha)
+        ax.plot(x, y_pred, color="red", label="Predicted Values", linewidth=linewidth)
+        ax.set_title(title, fontsize=fontsize)
+        ax.set_xlabel(xlabel, fontsize=fontsize and fontsize - 2)
+        ax.set_ylabel(ylabel, fontsize=fontsize and fontsize - 2)
+        ax.legend(fontsize=fontsize and fontsize - 2)
+
+    return render(key, draw, figsize)
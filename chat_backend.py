@@ -0,0 +1,208 @@
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# Words dropped when normalising a question for the cache; question words stay
+_FILLER = {
+    "a", "an", "the", "is", "are", "am", "of", "for", "to", "my", "me", "i", "you", "your",
+    "please", "pls", "plz", "kindly", "can", "could", "would", "tell", "hi", "hello", "hey",
+    "thanks", "thank", "drishti",
+}
+
+# One response cache per process; replies are keyed by the conversation
+# they answer, so sessions only share replies to identical conversations
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def normalize_query(prompt):
+    """Case-, punctuation- and filler-insensitive form of a question (IDs and word order are kept)."""
+    text = unicodedata.normalize("NFKC", prompt).casefold()
+    words = re.sub(r"[^\w\s]", " ", text).split()
+    return " ".join(word for word in words if word not in _FILLER)
+
+
+# Model clients: anything with stream(messages) yielding text chunks, where
+# messages is a list of (role, text) with role "user" or "model".
+
+class GeminiClient:
+    """Google Gemini through google.generativeai, streamed."""
+
+    def __init__(self, api_key, model_name="gemini-pro"):
+        import google.generativeai as gen_ai
+        gen_ai.configure(api_key=api_key)
+        self.model = gen_ai.GenerativeModel(model_name)
+
+    def stream(self, messages):
+        contents = [{"role": role, "parts": [text]} for role, text in messages]
+        for chunk in self.model.generate_content(contents, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+
+class LocalStubClient:
+    """Offline stand-in model: answers deterministically, word by word."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def stream(self, messages):
+        prompt = messages[-1][1] if messages else ""
+        reply = (f"(offline) You asked: {prompt.strip()} - I have {len(messages) - 1} earlier "
+                 f"messages of context. Parcel status lookups need the live model.")
+        for word in reply.split(" "):
+            if self.delay:
+                time.sleep(self.delay)
+            yield word + " "
+
+
+def default_client():
+    """Gemini when GOOGLE_API_KEY is set (and CHAT_MODEL is not "stub"), else the local stub."""
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if api_key and os.getenv("CHAT_MODEL", "gemini-pro") != "stub":
+        return GeminiClient(api_key, os.getenv("CHAT_MODEL", "gemini-pro"))
+    return LocalStubClient()
+
+
+class ResponseCache:
+    """LRU of finished replies keyed by exact prompt, then by normalised prompt.
+
+    Both keys include a digest of the conversation context the reply was
+    generated from (summary and message window), so a follow-up such as
+    "where is it now?" only hits for the same conversation; opening
+    questions (empty context) are shared. Entries expire after `ttl`
+    seconds so parcel statuses do not go stale.
+    """
+
+    def __init__(self, max_entries=512, ttl=300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.exact = OrderedDict()
+        self.normalized = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def _key(text, context):
+        digest = hashlib.sha1()
+        for role, message in context:
+            digest.update(f"{role}\0{message}\0".encode("utf-8"))
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _lookup(self, table, key):
+        entry = table.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            del table[key]
+            return None
+        table.move_to_end(key)
+        return entry[1]
+
+    def get(self, prompt, context=()):
+        """Cached reply to `prompt` after the (role, text) messages `context`, or None."""
+        with self.lock:
+            reply = self._lookup(self.exact, self._key(prompt.strip(), context))
+            if reply is None:
+                reply = self._lookup(self.normalized, self._key(normalize_query(prompt), context))
+            if reply is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return reply
+
+    def put(self, prompt, reply, context=()):
+        now = time.monotonic()
+        with self.lock:
+            for table, key in ((self.exact, self._key(prompt.strip(), context)),
+                               (self.normalized, self._key(normalize_query(prompt), context))):
+                table[key] = (now, reply)
+                table.move_to_end(key)
+                while len(table) > self.max_entries:
+                    table.popitem(last=False)
+
+
+def extractive_summary(summary, dropped, max_chars=1500):
+    """Fold dropped (role, text) messages into a running summary of first sentences."""
+    lines = [summary] if summary else []
+    for role, text in dropped:
+        first = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0][:160]
+        lines.append(f"{'User' if role == 'user' else 'Assistant'}: {first}")
+    return "\n".join(lines)[-max_chars:]
+
+
+class ChatHistory:
+    """Bounded conversation window with a running summary of older turns.
+
+    At most `max_messages` messages (and `max_chars` characters) are kept
+    verbatim; older ones are folded into `summary` by `summarize`, so the
+    prompt context and the messages re-rendered per rerun stay bounded.
+    """
+
+    def __init__(self, max_messages=12, max_chars=8000, summarize=extractive_summary):
+        self.max_messages = max_messages
+        self.max_chars = max_chars
+        self.summarize = summarize
+        self.messages = []
+        self.summary = ""
+        self.summarized = 0
+
+    def add(self, role, text):
+        self.messages.append((role, text))
+        dropped = []
+        while len(self.messages) > 2 and (len(self.messages) > self.max_messages or
+                                          sum(len(t) for _, t in self.messages) > self.max_chars):
+            dropped.append(self.messages.pop(0))
+        if dropped:
+            self.summary = self.summarize(self.summary, dropped)
+            self.summarized += len(dropped)
+
+    def context(self, prompt):
+        """Messages to send for `prompt`: summary (if any), the window, then the prompt."""
+        messages = []
+        if self.summary:
+            messages.append(("user", "Summary of our earlier conversation:\n" + self.summary))
+            messages.append(("model", "Understood."))
+        return messages + list(self.messages) + [("user", prompt)]
+
+
+class ChatBackend:
+    """Streams replies from a pluggable client through the cache and history."""
+
+    def __init__(self, client=None, cache=None, history=None):
+        self.client = client if client is not None else default_client()
+        self.cache = cache if cache is not None else get_response_cache()
+        self.history = history if history is not None else ChatHistory()
+
+    def reply(self, prompt):
+        """Yield the reply to `prompt` chunk by chunk; cached replies come in one chunk."""
+        messages = self.history.context(prompt)
+        context = messages[:-1]
+        cached = self.cache.get(prompt, context)
+        if cached is not None:
+            chunks = [cached]
+        else:
+            chunks = self.client.stream(messages)
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        text = "".join(parts)
+        self.history.add("user", prompt)
+        self.history.add("model", text)
+        if cached is None and text:
+            self.cache.put(prompt, text, context)
+
+
+def get_response_cache():
+    """Return the process-wide response cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
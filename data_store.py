@@ -0,0 +1,193 @@
+import glob
+import hashlib
+import itertools
+import json
+import os
+import threading
+import weakref
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+# Columns with only a handful of distinct values; stored as categoricals
+CATEGORICAL_COLUMNS = ["Vehicle", "Area", "Category", "Weather", "Traffic", "Region"]
+
+CACHE_DIR = ".cache"
+
+# Older pandas turns Arrow strings into object arrays, a private copy per
+# process; map them to Arrow-backed strings there instead
+_STRING_TYPES = None if pd.Series(["a"]).dtype != object else {
+    pa.string(): pd.StringDtype("pyarrow"), pa.large_string(): pd.StringDtype("pyarrow")}
+
+# In-process memo so Streamlit reruns reuse the already loaded frame
+_loaded = {}
+
+# Indexes/aggregates built from a loaded frame, keyed by id() of that frame
+_derived = {}
+_tokens = itertools.count()
+
+
+def _file_hash(path):
+    """Hash the source file contents in 1 MB blocks."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_paths(path):
+    """Return the (Arrow file prefix, metadata) cache paths for a source CSV."""
+    folder = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(folder, stem), os.path.join(folder, stem + ".json")
+
+
+def _tmp_path(path):
+    """Scratch name unique to this process and thread, for write-then-rename."""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_meta(meta_path, meta):
+    tmp_path = _tmp_path(meta_path)
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def to_categoricals(df):
+    """Convert the low-cardinality columns present in `df` to categoricals."""
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns and df[column].dtype != "category":
+            df[column] = df[column].astype("category")
+    return df
+
+
+def prepare_orders(df):
+    """Parse order dates/hours once so dashboards never re-parse them."""
+    df["Order_Date"] = pd.to_datetime(df["Order_Date"])
+    df["Order_Hour"] = pd.to_datetime(df["Order_Time"], format="%H:%M:%S").dt.hour.astype("int8")
+    return to_categoricals(df)
+
+
+def publish_arrow(data, arrow_path):
+    """Write `data` as an uncompressed Arrow IPC file, atomically."""
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    tmp_path = _tmp_path(arrow_path)
+    with ipc.new_file(tmp_path, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, arrow_path)
+
+
+def map_arrow(arrow_path):
+    """Frame backed by a memory map of a published Arrow file.
+
+    Numeric, datetime and string columns point straight into the mapping,
+    so every session and process that maps the same version shares one
+    copy in the OS page cache; only small categorical codes are copied.
+    The columns are read-only (pandas copies on write).
+    """
+    table = ipc.open_file(pa.memory_map(arrow_path)).read_all()
+    return table.to_pandas(split_blocks=True, types_mapper=_STRING_TYPES and _STRING_TYPES.get)
+
+
+def _drop_old_versions(prefix, keep):
+    """Remove superseded Arrow versions; processes that mapped them keep their pages."""
+    for old_path in glob.glob(glob.escape(prefix) + ".*.arrow") + [prefix + ".parquet"]:
+        if os.path.basename(old_path) != keep:
+            try:
+                os.remove(old_path)
+            except OSError:  # missing, or still mapped on Windows
+                pass
+
+
+def load_cached(path, prepare=to_categoricals):
+    """Load a CSV through a shared, memory-mapped Arrow cache.
+
+    The CSV is parsed and passed through `prepare` only when the cache is
+    missing or the source contents changed. Each parsed version is
+    published once as `<stem>.<sha1>.arrow` and the metadata file is then
+    pointed at it, so other processes swap to the new version on their
+    next load while frames already handed out keep mapping the old one.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if key in _loaded:
+        return _loaded[key]
+
+    prefix, meta_path = _cache_paths(path)
+    meta = _read_meta(meta_path)
+    data = None
+    arrow_path = meta and meta.get("arrow") and os.path.join(os.path.dirname(prefix), meta["arrow"])
+    if arrow_path and os.path.exists(arrow_path):
+        if meta["mtime_ns"] == stat.st_mtime_ns and meta["size"] == stat.st_size:
+            data = map_arrow(arrow_path)
+        elif meta["size"] == stat.st_size and meta["sha1"] == _file_hash(path):
+            # Touched but unchanged: keep the cache, refresh the mtime
+            meta["mtime_ns"] = stat.st_mtime_ns
+            _write_meta(meta_path, meta)
+            data = map_arrow(arrow_path)
+
+    if data is None:
+        sha1 = _file_hash(path)
+        arrow_path = f"{prefix}.{sha1[:16]}.arrow"
+        os.makedirs(os.path.dirname(prefix), exist_ok=True)
+        publish_arrow(prepare(pd.read_csv(path)), arrow_path)
+        _write_meta(meta_path, {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha1": sha1,
+            "arrow": os.path.basename(arrow_path),
+        })
+        _drop_old_versions(prefix, os.path.basename(arrow_path))
+        # Serve the published copy, not the private one just parsed
+        data = map_arrow(arrow_path)
+
+    # Drop frames loaded from older versions of the same file
+    for old_key in [k for k in _loaded if k[0] == key[0]]:
+        del _loaded[old_key]
+    _loaded[key] = data
+    return data
+
+
+def derived(data, name, build):
+    """Build `build(data)` once per loaded frame and reuse it on reruns.
+
+    Entries are dropped automatically when the frame itself is released,
+    e.g. after the source file changes and is reloaded.
+    """
+    key = id(data)
+    if key not in _derived:
+        _derived[key] = {}
+        weakref.finalize(data, _derived.pop, key, None)
+    cache = _derived[key]
+    if name not in cache:
+        cache[name] = build(data)
+    return cache[name]
+
+
+def data_token(data):
+    """Process-unique number for a loaded frame (or aggregates object), for cache keys.
+
+    Unlike id() it is never reused by a later frame.
+    """
+    return derived(data, "token", lambda _: next(_tokens))
+
+
+def load_orders(path="cleaned_amazon_dataset-2.csv"):
+    """Load the order dataset with parsed Order_Date/Order_Hour."""
+    return load_cached(path, prepare=prepare_orders)
+
+
+def load_insurance(path="insurance_data.csv"):
+    """Load the insurance dataset."""
+    return load_cached(path)
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+# Sidebar multiselect filters on the Order Analytics page
+FILTER_COLUMNS = ["Vehicle", "Area", "Category"]
+
+
+class FilterIndex:
+    """Prebuilt index for the Order Analytics sidebar filters.
+
+    Rows are kept in Order_Date order so a date range is a contiguous slice
+    found by binary search. Each value of a filter column has a packed
+    bitmap over that order; a query ORs the selected values of a column,
+    ANDs the columns together and only touches the bytes inside the date
+    slice. Results are row positions into the original frame.
+    """
+
+    def __init__(self, data, date_column="Order_Date", columns=FILTER_COLUMNS):
+        dates = data[date_column].to_numpy(dtype="datetime64[ns]")
+        self.order = np.argsort(dates, kind="stable")
+        self.dates = dates[self.order]
+        self.size = len(data)
+        self.bitmaps = {}
+        self.complete = {}
+        for column in columns:
+            codes, uniques = pd.factorize(data[column].to_numpy()[self.order])
+            self.bitmaps[column] = {
+                value: np.packbits(codes == code) for code, value in enumerate(uniques)
+            }
+            # Rows with a missing value never match, so "all selected" still filters
+            self.complete[column] = bool((codes >= 0).all())
+
+    def _column_mask(self, column, selected, first_byte, last_byte):
+        """OR together the bitmaps of the selected values for one column."""
+        bitmaps = self.bitmaps[column]
+        mask = np.zeros(last_byte - first_byte, dtype=np.uint8)
+        for value in selected:
+            if value in bitmaps:
+                np.bitwise_or(mask, bitmaps[value][first_byte:last_byte], out=mask)
+        return mask
+
+    def date_slice(self, start, end):
+        """Return the [lo, hi) span of date-ordered rows with start <= date <= end."""
+        lo = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), "ns"), side="left")
+        hi = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), "ns"), side="right")
+        return int(lo), int(max(lo, hi))
+
+    def select(self, start, end, filters):
+        """Return positions of rows in the date range matching every filter.
+
+        `filters` maps a column to the list of selected values. Positions
+        come back in date order and index into the frame the index was
+        built from (use with `data.iloc`).
+        """
+        lo, hi = self.date_slice(start, end)
+        if lo == hi:
+            return np.empty(0, dtype=np.intp)
+
+        first_byte, last_byte = lo >> 3, (hi + 7) >> 3
+        mask = None
+        for column, selected in filters.items():
+            selected = set(selected)
+            if self.complete[column] and selected.issuperset(self.bitmaps[column]):
+                continue
+            column_mask = self._column_mask(column, selected, first_byte, last_byte)
+            if mask is None:
+                mask = column_mask
+            else:
+                np.bitwise_and(mask, column_mask, out=mask)
+
+        if mask is None:
+            positions = np.arange(lo, hi)
+        else:
+            offset = first_byte << 3
+            bits = np.unpackbits(mask)[lo - offset:hi - offset]
+            positions = np.flatnonzero(bits) + lo
+        return self.order[positions]
+
+
+def take_columns(data, rows, columns):
+    """The `columns` of `data` at positions `rows`, gathering only those columns.
+
+    When every row is selected the columns are returned as they are (order
+    is not restored; the charts using this do not depend on it).
+    """
+    if len(rows) == len(data):
+        return data[columns]
+    return pd.DataFrame({column: data[column].to_numpy()[rows] for column in columns})
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+# Quadtree grid over lon [-180, 180) x lat [-90, 90): zoom z has 2^z x 2^z cells
+MAX_ZOOM = 24
+
+_BASE32 = np.frombuffer(b"0123456789bcdefghjkmnpqrstuvwxyz", dtype=np.uint8)
+
+
+def _spread(v):
+    """Spread the low 32 bits of `v` so bit i moves to bit 2i."""
+    v = v & np.uint64(0xFFFFFFFF)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                        (2, 0x3333333333333333), (1, 0x5555555555555555)):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def _compact(v):
+    """Inverse of _spread."""
+    v = v & np.uint64(0x5555555555555555)
+    for shift, mask in ((1, 0x3333333333333333), (2, 0x0F0F0F0F0F0F0F0F), (4, 0x00FF00FF00FF00FF),
+                        (8, 0x0000FFFF0000FFFF), (16, 0x00000000FFFFFFFF)):
+        v = (v | (v >> np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def cell_keys(lat, lon, zoom=MAX_ZOOM):
+    """Morton (geohash bit order) cell key of every point at `zoom`.
+
+    Longitude takes the higher bit of each pair, as in geohash, so keys at a
+    coarser zoom are the finer keys shifted right and sorting by key keeps
+    every parent cell contiguous.
+    """
+    scale = float(1 << zoom)
+    x = np.clip((np.asarray(lon, dtype=np.float64) + 180.0) / 360.0 * scale, 0, scale - 1).astype(np.uint64)
+    y = np.clip((np.asarray(lat, dtype=np.float64) + 90.0) / 180.0 * scale, 0, scale - 1).astype(np.uint64)
+    return (_spread(x) << np.uint64(1)) | _spread(y)
+
+
+def cell_centers(keys, zoom):
+    """(lat, lon) of the centre of each cell."""
+    keys = np.asarray(keys, dtype=np.uint64)
+    scale = float(1 << zoom)
+    x = _compact(keys >> np.uint64(1)).astype(np.float64)
+    y = _compact(keys).astype(np.float64)
+    return (y + 0.5) / scale * 180.0 - 90.0, (x + 0.5) / scale * 360.0 - 180.0
+
+
+def geohash(keys, zoom):
+    """Geohash strings for cell keys; needs 2 * zoom to be a multiple of 5."""
+    bits = 2 * zoom
+    if bits % 5:
+        raise ValueError(f"zoom {zoom} does not line up with geohash characters")
+    keys = np.asarray(keys, dtype=np.uint64)
+    chars = np.empty((len(keys), bits // 5), dtype=np.uint8)
+    for i in range(bits // 5):
+        chars[:, i] = _BASE32[(keys >> np.uint64(bits - 5 * (i + 1))) & np.uint64(31)]
+    return chars.view(f"S{bits // 5}").ravel().astype(str)
+
+
+def _reduce(keys, count, total, sumsq, low, high):
+    """Combine rows with equal keys; `keys` must be sorted."""
+    if len(keys) == 0:
+        return keys, count, total, sumsq, low, high
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return (keys[starts], np.add.reduceat(count, starts), np.add.reduceat(total, starts),
+            np.add.reduceat(sumsq, starts), np.minimum.reduceat(low, starts),
+            np.maximum.reduceat(high, starts))
+
+
+class GeoBins:
+    """Incremental spatial aggregate of (lat, lon, value) points.
+
+    Points are binned once at `max_zoom` into cells keyed by Morton code,
+    keeping count, sum, sum of squares, min and max per occupied cell in
+    sorted arrays. `add` folds a new batch into those arrays, so the cost
+    depends on the batch and the number of occupied cells, not on how many
+    points were ever added. Coarser zoom levels are rolled up from the
+    finest cells on demand.
+    """
+
+    def __init__(self, max_zoom=20):
+        if not 0 <= max_zoom <= MAX_ZOOM:
+            raise ValueError(f"max_zoom must be between 0 and {MAX_ZOOM}")
+        self.max_zoom = max_zoom
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.count = np.empty(0, dtype=np.int64)
+        self.total = np.empty(0)
+        self.sumsq = np.empty(0)
+        self.low = np.empty(0)
+        self.high = np.empty(0)
+        self.points = 0
+
+    def add(self, lat, lon, values):
+        """Fold a batch of points into the aggregate; NaN values and positions are skipped."""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        ok = ~(np.isnan(lat) | np.isnan(lon) | np.isnan(values))
+        lat, lon, values = lat[ok], lon[ok], values[ok]
+        if len(values) == 0:
+            return
+        keys = cell_keys(lat, lon, self.max_zoom)
+        order = np.argsort(keys, kind="stable")
+        keys, values = keys[order], values[order]
+        batch = _reduce(keys, np.ones(len(keys), dtype=np.int64), values, values * values, values, values)
+        merged = [np.concatenate([old, new]) for old, new in zip(
+            (self.keys, self.count, self.total, self.sumsq, self.low, self.high), batch)]
+        order = np.argsort(merged[0], kind="stable")
+        (self.keys, self.count, self.total, self.sumsq,
+         self.low, self.high) = _reduce(*(column[order] for column in merged))
+        self.points += len(values)
+
+    def add_frame(self, frame, lat="latitude", lon="longitude", value="delivery_delay_hours"):
+        self.add(frame[lat], frame[lon], frame[value])
+
+    def fit_zoom(self, max_cells=32):
+        """Finest zoom at which the occupied area spans at most `max_cells` cells per side."""
+        if len(self.keys) == 0:
+            return 0
+        x = _compact(self.keys >> np.uint64(1))
+        y = _compact(self.keys)
+        span = max(int(x.max() - x.min()), int(y.max() - y.min())) + 1
+        zoom = self.max_zoom
+        while zoom > 0 and span > max_cells:
+            span = (span + 1) // 2
+            zoom -= 1
+        return zoom
+
+    def cells(self, zoom=None, bounds=None):
+        """Occupied cells at `zoom` as a frame (optionally clipped to (lat0, lon0, lat1, lon1))."""
+        zoom = self.max_zoom if zoom is None else min(zoom, self.max_zoom)
+        columns = (self.keys >> np.uint64(2 * (self.max_zoom - zoom)), self.count,
+                   self.total, self.sumsq, self.low, self.high)
+        keys, count, total, sumsq, low, high = _reduce(*columns)
+        lat, lon = cell_centers(keys, zoom)
+        mean = total / np.maximum(count, 1)
+        variance = np.maximum(sumsq / np.maximum(count, 1) - mean ** 2, 0.0)
+        cells = pd.DataFrame({
+            "cell": keys, "latitude": lat, "longitude": lon, "count": count,
+            "mean": mean, "std": np.sqrt(variance), "min": low, "max": high,
+        })
+        if bounds is not None:
+            lat0, lon0, lat1, lon1 = bounds
+            cells = cells[cells["latitude"].between(lat0, lat1) & cells["longitude"].between(lon0, lon1)]
+        return cells.reset_index(drop=True)
+
+    def grid(self, zoom=None, statistic="mean", bounds=None):
+        """Dense latitude x longitude table of one statistic over the occupied extent."""
+        zoom = self.max_zoom if zoom is None else min(zoom, self.max_zoom)
+        cells = self.cells(zoom, bounds)
+        if cells.empty:
+            return pd.DataFrame()
+        x = _compact(cells["cell"].to_numpy(dtype=np.uint64) >> np.uint64(1)).astype(np.int64)
+        y = _compact(cells["cell"].to_numpy(dtype=np.uint64)).astype(np.int64)
+        x0, y0 = x.min(), y.min()
+        table = np.full((y.max() - y0 + 1, x.max() - x0 + 1), np.nan)
+        table[y - y0, x - x0] = cells[statistic].to_numpy(dtype=np.float64)
+        scale = float(1 << zoom)
+        lat = (np.arange(y0, y.max() + 1) + 0.5) / scale * 180.0 - 90.0
+        lon = (np.arange(x0, x.max() + 1) + 0.5) / scale * 360.0 - 180.0
+        return pd.DataFrame(table, index=pd.Index(lat.round(6), name="latitude"),
+                            columns=pd.Index(lon.round(6), name="longitude"))
@@ -0,0 +1,370 @@
+"""Local telemetry ingestion server that stands in for the Firebase RTDB.
+
+Point the firmware's DATABASE_URL at http://<host>:<port> and run:
+
+    python ingest_server.py --port 8080 --log readings.jsonl
+
+RTDB-style PUT/PATCH/POST/GET on `/<path>.json` keep working, but every
+write is also appended as a timestamped reading for its device instead of
+overwriting the previous one. Gateways can send many readings at once with
+POST /ingest, and with --tags the RFID registry answers GET /rfid/<uid>.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import namedtuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+log = logging.getLogger(__name__)
+
+# One sensor value from one box at one instant
+Reading = namedtuple("Reading", ["device", "ts", "channel", "value"])
+
+REASONS = {
+    200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 411: "Length Required", 413: "Payload Too Large",
+    429: "Too Many Requests", 431: "Request Header Fields Too Large", 500: "Internal Server Error",
+}
+
+
+def flatten(prefix, value):
+    """Yield (path, leaf) pairs for a JSON value written at `prefix`."""
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from flatten(f"{prefix}/{key}" if prefix else str(key), child)
+    else:
+        yield prefix, value
+
+
+class HttpError(Exception):
+    def __init__(self, status, message=""):
+        super().__init__(message)
+        self.status = status
+        self.message = message or REASONS.get(status, "")
+
+
+class JsonlSink:
+    """Append readings to a JSON-lines file off the event loop, or keep them in memory."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.readings = []
+
+    async def write(self, readings):
+        if self.path is None:
+            self.readings.extend(readings)
+            return
+        lines = "".join(json.dumps(reading._asdict()) + "\n" for reading in readings)
+        await asyncio.get_running_loop().run_in_executor(None, self._append, lines)
+
+    def _append(self, lines):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class IngestServer:
+    """Asyncio HTTP server with per-device bounded queues and backpressure.
+
+    Each request's readings are queued for their device; when that queue is
+    full the request waits up to `put_timeout` seconds and is then refused
+    with 429, so a flood from one box cannot starve the others. A fixed pool
+    of drain tasks takes device queues in turn and hands their readings to
+    `sink.write`; a failed write is logged and its readings dropped. Queues
+    of devices silent for `idle_timeout` seconds are dropped.
+    """
+
+    def __init__(self, sink=None, queue_size=64, put_timeout=1.0, drain_workers=8,
+                 drain_batch=32, max_body=1 << 20, registry=None, idle_timeout=300.0):
+        self.sink = sink or JsonlSink()
+        self.registry = registry
+        self.queue_size = queue_size
+        self.put_timeout = put_timeout
+        self.drain_workers = drain_workers
+        self.drain_batch = drain_batch
+        self.max_body = max_body
+        self.idle_timeout = idle_timeout
+        self.tree = {}
+        self.queues = {}
+        self.last_seen = {}
+        self.scheduled = set()
+        self.ready = asyncio.Queue()
+        self.push_ids = itertools.count()
+        self.stats = {"requests": 0, "readings": 0, "rejected": 0, "dropped": 0}
+
+    # Queueing
+
+    async def submit(self, device, readings):
+        """Queue readings for `device`, waiting for room up to `put_timeout`."""
+        self.last_seen[device] = time.monotonic()
+        queue = self.queues.get(device)
+        if queue is None:
+            queue = self.queues[device] = asyncio.Queue(self.queue_size)
+        try:
+            await asyncio.wait_for(queue.put(readings), self.put_timeout)
+        except asyncio.TimeoutError:
+            self.stats["rejected"] += len(readings)
+            raise HttpError(429, f"queue for device {device} is full")
+        self.stats["readings"] += len(readings)
+        if device not in self.scheduled:
+            self.scheduled.add(device)
+            self.ready.put_nowait(device)
+
+    async def _drain(self):
+        while True:
+            device = await self.ready.get()
+            queue = self.queues[device]
+            batch = []
+            for _ in range(self.drain_batch):
+                if queue.empty():
+                    break
+                batch.extend(queue.get_nowait())
+            if queue.empty():
+                self.scheduled.discard(device)
+            else:
+                self.ready.put_nowait(device)
+            if batch:
+                try:
+                    await self.sink.write(batch)
+                except Exception:
+                    self.stats["dropped"] += len(batch)
+                    log.exception("dropped %d readings from device %s", len(batch), device)
+
+    def evict_idle(self, now=None):
+        """Drop the empty queues of devices not heard from for `idle_timeout` seconds."""
+        now = time.monotonic() if now is None else now
+        for device, seen in list(self.last_seen.items()):
+            queue = self.queues.get(device)
+            if (now - seen > self.idle_timeout and device not in self.scheduled
+                    and (queue is None or queue.empty())):
+                self.queues.pop(device, None)
+                del self.last_seen[device]
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(self.idle_timeout / 2)
+            self.evict_idle()
+
+    # RTDB-compatible tree
+
+    def _node(self, parts, create):
+        node = self.tree
+        for part in parts[:-1]:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                if not create:
+                    return None
+                child = node[part] = {}
+            node = child
+        return node
+
+    def _get(self, parts):
+        if not parts:
+            return self.tree
+        node = self._node(parts, create=False)
+        return None if node is None else node.get(parts[-1])
+
+    def _set(self, parts, value):
+        if not parts:
+            self.tree = value if isinstance(value, dict) else {}
+            return
+        node = self._node(parts, create=True)
+        if value is None:
+            node.pop(parts[-1], None)
+        else:
+            node[parts[-1]] = value
+
+    # Request handling
+
+    def _device_for(self, parts, headers, query, peer):
+        if len(parts) >= 2 and parts[0] == "devices":
+            return parts[1], parts[2:]
+        device = headers.get("x-device-id") or query.get("device", [None])[0]
+        return device or peer, parts
+
+    async def handle_request(self, method, target, headers, body, peer):
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        method = headers.get("x-http-method-override", method).upper()
+        silent = query.get("print", [""])[0] == "silent"
+
+        if url.path == "/ingest":
+            if method != "POST":
+                raise HttpError(405)
+            return 200, await self._ingest_batch(body, headers, query, peer)
+
+        if url.path.startswith("/rfid") and self.registry is not None:
+            return self._rfid_lookup(method, url.path, body)
+
+        if not url.path.endswith(".json"):
+            raise HttpError(404)
+        parts = [part for part in url.path[:-len(".json")].split("/") if part]
+
+        if method == "GET":
+            return 200, self._get(parts)
+
+        value = json.loads(body or b"null")
+        if method == "POST":
+            parts = parts + [f"-{time.time_ns():x}{next(self.push_ids):06x}"]
+            result = {"name": parts[-1]}
+        elif method == "PATCH":
+            if not isinstance(value, dict):
+                raise HttpError(400, "PATCH body must be an object")
+            result = value
+        elif method in ("PUT", "DELETE"):
+            value = None if method == "DELETE" else value
+            result = value
+        else:
+            raise HttpError(405)
+
+        now = time.time()
+        device, channel_parts = self._device_for(parts, headers, query, peer)
+        prefix = "/".join(channel_parts)
+        if method == "PATCH":
+            for key, child in value.items():
+                self._set(parts + str(key).split("/"), child)
+        else:
+            self._set(parts, value)
+        readings = [
+            Reading(device, now, channel, leaf)
+            for channel, leaf in flatten(prefix, value) if leaf is not None
+        ]
+        if readings:
+            await self.submit(device, readings)
+        return (204, None) if silent else (200, result)
+
+    def _rfid_lookup(self, method, path, body):
+        """GET /rfid/<uid> resolves one tag; POST /rfid with a JSON list resolves many."""
+        if method == "GET" and path.startswith("/rfid/"):
+            record = self.registry.lookup(unquote(path[len("/rfid/"):]))
+            if record is None:
+                raise HttpError(404, "unknown tag")
+            return 200, record
+        if method == "POST" and path == "/rfid":
+            uids = json.loads(body or b"[]")
+            if not isinstance(uids, list):
+                raise HttpError(400, "expected a list of UIDs")
+            found = self.registry.lookup_many(uids)
+            return 200, json.loads(found.to_json(orient="records"))
+        raise HttpError(405)
+
+    async def _ingest_batch(self, body, headers, query, peer):
+        """POST /ingest: {"device": id, "readings": [{"ts": .., <channel>: ..}, ..]} or a list of those."""
+        payload = json.loads(body or b"null")
+        posts = payload if isinstance(payload, list) else [payload]
+        # Validate the whole payload before queueing any of it
+        now = time.time()
+        batches = []
+        for post in posts:
+            if not isinstance(post, dict) or not isinstance(post.get("readings"), list):
+                raise HttpError(400, "expected an object with a readings list")
+            device = str(post.get("device") or headers.get("x-device-id") or peer)
+            readings = []
+            for sample in post["readings"]:
+                if not isinstance(sample, dict):
+                    raise HttpError(400, "each reading must be an object")
+                ts = sample.get("ts", now)
+                if isinstance(ts, bool) or not isinstance(ts, (int, float)):
+                    raise HttpError(400, "ts must be a number")
+                for channel, value in flatten("", {k: v for k, v in sample.items() if k != "ts"}):
+                    readings.append(Reading(device, float(ts), channel, value))
+            batches.append((device, readings))
+        accepted = 0
+        for device, readings in batches:
+            await self.submit(device, readings)
+            accepted += len(readings)
+        return {"accepted": accepted}
+
+    async def _read_request(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise HttpError(431)
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HttpError(411)
+        length = int(headers.get("content-length", 0) or 0)
+        if length > self.max_body:
+            raise HttpError(413)
+        body = await reader.readexactly(length) if length else b""
+        return method, target, version, headers, body
+
+    async def _handle_connection(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        peer = peer[0] if peer else "unknown"
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    method, target, version, headers, body = await self._read_request(reader)
+                    keep_alive = (version == "HTTP/1.1"
+                                  and headers.get("connection", "").lower() != "close")
+                    self.stats["requests"] += 1
+                    status, result = await self.handle_request(method, target, headers, body, peer)
+                    payload = b"" if status == 204 else json.dumps(result).encode()
+                except HttpError as error:
+                    status, payload = error.status, json.dumps({"error": error.message}).encode()
+                except (ValueError, TypeError) as error:
+                    status, payload = 400, json.dumps({"error": str(error)}).encode()
+                except Exception:
+                    log.exception("error handling request from %s", peer)
+                    status, payload = 500, json.dumps({"error": REASONS[500]}).encode()
+                extra = "Retry-After: 1\r\n" if status == 429 else ""
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n{extra}"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8080):
+        """Start the drain pool and serve until cancelled."""
+        drains = [asyncio.create_task(self._drain()) for _ in range(self.drain_workers)]
+        drains.append(asyncio.create_task(self._sweep()))
+        server = await asyncio.start_server(self._handle_connection, host, port, backlog=4096)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in drains:
+                task.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local RTDB-compatible telemetry ingestion server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--log", default="readings.jsonl", help="JSON-lines file readings are appended to")
+    parser.add_argument("--queue-size", type=int, default=64, help="pending requests per device")
+    parser.add_argument("--tags", help="RFID tag CSV (uid,customer,pincode,parcel) served on /rfid")
+    args = parser.parse_args()
+    registry = None
+    if args.tags:
+        from rfid_registry import TagRegistry
+        registry = TagRegistry(args.tags)
+    server = IngestServer(sink=JsonlSink(args.log), queue_size=args.queue_size, registry=registry)
+    print(f"Listening on http://{args.host}:{args.port}")
+    asyncio.run(server.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
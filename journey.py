@@ -0,0 +1,262 @@
+import bisect
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Locations the simulated scanners report, in journey order
+LOCATIONS = ["Warehouse A", "In Transit", "Delivery Hub", "Delivered"]
+
+# One index per process, shared by every Streamlit session
+_journeys = {}
+_journeys_lock = threading.Lock()
+
+
+def _grow(array, size, fill):
+    """Return `array` extended to at least `size` entries (amortised doubling)."""
+    if len(array) >= size:
+        return array
+    grown = np.full(max(size, 2 * len(array)), fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class JourneyIndex:
+    """Event-sourced parcel journeys with a materialised latest-state index.
+
+    Every RFID scan or sensor event is appended to a columnar log (ts, tag,
+    location). The latest location per tag and the per-hub parcel counts
+    are updated in place, so "where is parcel X" is an array lookup. Every
+    `snapshot_every` events the latest-state arrays are copied into a
+    snapshot; "state at time T" and reloads start from the newest suitable
+    snapshot and replay only the log tail after it. At most `max_snapshots`
+    are kept, thinned so their spacing grows towards the past; queries take
+    `lock`, so they never see a tag code before its state exists.
+    """
+
+    def __init__(self, snapshot_every=100_000, max_snapshots=8):
+        self.snapshot_every = snapshot_every
+        self.max_snapshots = max_snapshots
+        self.tags, self.tag_codes = [], {}
+        self.locations, self.location_codes = [], {}
+        self.size = 0
+        self.log_ts = np.empty(1024, dtype=np.float64)
+        self.log_tag = np.empty(1024, dtype=np.int32)
+        self.log_location = np.empty(1024, dtype=np.int16)
+        self.last_ts = np.empty(0, dtype=np.float64)
+        self.last_location = np.empty(0, dtype=np.int16)
+        self.max_ts = -np.inf
+        self.snapshots = []  # (log position, max ts in log[:position], last_ts, last_location)
+        self.lock = threading.Lock()
+        for location in LOCATIONS:
+            self._intern([location], self.locations, self.location_codes)
+        self.hub_counts = np.zeros(len(self.locations), dtype=np.int64)
+
+    @staticmethod
+    def _intern(values, names, codes):
+        """Map values to integer codes, adding unseen ones; loops over uniques only."""
+        batch_codes, uniques = pd.factorize(pd.Series(values, dtype=object).astype(str))
+        mapping = np.empty(len(uniques), dtype=np.int64)
+        for i, value in enumerate(uniques):
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(names)
+                names.append(value)
+            mapping[i] = code
+        return mapping[batch_codes]
+
+    @staticmethod
+    def _fold(state_ts, state_location, ts, tags, locations, counts=None):
+        """Fold events into latest-state arrays; the newest event per tag wins."""
+        if len(ts) == 0:
+            return
+        order = np.lexsort((ts, tags))
+        tags, ts, locations = tags[order], ts[order], locations[order]
+        last = np.r_[tags[1:] != tags[:-1], True]
+        tags, ts, locations = tags[last], ts[last], locations[last]
+        newer = ts >= state_ts[tags]
+        tags, ts, locations = tags[newer], ts[newer], locations[newer]
+        if counts is not None:
+            previous = state_location[tags]
+            np.subtract.at(counts, previous[previous >= 0], 1)
+            np.add.at(counts, locations, 1)
+        state_ts[tags] = ts
+        state_location[tags] = locations
+
+    def append_many(self, ts, tags, locations):
+        """Append a batch of (ts, tag, location) events."""
+        ts = np.asarray(ts, dtype=np.float64)
+        with self.lock:
+            tag_codes = self._intern(tags, self.tags, self.tag_codes).astype(np.int32)
+            location_codes = self._intern(locations, self.locations, self.location_codes).astype(np.int16)
+            end = self.size + len(ts)
+            self.log_ts = _grow(self.log_ts, end, 0.0)
+            self.log_tag = _grow(self.log_tag, end, 0)
+            self.log_location = _grow(self.log_location, end, 0)
+            self.log_ts[self.size:end] = ts
+            self.log_tag[self.size:end] = tag_codes
+            self.log_location[self.size:end] = location_codes
+            self.size = end
+            if len(ts):
+                self.max_ts = max(self.max_ts, float(ts.max()))
+
+            self.last_ts = _grow(self.last_ts, len(self.tags), -np.inf)
+            self.last_location = _grow(self.last_location, len(self.tags), -1)
+            self.hub_counts = _grow(self.hub_counts, len(self.locations), 0)
+            self._fold(self.last_ts, self.last_location, ts, tag_codes, location_codes, self.hub_counts)
+
+            last_snapshot = self.snapshots[-1][0] if self.snapshots else 0
+            if self.size - last_snapshot >= self.snapshot_every:
+                self._snapshot()
+
+    def append(self, ts, tag, location):
+        self.append_many([ts], [tag], [location])
+
+    def _snapshot(self):
+        n_tags = len(self.tags)
+        self.snapshots.append((self.size, self.max_ts, self.last_ts[:n_tags].copy(),
+                               self.last_location[:n_tags].copy()))
+        # Thin out: drop the older snapshot leaving the smallest gap relative
+        # to its age, so spacing grows geometrically going back in time
+        while len(self.snapshots) > max(self.max_snapshots, 2):
+            positions = [0] + [snapshot[0] for snapshot in self.snapshots]
+            scores = [(positions[i + 2] - positions[i]) / (self.size - positions[i + 2] + self.snapshot_every)
+                      for i in range(len(self.snapshots) - 1)]
+            del self.snapshots[scores.index(min(scores))]
+
+    # Queries
+
+    def where(self, tag):
+        """Latest known location of `tag` as a dict, or None if never scanned."""
+        with self.lock:
+            code = self.tag_codes.get(str(tag))
+            if code is None:
+                return None
+            location, ts = self.last_location[code], float(self.last_ts[code])
+        return {"tag": tag, "location": self.locations[location], "ts": ts}
+
+    def status_counts(self):
+        """Number of parcels whose latest location is each hub."""
+        with self.lock:
+            locations = list(self.locations)
+            counts = self.hub_counts[:len(locations)].copy()
+        return pd.Series(counts, index=locations, name="Parcels")
+
+    def _state_at(self, t):
+        # Logged events below `size` never change, so only the bookkeeping needs the lock
+        with self.lock:
+            n_tags, size = len(self.tags), self.size
+            log_ts, log_tag, log_location = self.log_ts, self.log_tag, self.log_location
+            snapshots = list(self.snapshots)
+        as_of = [snapshot[1] for snapshot in snapshots]
+        i = bisect.bisect_right(as_of, t) - 1
+        if i >= 0:
+            position, _, snap_ts, snap_location = snapshots[i]
+            state_ts = np.full(n_tags, -np.inf)
+            state_location = np.full(n_tags, -1, dtype=np.int16)
+            state_ts[:len(snap_ts)] = snap_ts
+            state_location[:len(snap_location)] = snap_location
+        else:
+            position = 0
+            state_ts = np.full(n_tags, -np.inf)
+            state_location = np.full(n_tags, -1, dtype=np.int16)
+        tail = slice(position, size)
+        keep = log_ts[tail] <= t
+        self._fold(state_ts, state_location, log_ts[tail][keep], log_tag[tail][keep], log_location[tail][keep])
+        return state_ts, state_location
+
+    def state_at(self, t, tag=None):
+        """Location of every tag (or just `tag`) as of timestamp `t`."""
+        state_ts, state_location = self._state_at(t)
+        if tag is not None:
+            code = self.tag_codes.get(str(tag))
+            if code is None or code >= len(state_location) or state_location[code] < 0:
+                return None
+            return {"tag": tag, "location": self.locations[state_location[code]],
+                    "ts": float(state_ts[code])}
+        seen = np.flatnonzero(state_location >= 0)
+        return pd.DataFrame({
+            "tag": np.asarray(self.tags, dtype=object)[seen],
+            "location": np.asarray(self.locations, dtype=object)[state_location[seen]],
+            "ts": state_ts[seen],
+        })
+
+    def status_counts_at(self, t):
+        """Parcels per hub as of timestamp `t`."""
+        _, state_location = self._state_at(t)
+        locations = list(self.locations)
+        counts = np.bincount(state_location[state_location >= 0], minlength=len(locations))
+        return pd.Series(counts, index=locations, name="Parcels")
+
+    def history(self, tag):
+        """All events for `tag`, oldest first."""
+        with self.lock:
+            code = self.tag_codes.get(str(tag))
+            size, log_ts, log_tag, log_location = self.size, self.log_ts, self.log_tag, self.log_location
+            locations = list(self.locations)
+        if code is None:
+            return pd.DataFrame(columns=["ts", "location"])
+        mask = log_tag[:size] == code
+        history = pd.DataFrame({
+            "ts": log_ts[:size][mask],
+            "location": np.asarray(locations, dtype=object)[log_location[:size][mask]],
+        })
+        return history.sort_values("ts", kind="stable", ignore_index=True)
+
+    # Persistence
+
+    def save(self, root):
+        """Write the log, interned names and latest snapshot under `root`."""
+        with self.lock:
+            if not self.snapshots or self.snapshots[-1][0] != self.size:
+                self._snapshot()
+            os.makedirs(root, exist_ok=True)
+            np.save(os.path.join(root, "log_ts.npy"), self.log_ts[:self.size])
+            np.save(os.path.join(root, "log_tag.npy"), self.log_tag[:self.size])
+            np.save(os.path.join(root, "log_location.npy"), self.log_location[:self.size])
+            position, as_of, snap_ts, snap_location = self.snapshots[-1]
+            np.savez(os.path.join(root, "snapshot.npz"), position=position, as_of=as_of,
+                     last_ts=snap_ts, last_location=snap_location)
+            with open(os.path.join(root, "names.json"), "w", encoding="utf-8") as f:
+                json.dump({"tags": self.tags, "locations": self.locations}, f)
+
+    @classmethod
+    def load(cls, root, snapshot_every=100_000):
+        """Rebuild from `root`: restore the snapshot and replay only the log after it."""
+        journey = cls(snapshot_every)
+        with open(os.path.join(root, "names.json"), encoding="utf-8") as f:
+            names = json.load(f)
+        journey.tags = names["tags"]
+        journey.tag_codes = {tag: i for i, tag in enumerate(journey.tags)}
+        journey.locations = names["locations"]
+        journey.location_codes = {location: i for i, location in enumerate(journey.locations)}
+        journey.log_ts = np.load(os.path.join(root, "log_ts.npy"))
+        journey.log_tag = np.load(os.path.join(root, "log_tag.npy"))
+        journey.log_location = np.load(os.path.join(root, "log_location.npy"))
+        journey.size = len(journey.log_ts)
+        journey.max_ts = float(journey.log_ts.max()) if journey.size else -np.inf
+
+        snapshot = np.load(os.path.join(root, "snapshot.npz"))
+        position = int(snapshot["position"])
+        journey.last_ts = np.full(len(journey.tags), -np.inf)
+        journey.last_location = np.full(len(journey.tags), -1, dtype=np.int16)
+        journey.last_ts[:len(snapshot["last_ts"])] = snapshot["last_ts"]
+        journey.last_location[:len(snapshot["last_location"])] = snapshot["last_location"]
+        journey.snapshots = [(position, float(snapshot["as_of"]), snapshot["last_ts"],
+                              snapshot["last_location"])]
+        tail = slice(position, journey.size)
+        journey._fold(journey.last_ts, journey.last_location, journey.log_ts[tail],
+                      journey.log_tag[tail], journey.log_location[tail])
+        located = journey.last_location[journey.last_location >= 0]
+        journey.hub_counts = np.bincount(located, minlength=len(journey.locations)).astype(np.int64)
+        return journey
+
+
+def get_journey(name="default"):
+    """Return the process-wide journey index, shared across sessions."""
+    with _journeys_lock:
+        if name not in _journeys:
+            _journeys[name] = JourneyIndex()
+        return _journeys[name]
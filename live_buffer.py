@@ -0,0 +1,150 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from timeseries import CHANNEL_ALIASES
+
+# Channels shown on the live monitoring page
+LIVE_CHANNELS = ["smoke", "temperature", "humidity"]
+
+_buffer = None
+_simulator = None
+_lock = threading.Lock()
+
+
+class LiveBuffer:
+    """Fixed-size in-memory ring of the most recent readings from all boxes.
+
+    Every reading gets a sequence number; a subscriber keeps the last one
+    it saw and `since(cursor)` returns only newer readings, so the cost of
+    a refresh depends on what arrived since the last one, never on how much
+    history exists. The latest value per box is kept in arrays as well.
+    """
+
+    def __init__(self, capacity=200_000):
+        self.capacity = capacity
+        self.seq = 0
+        self.device = np.zeros(capacity, dtype=np.int32)
+        self.ts = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros((capacity, len(LIVE_CHANNELS)), dtype=np.float32)
+        self.devices, self.codes = [], {}
+        self.latest_ts = np.full(0, np.nan)
+        self.latest_values = np.full((0, len(LIVE_CHANNELS)), np.nan, dtype=np.float32)
+        self.lock = threading.Lock()
+
+    def _codes_for(self, devices):
+        codes = np.empty(len(devices), dtype=np.int32)
+        for i, device in enumerate(devices):
+            code = self.codes.get(device)
+            if code is None:
+                code = self.codes[device] = len(self.devices)
+                self.devices.append(device)
+            codes[i] = code
+        if len(self.devices) > len(self.latest_ts):
+            size = max(len(self.devices), 2 * len(self.latest_ts), 64)
+            latest_ts = np.full(size, np.nan)
+            latest_values = np.full((size, len(LIVE_CHANNELS)), np.nan, dtype=np.float32)
+            latest_ts[:len(self.latest_ts)] = self.latest_ts
+            latest_values[:len(self.latest_values)] = self.latest_values
+            self.latest_ts, self.latest_values = latest_ts, latest_values
+        return codes
+
+    def append_many(self, devices, ts, values):
+        """Append readings; `values` is (n, len(LIVE_CHANNELS)) with NaN for gaps."""
+        values = np.asarray(values, dtype=np.float32).reshape(-1, len(LIVE_CHANNELS))
+        ts = np.asarray(ts, dtype=np.float64)
+        with self.lock:
+            codes = self._codes_for(list(devices))
+            positions = (self.seq + np.arange(len(ts))) % self.capacity
+            self.device[positions] = codes
+            self.ts[positions] = ts
+            self.values[positions] = values
+            self.seq += len(ts)
+            # Latest value per box, channel by channel (NaN keeps the old value)
+            for channel in range(len(LIVE_CHANNELS)):
+                ok = ~np.isnan(values[:, channel])
+                self.latest_values[codes[ok], channel] = values[ok, channel]
+            self.latest_ts[codes] = ts
+
+    async def write(self, readings):
+        """Sink interface for IngestServer."""
+        rows = {}
+        for reading in readings:
+            channel = CHANNEL_ALIASES.get(reading.channel, reading.channel)
+            if channel in LIVE_CHANNELS and isinstance(reading.value, (int, float)):
+                row = rows.setdefault((reading.device, reading.ts), [np.nan] * len(LIVE_CHANNELS))
+                row[LIVE_CHANNELS.index(channel)] = reading.value
+        if rows:
+            keys = list(rows)
+            self.append_many([k[0] for k in keys], [k[1] for k in keys], list(rows.values()))
+
+    def since(self, cursor, devices=None, until=None, start_ts=None):
+        """Readings newer than `cursor` (optionally for some boxes) and the new cursor.
+
+        `until` stops at an earlier cursor instead of the newest reading;
+        `start_ts` keeps only readings taken at or after that time.
+        """
+        with self.lock:
+            end = self.seq if until is None else min(until, self.seq)
+            start = max(cursor, self.seq - self.capacity)
+            positions = np.arange(start, max(start, end)) % self.capacity
+            codes = self.device[positions]
+            ts = self.ts[positions]
+            values = self.values[positions]
+        keep = None
+        if devices is not None:
+            wanted = [self.codes[d] for d in devices if d in self.codes]
+            keep = np.isin(codes, wanted)
+        if start_ts is not None:
+            recent = ts >= start_ts
+            keep = recent if keep is None else keep & recent
+        if keep is not None:
+            codes, ts, values = codes[keep], ts[keep], values[keep]
+        delta = pd.DataFrame(values, columns=LIVE_CHANNELS)
+        delta.insert(0, "ts", ts)
+        delta.insert(0, "box", np.asarray(self.devices, dtype=object)[codes] if len(codes) else [])
+        return delta, end
+
+    def latest(self, devices=None):
+        """Latest reading per box as a frame indexed by box."""
+        devices = list(self.devices) if devices is None else [d for d in devices if d in self.codes]
+        codes = np.array([self.codes[d] for d in devices], dtype=np.int64)
+        frame = pd.DataFrame(self.latest_values[codes], columns=LIVE_CHANNELS,
+                             index=pd.Index(devices, name="box"))
+        frame["ts"] = self.latest_ts[codes]
+        return frame
+
+
+def _simulate(buffer, n_boxes, interval, stop):
+    """Random-walk readings for `n_boxes` boxes, standing in for live devices."""
+    rng = np.random.default_rng()
+    boxes = [f"box-{i + 1}" for i in range(n_boxes)]
+    level = np.column_stack([
+        rng.uniform(0.5, 1.5, n_boxes), rng.uniform(3.0, 7.0, n_boxes), rng.uniform(40, 60, n_boxes)
+    ])
+    step = np.array([0.05, 0.1, 0.5])
+    while not stop.is_set():
+        level += rng.normal(0.0, 1.0, level.shape) * step
+        level[:, 0] = np.clip(level[:, 0], 0.1, None)
+        readings = level.copy()
+        spikes = rng.random(n_boxes) < 0.002
+        readings[spikes, 0] += rng.uniform(2.0, 4.0, spikes.sum())
+        buffer.append_many(boxes, np.full(n_boxes, time.time()), readings)
+        stop.wait(interval)
+
+
+def get_live_buffer(simulate_boxes=0, interval=1.0):
+    """Return the process-wide live buffer, starting the simulator once if asked."""
+    global _buffer, _simulator
+    with _lock:
+        if _buffer is None:
+            _buffer = LiveBuffer()
+        if simulate_boxes and _simulator is None:
+            stop = threading.Event()
+            thread = threading.Thread(target=_simulate, args=(_buffer, simulate_boxes, interval, stop),
+                                      daemon=True)
+            thread.start()
+            _simulator = (thread, stop)
+        return _buffer
@@ -1,19 +1,19 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import seaborn as sns
 import plotly.express as px
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, r2_score
 
-# Load datasets
-data = pd.read_csv("cleaned_amazon_dataset-2.csv")
-data['Order_Date'] = pd.to_datetime(data['Order_Date'])
-data['Order_Hour'] = pd.to_datetime(data['Order_Time'], format='%H:%M:%S').dt.hour
-
-insurance_data = pd.read_csv("insurance_data.csv")
+from charts import downsample, fingerprint, fit_png, histogram_png, render
+from data_store import data_token, derived, load_orders, load_insurance
+from banking import display_banking
+from filter_index import FilterIndex, take_columns
+from order_cube import OrderCube
+from order_stream import get_order_aggregates, streaming_enabled
+from regression import claim_amount_engine, delivery_time_engine
+from routing import demo_stops, solve_routes
+from summary_stats import FrameSummary
+from tracing import get_tracer
 
 # Configure Streamlit page
 st.set_page_config(
@@ -73,6 +73,19 @@ selected_dashboard = st.sidebar.radio(
     ["📦 Order Analytics", "🏥 Insurance Data", "🏦 Banking Services", "🚗 Route Optimization"]
 )
 
+# Per-section timings for this rerun (no-ops unless enabled)
+tracer = get_tracer()
+show_timings = st.sidebar.checkbox("⏱️ Show Section Timings", value=tracer.enabled)
+trace_run = tracer.start_run(selected_dashboard, enabled=tracer.enabled or show_timings)
+
+# Load datasets (shared Arrow cache, dates and hours already parsed).
+# Order exports too large for memory are aggregated in bounded chunks instead.
+ORDERS_PATH = "cleaned_amazon_dataset-2.csv"
+with tracer.section("Load Data"):
+    order_aggregates = get_order_aggregates(ORDERS_PATH) if streaming_enabled(ORDERS_PATH) else None
+    data = load_orders(ORDERS_PATH) if order_aggregates is None else None
+    insurance_data = load_insurance("insurance_data.csv")
+
 # Order Analytics Dashboard
 if selected_dashboard == "📦 Order Analytics":
     # Title
@@ -80,89 +93,127 @@ if selected_dashboard == "📦 Order Analytics":
     st.markdown("### Dive deep into the performance of orders and delivery times.")
 
     # Sidebar filters
+    if order_aggregates is None:
+        order_rows = len(data)
+        first_date, last_date = data['Order_Date'].min(), data['Order_Date'].max()
+        options = {column: data[column].unique() for column in ('Vehicle', 'Area', 'Category')}
+    else:
+        order_rows = order_aggregates.rows
+        first_date, last_date = order_aggregates.date_range()
+        options = {column: order_aggregates.categories(column) for column in ('Vehicle', 'Area', 'Category')}
     st.sidebar.header("🚚 Filters & Settings")
     date_range = st.sidebar.date_input(
-        "Select Date Range:", [data['Order_Date'].min(), data['Order_Date'].max()]
+        "Select Date Range:", [first_date, last_date]
     )
     vehicle_filter = st.sidebar.multiselect(
-        "Select Vehicles:", data['Vehicle'].unique(), default=data['Vehicle'].unique()
+        "Select Vehicles:", options['Vehicle'], default=options['Vehicle']
     )
     area_filter = st.sidebar.multiselect(
-        "Select Areas:", data['Area'].unique(), default=data['Area'].unique()
+        "Select Areas:", options['Area'], default=options['Area']
     )
     category_filter = st.sidebar.multiselect(
-        "Select Categories:", data['Category'].unique(), default=data['Category'].unique()
+        "Select Categories:", options['Category'], default=options['Category']
     )
 
-    filtered_data = data[(data['Order_Date'] >= pd.Timestamp(date_range[0])) & 
-                         (data['Order_Date'] <= pd.Timestamp(date_range[1])) & 
-                         (data['Vehicle'].isin(vehicle_filter)) & 
-                         (data['Area'].isin(area_filter)) & 
-                         (data['Category'].isin(category_filter))]
+    with tracer.section("Filters", rows=order_rows):
+        cube_filters = {"Vehicle": vehicle_filter, "Area": area_filter, "Category": category_filter}
+        if order_aggregates is None:
+            # Bitmap/date index lookup instead of full-column masks
+            order_index = derived(data, "filter_index", FilterIndex)
+            # Charts gather only the columns they plot at these positions
+            filtered_rows = order_index.select(date_range[0], date_range[1], cube_filters)
+            filtered_source = data
+
+            # Trend charts are rollups over the pre-aggregated cube
+            order_cube = derived(data, "order_cube", OrderCube)
+            delivery_engine = derived(data, "delivery_regression", delivery_time_engine)
+        else:
+            # Streaming mode keeps no rows beyond a bounded uniform sample
+            filtered_source = order_aggregates.sample_rows(date_range[0], date_range[1], cube_filters)
+            filtered_rows = np.arange(len(filtered_source))
+            order_cube = order_aggregates.cube
+            delivery_engine = order_aggregates.regression
+
+        # Identifies the filtered rows for the chart caches without hashing them
+        filter_key = (data_token(data if order_aggregates is None else order_aggregates),
+                      str(date_range[0]), str(date_range[1]),
+                      tuple((column, tuple(selected)) for column, selected in cube_filters.items()))
 
     # Delivery Time Analysis
-    st.subheader(":stopwatch: Delivery Time Analysis")
-    col1, col2 = st.columns(2)
-
-    with col1:
-        fig, ax = plt.subplots(figsize=(5, 3))  # Further reduced size
-        sns.histplot(filtered_data['Delivery_Time'], bins=30, kde=True, ax=ax, color="royalblue")
-        ax.set_title("Distribution of Delivery Times", fontsize=12)
-        ax.set_xlabel("Delivery Time (minutes)", fontsize=10)
-        ax.set_ylabel("Frequency", fontsize=10)
-        st.pyplot(fig)
-
-    with col2:
-        correlation_data = filtered_data[['Delivery_Time', 'Agent_Age', 'Agent_Rating', 'Order_Hour']]
-        corr_matrix = correlation_data.corr()
-        fig, ax = plt.subplots(figsize=(5, 3))  # Further reduced size
-        sns.heatmap(corr_matrix, annot=True, cmap="coolwarm", ax=ax, fmt='.2f')
-        ax.set_title("Correlation Matrix", fontsize=12)
-        st.pyplot(fig)
+    with tracer.section("Delivery Time Analysis", rows=len(filtered_rows)):
+        st.subheader(":stopwatch: Delivery Time Analysis")
+        col1, col2 = st.columns(2)
+
+        with col1:
+            # Rendered once per distinct data/parameters; reruns reuse the PNG
+            if order_aggregates is None:
+                delivery_times = take_columns(filtered_source, filtered_rows, ['Delivery_Time'])['Delivery_Time']
+                delivery_counts = None
+            else:
+                delivery_times, delivery_counts = order_aggregates.delivery_histogram(
+                    date_range[0], date_range[1], cube_filters)
+            st.image(histogram_png(delivery_times, 30, "royalblue", "Distribution of Delivery Times",
+                                   "Delivery Time (minutes)", figsize=(5, 3), fontsize=12, weights=delivery_counts,
+                                   key=filter_key))
+
+        with col2:
+            if order_aggregates is None:
+                correlation_data = take_columns(filtered_source, filtered_rows,
+                                                ['Delivery_Time', 'Agent_Age', 'Agent_Rating', 'Order_Hour'])
+                corr_matrix = correlation_data.corr()
+            else:
+                corr_matrix = order_aggregates.correlation(date_range[0], date_range[1], cube_filters)
+            def draw_correlation(ax):
+                sns.heatmap(corr_matrix, annot=True, cmap="coolwarm", ax=ax, fmt='.2f')
+                ax.set_title("Correlation Matrix", fontsize=12)
+            st.image(render(fingerprint("correlation", corr_matrix, figsize=(5, 3)), draw_correlation, figsize=(5, 3)))
 
     # Order Trends
-    st.subheader(":chart_with_upwards_trend: Order Trends Over Time")
-    orders_by_date = filtered_data.groupby('Order_Date').size().reset_index(name='Order_Count')
-    fig = px.line(orders_by_date, x='Order_Date', y='Order_Count', title="Orders Over Time",
-                  labels={"Order_Date": "Date", "Order_Count": "Number of Orders"},
-                  template="plotly_dark")
-    st.plotly_chart(fig, use_container_width=True)
+    with tracer.section("Order Trends", rows=len(filtered_rows)):
+        st.subheader(":chart_with_upwards_trend: Order Trends Over Time")
+        orders_by_date = order_cube.rollup('Order_Date', date_range[0], date_range[1], cube_filters)
+        orders_by_date = orders_by_date[['Order_Date', 'orders']].rename(columns={'orders': 'Order_Count'})
+        fig = px.line(orders_by_date, x='Order_Date', y='Order_Count', title="Orders Over Time",
+                      labels={"Order_Date": "Date", "Order_Count": "Number of Orders"},
+                      template="plotly_dark")
+        st.plotly_chart(fig, use_container_width=True)
 
     # Peak Order Times
-    st.subheader(":clock3: Peak Order Times (Hourly Breakdown)")
-    orders_by_hour = filtered_data.groupby('Order_Hour').size().reset_index(name='Order_Count')
-    fig = px.bar(orders_by_hour, x='Order_Hour', y='Order_Count', title="Orders by Hour of the Day",
-                 labels={"Order_Hour": "Hour of the Day", "Order_Count": "Number of Orders"},
-                 template="plotly_dark")
-    st.plotly_chart(fig, use_container_width=True)
+    with tracer.section("Peak Order Times", rows=len(filtered_rows)):
+        st.subheader(":clock3: Peak Order Times (Hourly Breakdown)")
+        orders_by_hour = order_cube.rollup('Order_Hour', date_range[0], date_range[1], cube_filters)
+        orders_by_hour = orders_by_hour[['Order_Hour', 'orders']].rename(columns={'orders': 'Order_Count'})
+        fig = px.bar(orders_by_hour, x='Order_Hour', y='Order_Count', title="Orders by Hour of the Day",
+                     labels={"Order_Hour": "Hour of the Day", "Order_Count": "Number of Orders"},
+                     template="plotly_dark")
+        st.plotly_chart(fig, use_container_width=True)
 
     # Factors Affecting Delivery Time
-    st.subheader(":thinking_face: Factors Affecting Delivery Time")
-    selected_factor = st.selectbox("Select Factor to Analyze:", ["Weather", "Traffic", "Area", "Vehicle"])
-    factor_impact = filtered_data.groupby(selected_factor)['Delivery_Time'].mean().reset_index()
-    fig = px.bar(factor_impact, x=selected_factor, y='Delivery_Time',
-                 title=f"Impact of {selected_factor} on Delivery Time", template="plotly_dark")
-    st.plotly_chart(fig, use_container_width=True)
+    with tracer.section("Factors Affecting Delivery Time", rows=len(filtered_rows)):
+        st.subheader(":thinking_face: Factors Affecting Delivery Time")
+        selected_factor = st.selectbox("Select Factor to Analyze:", ["Weather", "Traffic", "Area", "Vehicle"])
+        factor_impact = order_cube.rollup(selected_factor, date_range[0], date_range[1], cube_filters)
+        factor_impact = factor_impact[[selected_factor, 'mean']].rename(columns={'mean': 'Delivery_Time'})
+        fig = px.bar(factor_impact, x=selected_factor, y='Delivery_Time',
+                     title=f"Impact of {selected_factor} on Delivery Time", template="plotly_dark")
+        st.plotly_chart(fig, use_container_width=True)
 
     # Delivery Time Prediction
-    st.subheader(":crystal_ball: Predictive Analytics")
-    st.markdown("### Predict delivery times based on agent performance.")
-    X = filtered_data[['Agent_Rating']]
-    y = filtered_data['Delivery_Time']
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-    model = LinearRegression()
-    model.fit(X_train, y_train)
-    y_pred = model.predict(X_test)
-
-    fig, ax = plt.subplots(figsize=(5, 3))  # Further reduced size
-    ax.scatter(X_test, y_test, label="Actual Values", alpha=0.6)
-    ax.plot(X_test, y_pred, color='red', label="Predicted Values", linewidth=2)
-    ax.set_title("Agent Rating vs. Predicted Delivery Time", fontsize=12)
-    ax.set_xlabel("Agent Rating", fontsize=10)
-    ax.set_ylabel("Delivery Time (minutes)", fontsize=10)
-    ax.legend(fontsize=10)
-    st.pyplot(fig)
+    with tracer.section("Predictive Analytics", rows=len(filtered_rows)):
+        st.subheader(":crystal_ball: Predictive Analytics")
+        st.markdown("### Predict delivery times based on agent performance.")
+        # Fitted from per-cell sufficient statistics; cached per filter selection
+        model = delivery_engine.fit(cube_filters, ranges={'Order_Date': (date_range[0], date_range[1])})
+
+        # Plot a bounded sample of the filtered rows against the fitted line
+        plot_rows = downsample(take_columns(filtered_source, filtered_rows, ['Agent_Rating', 'Delivery_Time']),
+                               'Agent_Rating', 'Delivery_Time', max_points=2000)
+        X_test, y_test = plot_rows['Agent_Rating'], plot_rows['Delivery_Time']
+        y_pred = model.predict(X_test)
+
+        st.image(fit_png(X_test, y_test, y_pred, "Agent Rating vs. Predicted Delivery Time", "Agent Rating",
+                         "Delivery Time (minutes)", figsize=(5, 3), fontsize=12, alpha=0.6, linewidth=2,
+                         key=filter_key))
 
 # Insurance Data Dashboard
 elif selected_dashboard == "🏥 Insurance Data":
@@ -170,62 +221,94 @@ elif selected_dashboard == "🏥 Insurance Data":
     st.markdown("### Analyze customer health data and claim amounts for better insurance management.")
 
     # Display dataset overview
-    st.markdown("### Dataset Overview")
-    st.dataframe(insurance_data.head())
+    with tracer.section("Dataset Overview", rows=len(insurance_data)):
+        st.markdown("### Dataset Overview")
+        st.dataframe(insurance_data.head())
 
     # Summary statistics
-    st.markdown("### Summary Statistics of the Data")
-    st.write(insurance_data.describe())
+    with tracer.section("Summary Statistics", rows=len(insurance_data)):
+        st.markdown("### Summary Statistics of the Data")
+        st.write(derived(insurance_data, "summary", FrameSummary).describe())
 
     # Age distribution (Further reduced size)
-    st.subheader(":bust_in_silhouette: Age Distribution")
-    fig, ax = plt.subplots(figsize=(5, 3))  # Further reduced size
-    sns.histplot(insurance_data['Age'], bins=20, kde=True, ax=ax, color="darkgreen")
-    ax.set_title("Age Distribution of Insurance Customers", fontsize=12)
-    ax.set_xlabel("Age", fontsize=10)
-    ax.set_ylabel("Frequency", fontsize=10)
-    st.pyplot(fig)
+    with tracer.section("Age Distribution", rows=len(insurance_data)):
+        st.subheader(":bust_in_silhouette: Age Distribution")
+        st.image(histogram_png(insurance_data['Age'], 20, "darkgreen", "Age Distribution of Insurance Customers",
+                               "Age", figsize=(5, 3), fontsize=12, key=data_token(insurance_data)))
 
     # Health Risk vs. Claim Amount
-    st.subheader(":bar_chart: Health Risk vs. Claim Amount Analysis")
-    fig = px.scatter(
-        insurance_data, 
-        x='Health_Risk_Score', 
-        y='Claim_Amount', 
-        color='Region', 
-        size='Age', 
-        title="Health Risk vs. Claim Amount by Region",
-        labels={"Health_Risk_Score": "Health Risk Score", "Claim_Amount": "Claim Amount"},
-        template="plotly_dark"
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    with tracer.section("Health Risk vs. Claim Amount", rows=len(insurance_data)):
+        st.subheader(":bar_chart: Health Risk vs. Claim Amount Analysis")
+        # At most 5000 points reach the browser; outliers and every Region are kept
+        scatter_rows = derived(insurance_data, "risk_claim_points",
+                               lambda d: downsample(d, 'Health_Risk_Score', 'Claim_Amount', group='Region'))
+        fig = px.scatter(
+            scatter_rows, 
+            x='Health_Risk_Score', 
+            y='Claim_Amount', 
+            color='Region', 
+            size='Age', 
+            title="Health Risk vs. Claim Amount by Region",
+            labels={"Health_Risk_Score": "Health Risk Score", "Claim_Amount": "Claim Amount"},
+            template="plotly_dark"
+        )
+        st.plotly_chart(fig, use_container_width=True)
 
     # Predictive Insights: BMI vs Charges (Further reduced size)
-    st.subheader(":crystal_ball: Predictive Insights (Regression Analysis)")
-    st.markdown("### Predict Claim Amount based on Health Risk Score.")
-    X = insurance_data[['Health_Risk_Score']]
-    y = insurance_data['Claim_Amount']
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-    model = LinearRegression()
-    model.fit(X_train, y_train)
-    y_pred = model.predict(X_test)
-
-    fig, ax = plt.subplots(figsize=(5, 3))  # Further reduced size
-    ax.scatter(X_test, y_test, label="Actual Values", alpha=0.6)
-    ax.plot(X_test, y_pred, color='red', label="Predicted Values", linewidth=2)
-    ax.set_title("Health Risk Score vs. Predicted Claim Amount", fontsize=12)
-    ax.set_xlabel("Health Risk Score", fontsize=10)
-    ax.set_ylabel("Claim Amount", fontsize=10)
-    ax.legend(fontsize=10)
-    st.pyplot(fig)
+    with tracer.section("Predictive Insights", rows=len(insurance_data)):
+        st.subheader(":crystal_ball: Predictive Insights (Regression Analysis)")
+        st.markdown("### Predict Claim Amount based on Health Risk Score.")
+        claim_engine = derived(insurance_data, "claim_regression", claim_amount_engine)
+        model = claim_engine.fit()
+
+        plot_rows = derived(insurance_data, "claim_fit_points",
+                            lambda d: downsample(d, 'Health_Risk_Score', 'Claim_Amount', max_points=2000))
+        X_test, y_test = plot_rows['Health_Risk_Score'], plot_rows['Claim_Amount']
+        y_pred = model.predict(X_test)
+
+        st.image(fit_png(X_test, y_test, y_pred, "Health Risk Score vs. Predicted Claim Amount", "Health Risk Score",
+                         "Claim Amount", figsize=(5, 3), fontsize=12, alpha=0.6, linewidth=2,
+                         key=data_token(insurance_data)))
 
 # Banking Services Page
 elif selected_dashboard == "🏦 Banking Services":
-    st.title(":bank: Banking Services")
-    st.markdown("### This page will contain banking analytics and tools.")
+    display_banking()
 
 # Route Optimization Page
 elif selected_dashboard == "🚗 Route Optimization":
     st.title(":world_map: Route Optimization")
-    st.markdown("### This page will contain route optimization tools and analytics.")
+    st.markdown("### Plan delivery-agent routes with vehicle capacity and time windows.")
+
+    st.sidebar.header("🚗 Routing Settings")
+    n_stops = st.sidebar.slider("Number of Stops:", 50, 5000, 1000, step=50)
+    n_vehicles = st.sidebar.slider("Number of Vehicles:", 1, 200, 40)
+    capacity = st.sidebar.slider("Vehicle Capacity (parcels):", 10, 300, 100)
+    speed_kmh = st.sidebar.slider("Average Speed (km/h):", 10, 60, 30)
+
+    if st.button("Optimize Routes"):
+        stops = demo_stops(n_stops)
+        depot = (26.9124, 75.7873)
+        with tracer.section("Route Solve", rows=n_stops):
+            plan = solve_routes(stops, depot, n_vehicles, capacity, speed_kmh=speed_kmh)
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Total Distance (km)", f"{plan.distance_km:,.1f}")
+        col2.metric("Saved by Local Search (km)", f"{plan.construction_km - plan.distance_km:,.1f}")
+        col3.metric("Saved vs. One Trip per Stop (km)", f"{plan.baseline_km - plan.distance_km:,.1f}")
+        col4.metric("Unserved Stops", len(plan.unserved))
+
+        fig = px.line_mapbox(plan.routes, lat="Latitude", lon="Longitude", color="Vehicle",
+                             hover_data=["Stop", "Arrival_Min"], zoom=10, height=600,
+                             title="Optimized Delivery Routes")
+        fig.update_layout(mapbox_style="open-street-map", showlegend=False)
+        st.plotly_chart(fig, use_container_width=True)
+
+        per_vehicle = plan.routes[plan.routes["Stop"] >= 0].groupby("Vehicle").agg(
+            Stops=("Stop", "size"), Last_Arrival_Min=("Arrival_Min", "max"))
+        st.dataframe(per_vehicle)
+
+# Section timings of this rerun, slowest first
+if show_timings:
+    spans = sorted(trace_run.table(), key=lambda span: span["ms"], reverse=True)
+    st.sidebar.markdown(f"**⏱️ Section Timings** ({sum(span['ms'] for span in spans):,.1f} ms)")
+    st.sidebar.dataframe(pd.DataFrame(spans), hide_index=True)
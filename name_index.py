@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+
+def _trigram_codes(encoded):
+    """Pack every 3-byte window of `encoded` into an int."""
+    return [encoded[i] << 16 | encoded[i + 1] << 8 | encoded[i + 2] for i in range(len(encoded) - 2)]
+
+
+class TrigramIndex:
+    """Case-insensitive substring index over a column of names.
+
+    Every lowercased name is split into byte trigrams; for each trigram the
+    index keeps the sorted rows containing it (CSR layout: trigram codes,
+    offsets, rows). A query intersects the posting lists of its trigrams,
+    smallest first, and only the surviving candidates are checked for the
+    full substring. Queries shorter than three characters fall back to a
+    scan of the lowercased names.
+    """
+
+    def __init__(self, names):
+        self.names = pd.Series(names, dtype="string").fillna("").str.lower().reset_index(drop=True)
+        self.lowered = self.names.to_numpy(dtype=object)
+        encoded = self.names.str.encode("utf-8").tolist()
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        if not (lengths >= 3).any():
+            self.codes = np.empty(0, dtype=np.int64)
+            self.offsets = np.zeros(1, dtype=np.int64)
+            self.rows = np.empty(0, dtype=np.int64)
+            return
+
+        # All names back to back (CSR like the postings), so memory follows
+        # the total length, not rows x longest name
+        raw = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.int64)
+        ends = np.cumsum(lengths)
+        rows = np.repeat(np.arange(len(encoded), dtype=np.int64), lengths)[:-2]
+        # A window counts if it ends inside the name it starts in
+        inside = np.arange(2, len(raw)) < ends[rows]
+        codes = raw[:-2] << 16 | raw[1:-1] << 8 | raw[2:]
+
+        # Unique (trigram, row) pairs sorted by trigram, then row
+        pairs = np.sort(codes[inside] << 32 | rows[inside])
+        pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]]
+        pair_codes = pairs >> 32
+        self.rows = pairs & 0xFFFFFFFF
+        starts = np.flatnonzero(np.r_[True, pair_codes[1:] != pair_codes[:-1]])
+        self.codes = pair_codes[starts]
+        self.offsets = np.r_[starts, len(pairs)]
+
+    def __len__(self):
+        return len(self.names)
+
+    def _postings(self, code):
+        i = np.searchsorted(self.codes, code)
+        if i == len(self.codes) or self.codes[i] != code:
+            return self.rows[:0]
+        return self.rows[self.offsets[i]:self.offsets[i + 1]]
+
+    def search(self, query):
+        """Row positions whose name contains `query` (case-insensitive), in row order."""
+        query = str(query).lower()
+        encoded = query.encode("utf-8")
+        if len(encoded) < 3:
+            return np.flatnonzero(self.names.str.contains(query, regex=False).to_numpy(dtype=bool))
+
+        postings = sorted((self._postings(code) for code in set(_trigram_codes(encoded))), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if len(candidates) <= 16:
+                break  # cheaper to check the few candidates directly
+            at = np.minimum(np.searchsorted(posting, candidates), len(posting) - 1)
+            candidates = candidates[posting[at] == candidates]
+        if len(encoded) == 3 or len(candidates) == 0:
+            return candidates
+        # Trigrams can all match without the query occurring in one piece
+        found = np.fromiter((query in name for name in self.lowered[candidates]), dtype=bool,
+                            count=len(candidates))
+        return candidates[found]
@@ -0,0 +1,210 @@
+import mmap
+
+import numpy as np
+
+# Parsed fix records
+GGA_DTYPE = np.dtype([
+    ("time_s", "f8"), ("lat", "f8"), ("lon", "f8"), ("fix", "i1"),
+    ("satellites", "i2"), ("hdop", "f4"), ("altitude_m", "f4"),
+])
+RMC_DTYPE = np.dtype([
+    ("epoch_s", "f8"), ("lat", "f8"), ("lon", "f8"), ("valid", "?"),
+    ("speed_knots", "f4"), ("course_deg", "f4"),
+])
+
+_DOLLAR, _STAR, _COMMA, _NEWLINE, _DOT = (ord(c) for c in "$*,\n.")
+
+# Hex digit value per byte (uppercase and lowercase), -1 otherwise
+_HEX = np.full(256, -1, dtype=np.int16)
+for _i, _c in enumerate("0123456789ABCDEF"):
+    _HEX[ord(_c)] = _HEX[ord(_c.lower())] = _i
+
+
+def _segment_xor(data, starts, ends):
+    """XOR of data[start:end] for each non-overlapping, increasing segment."""
+    bounds = np.column_stack([starts, ends]).ravel()
+    padded = np.r_[data, np.uint8(0)]
+    xor = np.bitwise_xor.reduceat(padded, bounds)[::2]
+    # reduceat returns data[start] for empty segments; those have no payload
+    return np.where(ends > starts, xor, 0)
+
+
+def _parse_decimal(data, starts, ends, width=15):
+    """Parse ASCII decimals data[start:end] into float64 (NaN for empty/invalid fields).
+
+    Works one character column at a time across all fields, accumulating
+    an integer mantissa and a count of digits after the point.
+    """
+    lengths = ends - starts
+    valid = (lengths > 0) & (lengths <= width)
+    if not valid.any():
+        return np.full(len(starts), np.nan)
+    last = len(data) - 1
+    negative = valid & (data[np.minimum(starts, last)] == ord("-"))
+    mantissa = np.zeros(len(starts), dtype=np.int64)
+    decimals = np.zeros(len(starts), dtype=np.int64)
+    dots = np.zeros(len(starts), dtype=np.int64)
+    for i in range(int(lengths[valid].max())):
+        inside = i < lengths
+        chars = data[np.minimum(starts + i, last)]
+        digit = chars - np.uint8(48)  # wraps for bytes below '0'
+        is_digit = inside & (digit < 10)
+        is_dot = inside & (chars == _DOT)
+        valid &= ~inside | is_digit | is_dot | (negative if i == 0 else False)
+        mantissa = np.where(is_digit, mantissa * 10 + digit, mantissa)
+        decimals += is_digit & (dots > 0)
+        dots += is_dot
+    value = mantissa / 10.0 ** decimals
+    value = np.where(negative, -value, value)
+    return np.where(valid & (dots <= 1), value, np.nan)
+
+
+def _degrees(value, hemisphere, negative_letter):
+    """NMEA ddmm.mmmm (or dddmm.mmmm) -> signed decimal degrees."""
+    degrees = np.floor(value / 100.0)
+    result = degrees + (value - 100.0 * degrees) / 60.0
+    return np.where(hemisphere == ord(negative_letter), -result, result)
+
+
+def _kind(name):
+    """Pack a three-letter sentence type (e.g. b"GGA") into an int."""
+    return name[0] << 16 | name[1] << 8 | name[2]
+
+
+class NmeaParser:
+    """Streaming GGA/RMC parser over raw NMEA byte chunks.
+
+    Chunks (bytes, bytearray, memoryview or mmap) are viewed as uint8 arrays
+    without copying; sentence boundaries, checksums and fields are found
+    with array operations, never per character in Python. Only an
+    incomplete trailing sentence is kept (copied) until the next chunk.
+    """
+
+    def __init__(self):
+        self.carry = b""
+        self.checksum_errors = 0
+
+    def feed(self, chunk):
+        """Parse one chunk; returns (gga, rmc) structured arrays."""
+        data = np.frombuffer(chunk, dtype=np.uint8)
+        parts = []
+        if self.carry:
+            first_newline = np.flatnonzero(data == _NEWLINE)[:1]
+            if len(first_newline) == 0:
+                self.carry += bytes(data)
+                return np.empty(0, GGA_DTYPE), np.empty(0, RMC_DTYPE)
+            head = np.frombuffer(self.carry + bytes(data[:first_newline[0] + 1]), dtype=np.uint8)
+            parts.append(self._parse(head, complete=True))
+            data = data[first_newline[0] + 1:]
+            self.carry = b""
+        parts.append(self._parse(data, complete=False))
+        return (np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts]))
+
+    def _parse(self, data, complete):
+        newlines = np.flatnonzero(data == _NEWLINE)
+        dollars = np.flatnonzero(data == _DOLLAR)
+        if not complete:
+            tail_start = newlines[-1] + 1 if len(newlines) else 0
+            if tail_start < len(data):
+                self.carry = bytes(data[tail_start:])
+        if len(newlines) == 0 or len(dollars) == 0:
+            return np.empty(0, GGA_DTYPE), np.empty(0, RMC_DTYPE)
+
+        # Each line's sentence starts at the last '$' before its newline
+        line_end = newlines
+        line_start = np.r_[0, newlines[:-1] + 1]
+        last_dollar = np.searchsorted(dollars, line_end, side="left") - 1
+        has_dollar = last_dollar >= 0
+        start = np.where(has_dollar, dollars[np.maximum(last_dollar, 0)], -1)
+        ok = has_dollar & (start >= line_start)
+        start, end = start[ok], line_end[ok]
+
+        # Checksum: '*' followed by two hex digits, XOR of the bytes between '$' and '*'
+        stars = np.flatnonzero(data == _STAR)
+        if len(stars) == 0:
+            return np.empty(0, GGA_DTYPE), np.empty(0, RMC_DTYPE)
+        star_idx = np.searchsorted(stars, start)
+        star = stars[np.minimum(star_idx, len(stars) - 1)]
+        ok = (star_idx < len(stars)) & (star > start) & (star + 2 < end)
+        start, end, star = start[ok], end[ok], star[ok]
+        expected = (_HEX[data[star + 1]] << 4) | _HEX[data[star + 2]]
+        actual = _segment_xor(data, start + 1, star)
+        good = (_HEX[data[star + 1]] >= 0) & (_HEX[data[star + 2]] >= 0) & (expected == actual)
+        self.checksum_errors += int((~good).sum())
+        start, star = start[good], star[good]
+
+        commas = np.flatnonzero(data == _COMMA)
+        kind = data[start + 3].astype(np.int32) << 16 | data[start + 4].astype(np.int32) << 8 | data[start + 5]
+        gga = self._gga(data, commas, start[kind == _kind(b"GGA")], star[kind == _kind(b"GGA")])
+        rmc = self._rmc(data, commas, start[kind == _kind(b"RMC")], star[kind == _kind(b"RMC")])
+        return gga, rmc
+
+    @staticmethod
+    def _fields(data, commas, start, star, count):
+        """Start/end offsets of the first `count` fields of each sentence."""
+        first = np.searchsorted(commas, start)
+        idx = first[:, None] + np.arange(count + 1)[None, :]
+        ok = (idx[:, -1] < len(commas))
+        pos = commas[np.minimum(idx, len(commas) - 1)] if len(commas) else np.zeros_like(idx)
+        # The last field may be terminated by '*' rather than a comma
+        pos = np.minimum(pos, star[:, None])
+        ok &= pos[:, 0] < star
+        return pos[:, :-1] + 1, pos[:, 1:], ok
+
+    def _gga(self, data, commas, start, star):
+        fs, fe, ok = self._fields(data, commas, start, star, 9)
+        fs, fe = fs[ok], fe[ok]
+        out = np.empty(len(fs), GGA_DTYPE)
+        t = _parse_decimal(data, fs[:, 0], fe[:, 0])
+        out["time_s"] = np.floor(t / 10000) * 3600 + np.floor(t / 100 % 100) * 60 + t % 100
+        out["lat"] = _degrees(_parse_decimal(data, fs[:, 1], fe[:, 1]), data[fs[:, 2]], "S")
+        out["lon"] = _degrees(_parse_decimal(data, fs[:, 3], fe[:, 3]), data[fs[:, 4]], "W")
+        out["fix"] = np.nan_to_num(_parse_decimal(data, fs[:, 5], fe[:, 5]), nan=0)
+        out["satellites"] = np.nan_to_num(_parse_decimal(data, fs[:, 6], fe[:, 6]), nan=0)
+        out["hdop"] = _parse_decimal(data, fs[:, 7], fe[:, 7])
+        out["altitude_m"] = _parse_decimal(data, fs[:, 8], fe[:, 8])
+        return out
+
+    def _rmc(self, data, commas, start, star):
+        fs, fe, ok = self._fields(data, commas, start, star, 9)
+        fs, fe = fs[ok], fe[ok]
+        out = np.empty(len(fs), RMC_DTYPE)
+        t = _parse_decimal(data, fs[:, 0], fe[:, 0])
+        seconds = np.floor(t / 10000) * 3600 + np.floor(t / 100 % 100) * 60 + t % 100
+        date = _parse_decimal(data, fs[:, 8], fe[:, 8])
+        has_date = ~np.isnan(date)
+        date = np.nan_to_num(date, nan=10170).astype(np.int64)  # placeholder 01-01-70
+        # Two-digit years: 80-99 are 1980-1999, 00-79 are 2000-2079
+        day, month, year = date // 10000, date // 100 % 100, date % 100
+        year = np.where(year >= 80, 1900, 2000) + year
+        months = (year - 1970) * 12 + np.clip(month, 1, 12) - 1
+        days = months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64) + day - 1
+        out["epoch_s"] = np.where(has_date, days * 86400.0 + seconds, np.nan)
+        out["valid"] = data[fs[:, 1]] == ord("A")
+        out["lat"] = _degrees(_parse_decimal(data, fs[:, 2], fe[:, 2]), data[fs[:, 3]], "S")
+        out["lon"] = _degrees(_parse_decimal(data, fs[:, 4], fe[:, 4]), data[fs[:, 5]], "W")
+        out["speed_knots"] = _parse_decimal(data, fs[:, 6], fe[:, 6])
+        out["course_deg"] = _parse_decimal(data, fs[:, 7], fe[:, 7])
+        return out
+
+
+def parse_file(path, chunk_size=64 << 20):
+    """Parse a recorded NMEA log through mmap; returns (gga, rmc) arrays."""
+    parser = NmeaParser()
+    gga, rmc = [], []
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return np.empty(0, GGA_DTYPE), np.empty(0, RMC_DTYPE)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, len(view), chunk_size):
+                    g, r = parser.feed(view[offset:offset + chunk_size])
+                    gga.append(g)
+                    rmc.append(r)
+                g, r = parser.feed(b"\n")  # flush a final line without a newline
+                gga.append(g)
+                rmc.append(r)
+            finally:
+                view.release()
+    return np.concatenate(gga), np.concatenate(rmc)
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Dimensions every cube keeps: the date range and the sidebar filters
+CUBE_DIMENSIONS = ["Order_Date", "Vehicle", "Area", "Category"]
+
+# Chart-only dimensions; each gets its own marginal cube over CUBE_DIMENSIONS
+MARGINAL_DIMENSIONS = ["Order_Hour", "Weather", "Traffic"]
+
+MEASURE = "Delivery_Time"
+
+
+def _aggregate(rows, dimensions):
+    """Collapse order rows into cube cells with count/sum/sum-of-squares."""
+    measure = rows[MEASURE].astype("float64")
+    return (
+        pd.DataFrame({
+            **{dim: rows[dim] for dim in dimensions},
+            "count": measure.notna().astype("int64"),
+            "sum": measure.fillna(0.0),
+            "sumsq": measure.fillna(0.0) ** 2,
+            # Orders without a delivery time still count towards order totals
+            "orders": np.ones(len(rows), dtype="int64"),
+        })
+        .groupby(dimensions, observed=True, dropna=False, sort=False)
+        .sum()
+        .reset_index()
+    )
+
+
+def _merge(old, new, dimensions):
+    """Sum two cell tables on `dimensions`, widening categoricals to both sets of categories."""
+    for dim in dimensions:
+        if isinstance(old[dim].dtype, pd.CategoricalDtype) or isinstance(new[dim].dtype, pd.CategoricalDtype):
+            categories = union_categoricals(
+                [old[dim].astype("category"), new[dim].astype("category")]
+            ).categories
+            old[dim] = old[dim].astype(pd.CategoricalDtype(categories))
+            new[dim] = new[dim].astype(pd.CategoricalDtype(categories))
+    return (
+        pd.concat([old, new], ignore_index=True)
+        .groupby(dimensions, observed=True, dropna=False, sort=False)
+        .sum()
+        .reset_index()
+    )
+
+
+class OrderCube:
+    """Pre-aggregated order cubes over date x the sidebar filters.
+
+    The base cube (`cells`) has one cell per date x Vehicle x Area x
+    Category; every chart-only dimension (hour, Weather, Traffic) gets its
+    own marginal cube over the base dimensions plus that one, instead of
+    one cube keyed on all of them, whose cell count approaches the row
+    count. Each cell stores the number of orders and the count, sum and sum
+    of squares of Delivery_Time, so counts, means and variances for any
+    filter combination are rollups over cells instead of groupbys over
+    rows. The filter mask of each cube is computed once per selection and
+    reused by every rollup of the same rerun.
+    """
+
+    def __init__(self, data):
+        self.dimensions = [dim for dim in CUBE_DIMENSIONS if dim in data.columns]
+        self.marginals = {None: _aggregate(data, self.dimensions)}
+        for dim in MARGINAL_DIMENSIONS:
+            if dim in data.columns:
+                self.marginals[dim] = _aggregate(data, self.dimensions + [dim])
+        self._masks = (None, {})
+
+    @property
+    def cells(self):
+        return self.marginals[None]
+
+    def append(self, new_rows):
+        """Fold newly arrived orders into the cubes without touching old rows."""
+        for dim, cells in list(self.marginals.items()):
+            dimensions = self.dimensions + ([dim] if dim else [])
+            self.marginals[dim] = _merge(cells, _aggregate(new_rows, dimensions), dimensions)
+        self._masks = (None, {})
+
+    def _cube_for(self, by):
+        return None if by in self.dimensions else by
+
+    def query(self, start, end, filters, by=None):
+        """Return the cells (of the cube holding `by`) inside the date range matching every filter."""
+        cube = self._cube_for(by)
+        cells = self.marginals[cube]
+        key = (str(start), str(end), tuple((column, tuple(selected)) for column, selected in filters.items()))
+        selection, masks = self._masks
+        if selection != key:
+            masks = {}
+            self._masks = (key, masks)
+        mask = masks.get(cube)
+        if mask is None:
+            dates = cells["Order_Date"]
+            mask = ((dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))).to_numpy(copy=True)
+            for column, selected in filters.items():
+                mask &= cells[column].isin(selected).to_numpy()
+            masks[cube] = mask
+        return cells[mask]
+
+    def rollup(self, by, start, end, filters):
+        """Roll the matching cells up to `by` with order count, mean and std."""
+        totals = (
+            self.query(start, end, filters, by)
+            .groupby(by, observed=True, sort=True)[["orders", "count", "sum", "sumsq"]]
+            .sum()
+            .reset_index()
+        )
+        count = totals["count"].where(totals["count"] > 0)
+        totals["mean"] = totals["sum"] / count
+        variance = totals["sumsq"] / count - totals["mean"] ** 2
+        totals["std"] = np.sqrt(variance.clip(lower=0.0))
+        return totals
@@ -0,0 +1,213 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_store import prepare_orders
+from order_cube import OrderCube
+from regression import delivery_time_engine
+
+# Only the columns the Order Analytics page reads are parsed
+ORDER_COLUMNS = ["Order_Date", "Order_Time", "Agent_Age", "Agent_Rating", "Delivery_Time",
+                 "Vehicle", "Area", "Category", "Weather", "Traffic"]
+
+CORRELATION_COLUMNS = ["Delivery_Time", "Agent_Age", "Agent_Rating", "Order_Hour"]
+
+# Sidebar filters; correlation, histogram and sample stats are kept per cell of these
+FILTER_DIMENSIONS = ["Order_Date", "Vehicle", "Area", "Category"]
+
+# ORDER_STREAMING=1 forces streaming; otherwise files over ORDER_STREAM_MB are streamed.
+# ORDER_MEMORY_MB caps the chunk plus the aggregates built from it.
+STREAM_BYTES = int(os.getenv("ORDER_STREAM_MB", "512")) << 20
+MEMORY_BYTES = int(os.getenv("ORDER_MEMORY_MB", "256")) << 20
+
+# Copies pandas makes while parsing and aggregating a chunk, relative to the chunk itself
+PARSE_OVERHEAD = 4
+MIN_CHUNK_ROWS = 1000
+
+# One set of aggregates per order file version in this process
+_aggregates = {}
+_aggregates_lock = threading.Lock()
+
+
+def _merge(old, new, dimensions):
+    """Sum two cell tables on `dimensions`."""
+    if old is None:
+        return new
+    return (
+        pd.concat([old, new], ignore_index=True)
+        .groupby(dimensions, observed=True, dropna=False, sort=False)
+        .sum()
+        .reset_index()
+    )
+
+
+def _moment_cells(rows):
+    """Per-cell count, sums and cross-product sums of the correlation columns."""
+    values = rows[CORRELATION_COLUMNS].to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values).any(axis=1)
+    values = np.where(valid[:, None], values, 0.0)
+    stats = {column: rows[column] for column in FILTER_DIMENSIONS}
+    stats["n"] = valid.astype(np.int64)
+    for i, a in enumerate(CORRELATION_COLUMNS):
+        stats[a] = values[:, i]
+        for j in range(i, len(CORRELATION_COLUMNS)):
+            stats[f"{a}*{CORRELATION_COLUMNS[j]}"] = values[:, i] * values[:, j]
+    return pd.DataFrame(stats).groupby(FILTER_DIMENSIONS, observed=True, dropna=False, sort=False).sum()
+
+
+class OrderAggregates:
+    """Order Analytics aggregates built from bounded chunks of the source.
+
+    Each chunk is folded into an OrderCube (daily/hourly counts and
+    per-factor delivery-time means), the delivery-time regression engine,
+    per-filter-cell co-moments of the correlation columns, per-cell counts
+    of Delivery_Time rounded to `resolution` (histogram bins) and a uniform
+    bottom-k sample of `sample_size` rows for scatter plots. Everything is
+    sized by the number of distinct cells, not rows, so memory stays flat
+    as the file grows.
+    """
+
+    def __init__(self, resolution=1.0, sample_size=20000, seed=0):
+        self.resolution = resolution
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self.cube = None
+        self.regression = None
+        self.moments = None
+        self.delivery_times = None
+        self.sample = None
+        self.rows = 0
+
+    def update(self, rows):
+        """Fold a chunk of prepared order rows (see prepare_orders) into the aggregates."""
+        if self.cube is None:
+            self.cube = OrderCube(rows)
+            self.regression = delivery_time_engine(rows)
+        else:
+            self.cube.append(rows)
+            self.regression.append(rows)
+        self.moments = _merge(self.moments, _moment_cells(rows).reset_index(), FILTER_DIMENSIONS)
+
+        binned = rows[FILTER_DIMENSIONS].copy()
+        binned["Delivery_Time"] = (rows["Delivery_Time"] / self.resolution).round() * self.resolution
+        binned["count"] = np.int64(1)
+        binned = binned.dropna(subset=["Delivery_Time"])
+        self.delivery_times = _merge(
+            self.delivery_times,
+            binned.groupby(FILTER_DIMENSIONS + ["Delivery_Time"], observed=True, dropna=False, sort=False)
+            .sum().reset_index(),
+            FILTER_DIMENSIONS + ["Delivery_Time"],
+        )
+
+        # Bottom-k on random keys: a uniform sample of every row seen so far
+        candidates = rows[FILTER_DIMENSIONS + ["Agent_Rating", "Delivery_Time"]].assign(
+            _key=self.rng.random(len(rows)))
+        if self.sample is not None:
+            candidates = pd.concat([self.sample, candidates], ignore_index=True)
+        self.sample = candidates.nsmallest(self.sample_size, "_key").reset_index(drop=True)
+        self.rows += len(rows)
+
+    def nbytes(self):
+        """Approximate memory held by the aggregates."""
+        tables = [self.moments, self.delivery_times, self.sample]
+        if self.cube is not None:
+            tables += list(self.cube.marginals.values()) + [self.regression.cells]
+        return sum(int(table.memory_usage(deep=True).sum()) for table in tables if table is not None)
+
+    # Queries, with the same (start, end, filters) arguments as OrderCube.rollup
+
+    def _matching(self, cells, start, end, filters):
+        dates = cells["Order_Date"]
+        mask = (dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))
+        for column, selected in filters.items():
+            mask &= cells[column].isin(selected)
+        return cells[mask]
+
+    def categories(self, column):
+        """Distinct values of a cube dimension, in first-seen order."""
+        return self.cube.cells[column].dropna().unique()
+
+    def date_range(self):
+        dates = self.cube.cells["Order_Date"]
+        return dates.min(), dates.max()
+
+    def correlation(self, start, end, filters):
+        """Pearson correlation matrix of the correlation columns (complete rows only)."""
+        totals = self._matching(self.moments, start, end, filters).drop(columns=FILTER_DIMENSIONS).sum()
+        n = totals["n"]
+        k = len(CORRELATION_COLUMNS)
+        covariance = np.full((k, k), np.nan)
+        if n > 1:
+            for i, a in enumerate(CORRELATION_COLUMNS):
+                for j in range(i, k):
+                    b = CORRELATION_COLUMNS[j]
+                    covariance[i, j] = covariance[j, i] = (totals[f"{a}*{b}"] - totals[a] * totals[b] / n) / (n - 1)
+        scale = np.sqrt(np.diag(covariance))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            matrix = covariance / np.outer(scale, scale)
+        return pd.DataFrame(matrix, index=CORRELATION_COLUMNS, columns=CORRELATION_COLUMNS)
+
+    def delivery_histogram(self, start, end, filters):
+        """(Delivery_Time values, counts) of the matching rows, at `resolution`."""
+        counts = (
+            self._matching(self.delivery_times, start, end, filters)
+            .groupby("Delivery_Time", sort=True)["count"]
+            .sum()
+        )
+        return counts.index.to_numpy(dtype=np.float64), counts.to_numpy(dtype=np.float64)
+
+    def sample_rows(self, start, end, filters):
+        """The sampled rows that match the filters."""
+        return self._matching(self.sample, start, end, filters)
+
+
+def _chunk_rows(memory_bytes, used_bytes, row_bytes):
+    rows = int((memory_bytes - used_bytes) / (row_bytes * PARSE_OVERHEAD))
+    if rows < MIN_CHUNK_ROWS:
+        raise MemoryError(f"order aggregates use {used_bytes:,} bytes; "
+                          f"a {memory_bytes:,}-byte cap leaves no room for another chunk")
+    return rows
+
+
+def aggregate_csv(path, memory_bytes=MEMORY_BYTES, **options):
+    """Stream an order CSV through OrderAggregates within `memory_bytes`.
+
+    Chunk sizes are re-planned before every read from the measured size of
+    a parsed row and the memory already held by the aggregates.
+    """
+    aggregates = OrderAggregates(**options)
+    row_bytes = None
+    with pd.read_csv(path, usecols=ORDER_COLUMNS, iterator=True) as reader:
+        while True:
+            rows = MIN_CHUNK_ROWS if row_bytes is None else _chunk_rows(memory_bytes, aggregates.nbytes(), row_bytes)
+            try:
+                chunk = reader.get_chunk(rows)
+            except StopIteration:
+                break
+            if row_bytes is None:
+                row_bytes = max(chunk.memory_usage(deep=True).sum() / max(len(chunk), 1), 1.0)
+            aggregates.update(prepare_orders(chunk))
+            del chunk
+    return aggregates
+
+
+def streaming_enabled(path):
+    """Whether the order file should be aggregated in chunks instead of loaded."""
+    forced = os.getenv("ORDER_STREAMING", "").lower()
+    if forced:
+        return forced not in ("0", "false", "off")
+    return os.path.getsize(path) > STREAM_BYTES
+
+
+def get_order_aggregates(path, memory_bytes=MEMORY_BYTES):
+    """Aggregates for the current version of `path`, built once per process."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _aggregates_lock:
+        if key not in _aggregates:
+            for old_key in [k for k in _aggregates if k[0] == key[0]]:
+                del _aggregates[old_key]
+            _aggregates[key] = aggregate_csv(path, memory_bytes)
+        return _aggregates[key]
@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+
+# Columns of the per-group rollup, in display order
+ROLLUP_COLUMNS = ["Accounts", "Balance", "Accrued_Interest", "Current_Value", "Maturity_Value",
+                  "Interest_Rate", "Months_Remaining"]
+
+
+def _months(dates):
+    """Months since 1970-01 of each date (NaN where missing or unparseable).
+
+    Strings are parsed once per distinct value; a portfolio has only a few
+    thousand distinct opening dates however many accounts it holds.
+    """
+    dates = pd.Series(dates)
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        codes, uniques = np.arange(len(dates)), dates.to_numpy()
+    else:
+        codes, uniques = pd.factorize(dates)
+        uniques = pd.to_datetime(pd.Series(uniques, dtype=object), format="%Y-%m-%d", errors="coerce").to_numpy()
+    uniques = uniques.astype("datetime64[M]")
+    months = np.where(np.isnat(uniques), np.nan, uniques.astype(np.int64))
+    return np.where(codes >= 0, months[codes], np.nan)
+
+
+def _argsort_small(keys):
+    """Stable argsort; non-negative keys below 2**15 go through NumPy's int16 radix sort."""
+    if len(keys) and keys.max() < 2 ** 15:
+        keys = keys.astype(np.int16)
+    return np.argsort(keys, kind="stable")
+
+
+class AccountProjection:
+    """Compound-interest projections for every account, computed column-wise.
+
+    Balances compound `compounding` times a year (quarterly by default, as
+    Indian banks credit interest) at Interest_Rate from the Opening_Date
+    month for Account_Term years, after which the account pays out and
+    drops from the portfolio; interest is credited at the end of each
+    completed period. Accrued interest, current and maturity values are
+    NumPy expressions over whole columns; accounts with a missing balance,
+    rate, term or opening date project to zero.
+    """
+
+    def __init__(self, data, by=("Region", "Account_Type"), as_of=None, compounding=4):
+        if compounding <= 0 or 12 % compounding:
+            raise ValueError("compounding must divide 12 (1, 2, 3, 4, 6 or 12 times a year)")
+        self.by = list(by)
+        self.compounding = compounding
+        self.period = 12 // compounding
+        as_of = pd.Timestamp.today() if as_of is None else pd.Timestamp(as_of)
+        self.as_of = (as_of.year - 1970) * 12 + as_of.month - 1
+        self.account_ids = data["Account_ID"].to_numpy() if "Account_ID" in data.columns else None
+
+        principal = pd.to_numeric(data["Balance"], errors="coerce").to_numpy(dtype=np.float64)
+        rate = pd.to_numeric(data["Interest_Rate"], errors="coerce").to_numpy(dtype=np.float64) / 100
+        term = pd.to_numeric(data["Account_Term"], errors="coerce").to_numpy(dtype=np.float64)
+        opened = _months(data["Opening_Date"])
+        valid = np.isfinite(principal) & np.isfinite(rate) & np.isfinite(term) & np.isfinite(opened)
+        self.principal = np.where(valid, principal, 0.0)
+        self.rate = np.where(valid, rate, 0.0)
+        self.term = np.where(valid, term * 12, 0).astype(np.int64)  # months
+        self.opened = np.where(valid, opened, self.as_of).astype(np.int64)
+        self.growth = 1 + self.rate / compounding  # per-period growth factor
+
+        # Months since opening as of the projection date (negative: opens later)
+        self.age = self.as_of - self.opened
+        elapsed = np.clip(self.age, 0, self.term)
+        self.current_value = self.principal * self.growth ** (elapsed // self.period)
+        self.accrued_interest = self.current_value - self.principal
+        self.maturity_value = self.principal * self.growth ** (self.term // self.period)
+        self.months_remaining = self.term - elapsed
+
+        # Dense codes for the observed combinations of the `by` columns
+        combined = np.zeros(len(data), dtype=np.int64)
+        levels = []
+        for column in self.by:
+            codes, uniques = pd.factorize(data[column], sort=True, use_na_sentinel=False)
+            combined = combined * len(uniques) + codes
+            levels.append(uniques)
+        present = np.flatnonzero(np.bincount(combined, minlength=1))
+        self.codes = np.searchsorted(present, combined)
+        self.groups = pd.MultiIndex.from_product(levels, names=self.by)[present]
+
+    def accounts(self):
+        """Per-account projection table; matured accounts show their payout as current value."""
+        return pd.DataFrame({
+            "Account_ID": self.account_ids,
+            "Accrued_Interest": self.accrued_interest,
+            "Current_Value": self.current_value,
+            "Maturity_Value": self.maturity_value,
+            "Maturity_Date": (self.opened + self.term).astype("datetime64[M]").astype("datetime64[s]"),
+            "Months_Remaining": self.months_remaining,
+        })
+
+    def rollup(self):
+        """Totals per group of `by`; Interest_Rate and Months_Remaining are balance-weighted means."""
+        size = len(self.groups)
+
+        def total(weights):
+            return np.bincount(self.codes, weights, minlength=size)
+
+        balance = total(self.principal)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            table = pd.DataFrame({
+                "Accounts": np.bincount(self.codes, minlength=size),
+                "Balance": balance,
+                "Accrued_Interest": total(self.accrued_interest),
+                "Current_Value": total(self.current_value),
+                "Maturity_Value": total(self.maturity_value),
+                "Interest_Rate": total(self.principal * self.rate) / balance * 100,
+                "Months_Remaining": total(self.principal * self.months_remaining) / balance,
+            }, index=self.groups)
+        return table[ROLLUP_COLUMNS]
+
+    def calendar(self, months):
+        """Month starts from the projection date, the index of `paths` and `trajectory`."""
+        return pd.date_range(np.datetime64(self.as_of, "M"), periods=months, freq="MS", name="Month")
+
+    def paths(self, rows, months=120):
+        """Month-by-month balances of the accounts at positions `rows`, shape (len(rows), months).
+
+        Broadcasts months against accounts, so keep `rows` to a selection;
+        use `trajectory` for portfolio totals.
+        """
+        rows = np.asarray(rows)
+        age = self.age[rows, None] + np.arange(months)[None, :]
+        active = (age >= 0) & (age < self.term[rows, None])
+        values = self.principal[rows, None] * self.growth[rows, None] ** (np.maximum(age, 0) // self.period)
+        return np.where(active, values, 0.0)
+
+    def trajectory(self, months=120, level=None):
+        """Total balance per group for each month from the projection date.
+
+        A balance only changes when one of its periods completes, and
+        accounts open and mature on period boundaries too. Accounts are
+        split by phase (age modulo the period), so each month exactly one
+        phase advances: its active balances are multiplied by their growth
+        factors in place and its group totals recounted. Within a phase,
+        accounts are ordered by periods left, so the live ones are a prefix
+        that shrinks as they mature. Total work is accounts x months /
+        period, against accounts x months for broadcasting every path.
+        """
+        size = len(self.groups)
+        period = self.period
+
+        # With r = age % period, completed periods at month t are
+        # age // period + (r + t) // period; an account counts from step
+        # `first` (it has opened) until step `left` (it has matured).
+        phase = self.age % period
+        start = self.age // period
+        left = np.maximum((self.term - self.age + phase) // period, 0)
+        first = np.maximum(-start, 0)
+        most = left.max(initial=0)
+        order = _argsort_small(phase * (most + 1) + most - left)
+        phase, remaining, first = phase[order], -left[order], first[order]
+        principal, growth, codes = self.principal[order], self.growth[order], self.codes[order]
+        values = principal * growth ** start[order].astype(np.float64)
+        bounds = np.searchsorted(phase, np.arange(period + 1))
+
+        # Accounts that open later hold zero until their first step, then their principal
+        pending = np.flatnonzero(first > 0)
+        values[pending] = 0.0
+        width = first.max(initial=0) + 1
+        entry = phase[pending] * width + first[pending]
+        by_entry = _argsort_small(entry)
+        pending, entry = pending[by_entry], entry[by_entry]
+
+        steps = np.zeros(period, dtype=np.int64)
+        phase_totals = np.zeros((period, size))
+        totals = np.zeros((months, size))
+
+        def advance(r, step):
+            lo, hi = bounds[r], bounds[r + 1]
+            live = lo + np.searchsorted(remaining[lo:hi], -steps[r], side="left")
+            if step:
+                values[lo:live] *= growth[lo:live]
+                if steps[r] < width:
+                    key = r * width + steps[r]
+                    opening = pending[np.searchsorted(entry, key):np.searchsorted(entry, key, side="right")]
+                    values[opening] = principal[opening]
+            phase_totals[r] = np.bincount(codes[lo:live], values[lo:live], minlength=size)
+
+        for r in range(period):
+            advance(r, False)
+        totals[0] = phase_totals.sum(axis=0)
+        for month in range(1, months):
+            r = -month % period
+            steps[r] += 1
+            advance(r, True)
+            totals[month] = phase_totals.sum(axis=0)
+
+        frame = pd.DataFrame(totals, index=self.calendar(months), columns=self.groups)
+        if level is not None:
+            frame = frame.T.groupby(level=level).sum().T
+        return frame
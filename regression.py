@@ -0,0 +1,134 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Sufficient statistics kept per cell; enough for an OLS fit of y on x
+STAT_COLUMNS = ["n", "sx", "sy", "sxy", "sxx", "syy"]
+
+
+def _cell_stats(rows, x, y, dimensions):
+    """Collapse rows into per-cell sufficient statistics for y ~ x."""
+    pairs = rows[[x, y]].astype("float64")
+    valid = pairs.notna().all(axis=1)
+    xs = pairs[x].where(valid, 0.0)
+    ys = pairs[y].where(valid, 0.0)
+    stats = pd.DataFrame({
+        "n": valid.astype("int64"),
+        "sx": xs,
+        "sy": ys,
+        "sxy": xs * ys,
+        "sxx": xs * xs,
+        "syy": ys * ys,
+    })
+    if not dimensions:
+        return stats.sum().to_frame().T
+    for dim in dimensions:
+        stats[dim] = rows[dim]
+    return stats.groupby(dimensions, observed=True, dropna=False, sort=False).sum().reset_index()
+
+
+def filter_hash(filters=None, ranges=None):
+    """Stable hash of a filter selection, independent of value order."""
+    parts = []
+    for column, selected in sorted((filters or {}).items()):
+        parts.append((column, sorted(map(str, selected))))
+    for column, (lo, hi) in sorted((ranges or {}).items()):
+        parts.append((column, str(pd.Timestamp(lo)), str(pd.Timestamp(hi))))
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+class LinearFit:
+    """Ordinary least squares fit of y = intercept + slope * x."""
+
+    def __init__(self, n, sx, sy, sxy, sxx, syy):
+        self.n = int(n)
+        if self.n == 0:
+            self.slope = self.intercept = self.r2 = self.mse = float("nan")
+            return
+        cxx = sxx - sx * sx / n
+        cxy = sxy - sx * sy / n
+        cyy = syy - sy * sy / n
+        self.slope = cxy / cxx if cxx > 0 else 0.0
+        self.intercept = (sy - self.slope * sx) / n
+        sse = max(cyy - self.slope * cxy, 0.0)
+        self.r2 = 1.0 - sse / cyy if cyy > 0 else float("nan")
+        self.mse = sse / n
+
+    def predict(self, x):
+        return self.intercept + self.slope * np.asarray(x, dtype="float64")
+
+
+class RegressionEngine:
+    """Mergeable regression statistics with an LRU cache of fitted models.
+
+    Rows are reduced once to per-cell sums (n, sum x, sum y, sum xy,
+    sum x^2, sum y^2) over `dimensions`. A fit for any filter selection
+    sums the matching cells, so it costs O(cells) and never reads rows.
+    """
+
+    def __init__(self, data, x, y, dimensions=(), cache_size=128):
+        self.x = x
+        self.y = y
+        self.dimensions = list(dimensions)
+        self.cells = _cell_stats(data, x, y, self.dimensions)
+        self.cache_size = cache_size
+        self.models = OrderedDict()
+
+    def append(self, rows):
+        """Merge statistics for new rows and drop now-stale cached models."""
+        new_cells = _cell_stats(rows, self.x, self.y, self.dimensions)
+        merged = pd.concat([self.cells, new_cells], ignore_index=True)
+        if self.dimensions:
+            merged = merged.groupby(self.dimensions, observed=True, dropna=False, sort=False).sum()
+            merged = merged.reset_index()
+        else:
+            merged = merged.sum().to_frame().T
+        self.cells = merged
+        self.models.clear()
+
+    def _matching(self, filters, ranges):
+        mask = np.ones(len(self.cells), dtype=bool)
+        for column, selected in (filters or {}).items():
+            mask &= self.cells[column].isin(selected).to_numpy()
+        for column, (lo, hi) in (ranges or {}).items():
+            values = self.cells[column]
+            mask &= ((values >= pd.Timestamp(lo)) & (values <= pd.Timestamp(hi))).to_numpy()
+        return self.cells.loc[mask, STAT_COLUMNS]
+
+    def fit(self, filters=None, ranges=None):
+        """Return the fit for rows matching `filters` and inclusive `ranges`.
+
+        `filters` maps a column to its selected values and `ranges` maps a
+        column to a (low, high) pair. Both must be dimensions of the engine.
+        """
+        key = filter_hash(filters, ranges)
+        if key in self.models:
+            self.models.move_to_end(key)
+            return self.models[key]
+
+        totals = self._matching(filters, ranges).sum()
+        model = LinearFit(*(totals[column] for column in STAT_COLUMNS))
+        self.models[key] = model
+        if len(self.models) > self.cache_size:
+            self.models.popitem(last=False)
+        return model
+
+
+def delivery_time_engine(data):
+    """Agent_Rating -> Delivery_Time, split by the Order Analytics filters."""
+    return RegressionEngine(
+        data, "Agent_Rating", "Delivery_Time",
+        dimensions=["Order_Date", "Vehicle", "Area", "Category"],
+    )
+
+
+def premium_claim_engine(data):
+    """Premium_Amount -> Claim_Amount over the whole dataset."""
+    return RegressionEngine(data, "Premium_Amount", "Claim_Amount")
+
+
+def claim_amount_engine(data):
+    """Health_Risk_Score -> Claim_Amount, split by Region."""
+    return RegressionEngine(data, "Health_Risk_Score", "Claim_Amount", dimensions=["Region"])
@@ -0,0 +1,167 @@
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Value columns stored per tag
+TAG_COLUMNS = ["customer", "pincode", "parcel"]
+
+# Hex digit value for every byte; -1 for anything that is not a hex digit
+_HEX = np.full(256, -1, dtype=np.int64)
+for _i, _c in enumerate("0123456789ABCDEF"):
+    _HEX[ord(_c)] = _HEX[ord(_c.lower())] = _i
+
+# A UID once colons are removed: 1 to 7 bytes as ASCII hex digit pairs
+_UID = re.compile(r"(?:[0-9A-Fa-f]{2}){1,7}")
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def encode_uids(uids):
+    """Encode UIDs like "D3:13:C7:D9" as uint64 keys (byte count in the top byte).
+
+    Returns 0 for malformed UIDs (anything but a string of 1 to 7 hex byte
+    pairs, checked with the same pattern as single lookups), so they miss.
+    """
+    uids = pd.Series(uids, dtype=object)
+    hex_digits = uids.where(uids.map(type) == str).astype("string").str.replace(":", "", regex=False)
+    valid = hex_digits.str.fullmatch(_UID.pattern).fillna(False).to_numpy(dtype=bool)
+    # Only validated (ASCII) UIDs reach the byte view
+    hex_digits = hex_digits.where(valid, "")
+    lengths = hex_digits.str.len().to_numpy(dtype=np.int64)
+    raw = hex_digits.to_numpy(dtype="S14").view(np.uint8).reshape(len(hex_digits), 14)
+    digits = _HEX[raw]
+    keys = np.zeros(len(hex_digits), dtype=np.uint64)
+    for i in range(raw.shape[1]):
+        inside = i < lengths
+        keys = np.where(inside, (keys << np.uint64(4)) | digits[:, i].clip(0).astype(np.uint64), keys)
+    keys |= (lengths // 2).astype(np.uint64) << np.uint64(56)
+    return np.where(valid, keys, np.uint64(0))
+
+
+def _encode_one(uid):
+    """Scalar fast path of encode_uids for single lookups."""
+    digits = str(uid).replace(":", "") if isinstance(uid, str) else ""
+    if not _UID.fullmatch(digits):
+        return np.zeros(1, dtype=np.uint64)
+    return np.array([int(digits, 16) | (len(digits) // 2) << 56], dtype=np.uint64)
+
+
+class _Snapshot:
+    """Immutable open-addressing hash table from UID key to row, plus interned columns."""
+
+    def __init__(self, keys, columns):
+        self.size = len(keys)
+        capacity = 1 << max(int(2 * max(self.size, 1) - 1).bit_length(), 4)
+        self.mask = np.uint64(capacity - 1)
+        self.shift = np.uint64(64 - (capacity.bit_length() - 1))
+        self.table_keys = np.zeros(capacity, dtype=np.uint64)
+        self.table_rows = np.full(capacity, -1, dtype=np.int32)
+        self.columns = columns  # name -> (codes, values)
+
+        # Insert all keys in vectorised rounds of linear probing
+        pending = np.arange(self.size)
+        slots = self._home(keys)
+        while len(pending):
+            free = self.table_rows[slots] < 0
+            # Among keys that found a free slot, only the first per slot wins this round
+            candidates = np.flatnonzero(free)
+            _, first = np.unique(slots[candidates], return_index=True)
+            winners = candidates[first]
+            self.table_keys[slots[winners]] = keys[pending[winners]]
+            self.table_rows[slots[winners]] = pending[winners]
+            placed = np.zeros(len(pending), dtype=bool)
+            placed[winners] = True
+            pending, slots = pending[~placed], (slots[~placed] + np.uint64(1)) & self.mask
+
+    def _home(self, keys):
+        with np.errstate(over="ignore"):
+            return (keys * _GOLDEN) >> self.shift
+
+    def rows_for(self, keys):
+        """Row index for every key, -1 where the key is unknown."""
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        pending = np.flatnonzero(keys != 0)
+        slots = self._home(keys[pending])
+        while len(pending):
+            table_rows = self.table_rows[slots]
+            hit = self.table_keys[slots] == keys[pending]
+            rows[pending[hit]] = table_rows[hit]
+            unresolved = ~hit & (table_rows >= 0)
+            pending, slots = pending[unresolved], (slots[unresolved] + np.uint64(1)) & self.mask
+        return rows
+
+
+def _build(tags):
+    tags = tags.assign(_key=encode_uids(tags["uid"]))
+    tags = tags[tags["_key"] != 0].drop_duplicates("_key", keep="last")
+    columns = {}
+    for column in TAG_COLUMNS:
+        codes, values = pd.factorize(tags[column].astype("string"))
+        columns[column] = (codes.astype(np.int32), np.asarray(values, dtype=object))
+    return _Snapshot(tags["_key"].to_numpy(dtype=np.uint64), columns)
+
+
+class TagRegistry:
+    """UID -> (customer, pincode, parcel) registry for RFID scans.
+
+    UIDs are packed into uint64 keys and stored in a NumPy open-addressing
+    hash table; customer, pincode and parcel values are interned (integer
+    codes into unique-value arrays). Lookups probe the table, so single and
+    batched lookups are O(1) per tag. `reload` builds a new table off to the
+    side and swaps it in with one assignment, so readers never wait.
+    """
+
+    def __init__(self, path=None):
+        self._snapshot = _build(pd.DataFrame(columns=["uid"] + TAG_COLUMNS))
+        if path is not None:
+            self.reload(path)
+
+    def __len__(self):
+        return self._snapshot.size
+
+    def load_frame(self, tags):
+        """Replace the registry contents with a frame of uid/customer/pincode/parcel."""
+        for column in TAG_COLUMNS:
+            if column not in tags.columns:
+                tags = tags.assign(**{column: None})
+        self._snapshot = _build(tags)
+
+    def reload(self, path):
+        """Load a tag CSV (uid,customer,pincode,parcel) and swap it in."""
+        self.load_frame(pd.read_csv(path, dtype=str))
+
+    def reload_in_background(self, path):
+        """Reload on a worker thread; lookups keep using the old table until done."""
+        thread = threading.Thread(target=self.reload, args=(path,), daemon=True)
+        thread.start()
+        return thread
+
+    def lookup_many(self, uids):
+        """Resolve a batch of UIDs; returns a frame with a `found` column.
+
+        Values of unknown tags and missing values are None, as in `lookup`.
+        """
+        snapshot = self._snapshot
+        rows = snapshot.rows_for(encode_uids(uids))
+        found = rows >= 0
+        result = pd.DataFrame({"uid": pd.Series(list(uids), dtype=object), "found": found})
+        for column, (codes, values) in snapshot.columns.items():
+            picked = np.full(len(rows), None, dtype=object)
+            if len(values):
+                value_codes = codes[rows[found]]
+                picked[found] = np.where(value_codes >= 0, values[value_codes.clip(0)], None)
+            result[column] = pd.Series(picked, dtype=object)
+        return result
+
+    def lookup(self, uid):
+        """Resolve one UID to a dict, or None when the tag is unknown."""
+        snapshot = self._snapshot
+        row = snapshot.rows_for(_encode_one(uid))[0]
+        if row < 0:
+            return None
+        record = {"uid": uid}
+        for column, (codes, values) in snapshot.columns.items():
+            record[column] = values[codes[row]] if codes[row] >= 0 else None
+        return record
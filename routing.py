@@ -0,0 +1,258 @@
+import math
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371.0088
+
+# routes: one row per visit (depot rows have Stop == -1)
+RoutePlan = namedtuple("RoutePlan", ["routes", "distance_km", "construction_km", "baseline_km", "unserved"])
+
+
+def haversine_matrix(lat, lon, lat2=None, lon2=None):
+    """Great-circle distances in km between every pair of points."""
+    lat1, lon1 = np.radians(np.asarray(lat, dtype=np.float64)), np.radians(np.asarray(lon, dtype=np.float64))
+    if lat2 is None:
+        lat2, lon2 = lat1, lon1
+    else:
+        lat2, lon2 = np.radians(np.asarray(lat2, dtype=np.float64)), np.radians(np.asarray(lon2, dtype=np.float64))
+    dlat = lat2[None, :] - lat1[:, None]
+    dlon = lon2[None, :] - lon1[:, None]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1)[:, None] * np.cos(lat2)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def cluster_stops(lat, lon, n_clusters, iterations=25, seed=0):
+    """Vectorised k-means on an equirectangular projection; returns a label per stop."""
+    xy = np.column_stack([np.radians(lon) * np.cos(np.radians(np.mean(lat))), np.radians(lat)])
+    if n_clusters <= 1:
+        return np.zeros(len(xy), dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    centers = xy[rng.choice(len(xy), n_clusters, replace=False)]
+    for _ in range(iterations):
+        labels = ((xy[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+        counts = np.bincount(labels, minlength=n_clusters)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, xy)
+        occupied = counts > 0
+        centers[occupied] = sums[occupied] / counts[occupied, None]
+    return labels
+
+
+class _Instance:
+    """One cluster: depot at local index 0, stops at 1..m."""
+
+    def __init__(self, dist, travel, demand, tw_start, tw_end, service, capacity, horizon):
+        self.dist = dist
+        self.travel = travel
+        self.demand = demand
+        self.tw_start = tw_start
+        self.tw_end = tw_end
+        self.service = service
+        self.capacity = capacity
+        self.horizon = horizon
+
+    def schedule(self, route):
+        """Arrival minutes along `route`, or None if a time window or the horizon is missed."""
+        arrivals = np.empty(len(route))
+        t = 0.0
+        arrivals[0] = 0.0
+        for k in range(1, len(route)):
+            t = max(t + self.travel[route[k - 1], route[k]], self.tw_start[route[k]])
+            if t > self.tw_end[route[k]]:
+                return None
+            arrivals[k] = t
+            t += self.service[route[k]]
+        return arrivals if t <= self.horizon else None
+
+    def length(self, route):
+        route = np.asarray(route)
+        return float(self.dist[route[:-1], route[1:]].sum())
+
+    def construct(self, n_vehicles):
+        """Time-oriented nearest-neighbour construction; returns (routes, unserved)."""
+        m = len(self.demand)
+        unvisited = np.ones(m, dtype=bool)
+        unvisited[0] = False
+        routes = []
+        for _ in range(n_vehicles):
+            if not unvisited.any():
+                break
+            route, load, t, current = [0], 0.0, 0.0, 0
+            while True:
+                start = np.maximum(t + self.travel[current], self.tw_start)
+                feasible = (unvisited & (load + self.demand <= self.capacity) & (start <= self.tw_end)
+                            & (start + self.service + self.travel[:, 0] <= self.horizon))
+                if not feasible.any():
+                    break
+                # Prefer the stop we can start soonest (travel + waiting), then the closest
+                score = np.where(feasible, start - t + 1e-3 * self.dist[current], np.inf)
+                nxt = int(score.argmin())
+                route.append(nxt)
+                unvisited[nxt] = False
+                load += self.demand[nxt]
+                t = start[nxt] + self.service[nxt]
+                current = nxt
+            if len(route) == 1:
+                break
+            routes.append(route + [0])
+        return routes, np.flatnonzero(unvisited)
+
+    def two_opt(self, route, max_checks=20):
+        """Reverse segments while it shortens the route and keeps it feasible."""
+        route = np.asarray(route)
+        improved = True
+        while improved and len(route) > 4:
+            improved = False
+            a, b = route[:-1], route[1:]
+            delta = (self.dist[a[:, None], a[None, :]] + self.dist[b[:, None], b[None, :]]
+                     - self.dist[a, b][:, None] - self.dist[a, b][None, :])
+            delta[np.tril_indices(len(a), 1)] = 0.0
+            candidates = np.argsort(delta, axis=None)[:max_checks]
+            for flat in candidates:
+                i, j = divmod(int(flat), len(a))
+                if delta[i, j] >= -1e-9:
+                    break
+                trial = np.r_[route[:i + 1], route[i + 1:j + 1][::-1], route[j + 1:]]
+                if self.schedule(trial) is not None:
+                    route, improved = trial, True
+                    break
+        return route
+
+    def or_opt(self, route, max_checks=20):
+        """Move segments of 1-3 stops elsewhere in the route while it helps."""
+        route = np.asarray(route)
+        improved = True
+        while improved:
+            improved = False
+            n = len(route)
+            for k in (1, 2, 3):
+                if n - 2 < k + 1:
+                    continue
+                i = np.arange(1, n - k)  # segment route[i:i + k]
+                first, last = route[i], route[i + k - 1]
+                prev, nxt = route[i - 1], route[i + k]
+                removed = self.dist[prev, first] + self.dist[last, nxt] - self.dist[prev, nxt]
+                p = np.arange(0, n - 1)  # insert between route[p] and route[p + 1]
+                added = (self.dist[route[p][None, :], first[:, None]] + self.dist[last[:, None], route[p + 1][None, :]]
+                         - self.dist[route[p], route[p + 1]][None, :])
+                delta = added - removed[:, None]
+                overlap = (p[None, :] >= i[:, None] - 1) & (p[None, :] <= i[:, None] + k - 1)
+                delta[overlap] = np.inf
+                for flat in np.argsort(delta, axis=None)[:max_checks]:
+                    row, col = divmod(int(flat), len(p))
+                    if delta[row, col] >= -1e-9:
+                        break
+                    start, insert_after = int(i[row]), int(p[col])
+                    segment = route[start:start + k]
+                    rest = np.r_[route[:start], route[start + k:]]
+                    at = insert_after + 1 if insert_after < start else insert_after + 1 - k
+                    trial = np.r_[rest[:at], segment, rest[at:]]
+                    if self.schedule(trial) is not None:
+                        route, improved = trial, True
+                        break
+                if improved:
+                    break
+        return route
+
+
+def _solve_cluster(args):
+    """Solve one area cluster; runs in a worker process."""
+    (stop_ids, lat, lon, demand, tw_start, tw_end, service, depot, n_vehicles,
+     capacity, speed_kmh, horizon) = args
+    lat = np.r_[depot[0], lat]
+    lon = np.r_[depot[1], lon]
+    dist = haversine_matrix(lat, lon)
+    instance = _Instance(
+        dist, dist / speed_kmh * 60.0, np.r_[0.0, demand], np.r_[0.0, tw_start],
+        np.r_[horizon, tw_end], np.r_[0.0, service], capacity, horizon,
+    )
+    routes, unserved = instance.construct(n_vehicles)
+    construction_km = sum(instance.length(route) for route in routes)
+    improved = []
+    for route in routes:
+        route = instance.or_opt(instance.two_opt(route))
+        improved.append((route, instance.schedule(route)))
+    ids = np.r_[-1, stop_ids]
+    return ([(ids[route], arrivals) for route, arrivals in improved], construction_km,
+            sum(instance.length(route) for route, _ in improved), stop_ids[unserved - 1])
+
+
+def solve_routes(stops, depot, n_vehicles, capacity, speed_kmh=30.0, horizon=600.0,
+                 cluster_size=250, processes=None):
+    """Plan delivery routes with capacity and time windows.
+
+    `stops` needs Latitude, Longitude, Demand, TW_Start, TW_End and
+    Service_Min columns (minutes from shift start); `depot` is (lat, lon).
+    Stops are split into area clusters of about `cluster_size`, vehicles
+    are shared out by demand, and each cluster is solved (construction +
+    2-opt + or-opt) in a process pool.
+    """
+    n = len(stops)
+    n_clusters = max(1, min(math.ceil(n / cluster_size), n_vehicles))
+    lat = stops["Latitude"].to_numpy(dtype=np.float64)
+    lon = stops["Longitude"].to_numpy(dtype=np.float64)
+    demand = stops["Demand"].to_numpy(dtype=np.float64)
+    labels = cluster_stops(lat, lon, n_clusters)
+
+    # Share vehicles by cluster demand, at least one per non-empty cluster
+    cluster_demand = np.bincount(labels, weights=demand, minlength=n_clusters)
+    share = np.floor(cluster_demand / cluster_demand.sum() * n_vehicles).astype(int)
+    share = np.maximum(share, (np.bincount(labels, minlength=n_clusters) > 0).astype(int))
+    while share.sum() < n_vehicles:
+        share[np.argmax(cluster_demand / np.maximum(share, 1))] += 1
+    while share.sum() > n_vehicles:
+        share[np.argmax(np.where(share > 1, share, 0))] -= 1
+
+    jobs = []
+    for c in range(n_clusters):
+        idx = np.flatnonzero(labels == c)
+        if len(idx) == 0:
+            continue
+        jobs.append((
+            idx, lat[idx], lon[idx], demand[idx],
+            stops["TW_Start"].to_numpy(dtype=np.float64)[idx],
+            stops["TW_End"].to_numpy(dtype=np.float64)[idx],
+            stops["Service_Min"].to_numpy(dtype=np.float64)[idx],
+            depot, int(share[c]), capacity, speed_kmh, horizon,
+        ))
+
+    if processes == 1 or len(jobs) == 1:
+        results = [_solve_cluster(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(_solve_cluster, jobs))
+
+    rows = []
+    vehicle = 0
+    for cluster_routes, _, _, _ in results:
+        for route, arrivals in cluster_routes:
+            vehicle += 1
+            for order, (stop, arrival) in enumerate(zip(route, arrivals)):
+                rows.append((vehicle, order, int(stop),
+                             depot[0] if stop < 0 else lat[stop],
+                             depot[1] if stop < 0 else lon[stop], arrival))
+    routes = pd.DataFrame(rows, columns=["Vehicle", "Stop_Order", "Stop", "Latitude", "Longitude", "Arrival_Min"])
+    baseline_km = float(2 * haversine_matrix([depot[0]], [depot[1]], lat, lon).sum())
+    unserved = np.concatenate([r[3] for r in results]) if results else np.empty(0, dtype=int)
+    return RoutePlan(routes, sum(r[2] for r in results), sum(r[1] for r in results), baseline_km, unserved)
+
+
+def demo_stops(n, center=(26.9124, 75.7873), radius_km=15.0, horizon=600.0, seed=0):
+    """Random delivery stops around `center` (Jaipur by default, as in ne.py)."""
+    rng = np.random.default_rng(seed)
+    r = radius_km * np.sqrt(rng.random(n))
+    theta = rng.random(n) * 2 * np.pi
+    lat = center[0] + np.degrees(r * np.sin(theta) / EARTH_RADIUS_KM)
+    lon = center[1] + np.degrees(r * np.cos(theta) / (EARTH_RADIUS_KM * np.cos(np.radians(center[0]))))
+    tw_start = rng.uniform(0, horizon - 180, n).round()
+    return pd.DataFrame({
+        "Latitude": lat,
+        "Longitude": lon,
+        "Demand": rng.integers(1, 6, n),
+        "TW_Start": tw_start,
+        "TW_End": tw_start + rng.choice([60, 120, 180], n),
+        "Service_Min": 3.0,
+    })
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+STANDARD_GRAVITY = 9.80665  # m/s^2 per g
+
+EVENT_COLUMNS = ["box", "kind", "start_ts", "end_ts", "duration_s", "peak_g", "peak_jerk_gps",
+                 "drop_height_m", "tilt_deg"]
+
+
+def _runs(mask, new_box):
+    """Return (start, end) index arrays of True runs that never cross a box boundary."""
+    prev = np.r_[False, mask[:-1]] & ~new_box
+    nxt = np.r_[mask[1:], False] & ~np.r_[new_box[1:], True]
+    return np.flatnonzero(mask & ~prev), np.flatnonzero(mask & ~nxt)
+
+
+def _reduce_max(values, starts, ends):
+    """Max of values[start:end + 1] for every run."""
+    if len(starts) == 0:
+        return np.empty(0)
+    # reduceat needs increasing, non-overlapping bounds: interleave run starts and ends
+    bounds = np.column_stack([starts, ends + 1]).ravel()
+    padded = np.r_[values, values[-1]]
+    return np.maximum.reduceat(padded, bounds)[::2]
+
+
+def handling_events(box, ts, ax, ay, az, freefall_g=0.35, min_freefall_s=0.08,
+                    impact_g=2.5, drop_gap_s=0.5, tilt_deg=45.0, min_tilt_s=2.0,
+                    gravity_window_s=1.0):
+    """Turn MPU6050 acceleration batches into compact per-parcel handling events.
+
+    Inputs are per-sample arrays (any box order); accelerations are in m/s^2
+    as reported by the sensor. Returns a DataFrame with one row per event:
+
+    - impact: |a| above `impact_g`, with its peak g and peak jerk
+    - drop: a free-fall run (|a| below `freefall_g` for `min_freefall_s`)
+      followed by an impact within `drop_gap_s`, with the fall height
+    - free_fall: a free-fall run that did not end in an impact
+    - tilt: the gravity direction (1 s moving average) more than `tilt_deg`
+      away from the box's z axis for at least `min_tilt_s`
+    """
+    box = np.asarray(box)
+    ts = np.asarray(ts, dtype=np.float64)
+    order = np.lexsort((ts, box))
+    box, ts = box[order], ts[order]
+    acc = np.column_stack([ax, ay, az]).astype(np.float64)[order] / STANDARD_GRAVITY
+    n = len(ts)
+    if n == 0:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+
+    new_box = np.r_[True, box[1:] != box[:-1]]
+    box_first = np.maximum.accumulate(np.where(new_box, np.arange(n), 0))
+
+    magnitude = np.sqrt((acc ** 2).sum(axis=1))
+    dt = np.diff(ts, prepend=ts[0])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        jerk = np.abs(np.diff(magnitude, prepend=magnitude[0])) / dt
+    jerk[new_box | ~np.isfinite(jerk)] = 0.0
+
+    events = []
+
+    # Impacts
+    i_start, i_end = _runs(magnitude > impact_g, new_box)
+    impact_peak = _reduce_max(magnitude, i_start, i_end)
+    impact_jerk = _reduce_max(jerk, i_start, i_end)
+
+    # Free-fall runs long enough to be a real fall
+    f_start, f_end = _runs(magnitude < freefall_g, new_box)
+    f_duration = ts[f_end] - ts[f_start]
+    keep = f_duration >= min_freefall_s
+    f_start, f_end, f_duration = f_start[keep], f_end[keep], f_duration[keep]
+
+    # A fall followed by an impact on the same box is a drop
+    nxt = np.searchsorted(i_start, f_end)
+    has_next = nxt < len(i_start)
+    nxt_c = np.minimum(nxt, max(len(i_start) - 1, 0))
+    is_drop = has_next
+    if len(i_start):
+        is_drop &= (box[i_start[nxt_c]] == box[f_end]) & (ts[i_start[nxt_c]] - ts[f_end] <= drop_gap_s)
+    else:
+        is_drop[:] = False
+    for kind, sel in (("drop", is_drop), ("free_fall", ~is_drop)):
+        impact = nxt_c[sel]
+        events.append(pd.DataFrame({
+            "box": box[f_start[sel]],
+            "kind": kind,
+            "start_ts": ts[f_start[sel]],
+            "end_ts": ts[i_end[impact]] if kind == "drop" else ts[f_end[sel]],
+            "duration_s": f_duration[sel],
+            "peak_g": impact_peak[impact] if kind == "drop" else np.nan,
+            "peak_jerk_gps": impact_jerk[impact] if kind == "drop" else np.nan,
+            "drop_height_m": 0.5 * STANDARD_GRAVITY * f_duration[sel] ** 2,
+            "tilt_deg": np.nan,
+        }))
+
+    # Impacts that were not the end of a drop
+    dropped = np.zeros(len(i_start), dtype=bool)
+    dropped[nxt_c[is_drop]] = True
+    events.append(pd.DataFrame({
+        "box": box[i_start[~dropped]],
+        "kind": "impact",
+        "start_ts": ts[i_start[~dropped]],
+        "end_ts": ts[i_end[~dropped]],
+        "duration_s": ts[i_end[~dropped]] - ts[i_start[~dropped]],
+        "peak_g": impact_peak[~dropped],
+        "peak_jerk_gps": impact_jerk[~dropped],
+        "drop_height_m": np.nan,
+        "tilt_deg": np.nan,
+    }))
+
+    # Tilt: moving-average gravity vector within each box via cumulative sums
+    median_dt = np.median(dt[~new_box]) if n > 1 and (~new_box).any() else 1.0
+    window = max(int(round(gravity_window_s / max(median_dt, 1e-6))), 1)
+    cumulative = np.vstack([np.zeros(3), np.cumsum(acc, axis=0)])
+    first = np.maximum(np.arange(n) - window + 1, box_first)
+    gravity = (cumulative[np.arange(n) + 1] - cumulative[first]) / (np.arange(n) + 1 - first)[:, None]
+    norm = np.sqrt((gravity ** 2).sum(axis=1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tilt = np.degrees(np.arccos(np.clip(gravity[:, 2] / norm, -1.0, 1.0)))
+    tilt[~np.isfinite(tilt)] = 0.0
+    t_start, t_end = _runs(tilt > tilt_deg, new_box)
+    t_duration = ts[t_end] - ts[t_start]
+    keep = t_duration >= min_tilt_s
+    t_start, t_end = t_start[keep], t_end[keep]
+    events.append(pd.DataFrame({
+        "box": box[t_start],
+        "kind": "tilt",
+        "start_ts": ts[t_start],
+        "end_ts": ts[t_end],
+        "duration_s": ts[t_end] - ts[t_start],
+        "peak_g": np.nan,
+        "peak_jerk_gps": np.nan,
+        "drop_height_m": np.nan,
+        "tilt_deg": _reduce_max(tilt, t_start, t_end),
+    }))
+
+    events = [frame for frame in events if len(frame)]
+    if not events:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    return pd.concat(events, ignore_index=True)[EVENT_COLUMNS].sort_values(
+        ["box", "start_ts"], ignore_index=True
+    )
+
+
+def parcel_summary(events):
+    """Per-box rollup of handling events: counts per kind, worst impact and tilt."""
+    counts = events.pivot_table(index="box", columns="kind", values="start_ts",
+                                aggfunc="count", fill_value=0)
+    worst = events.groupby("box").agg(max_g=("peak_g", "max"), max_tilt_deg=("tilt_deg", "max"),
+                                      max_drop_m=("drop_height_m", "max"))
+    return counts.join(worst).reset_index()
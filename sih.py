@@ -3,6 +3,10 @@ import pandas as pd
 import random
 import time
 
+from anomaly import AnomalyDetector
+from journey import get_journey
+from live_buffer import get_live_buffer
+
 # Simulated Data Retrieval Functions
 def get_rfid_data():
     """Simulate fetching RFID-based package tracking data."""
@@ -21,17 +25,93 @@ st.title("Delivery Detection and Transportation Monitoring")
 
 # RFID Tracking Section
 st.header("RFID Package Tracking")
+journey = get_journey()
 if st.button("Fetch RFID Data"):
     rfid_data = get_rfid_data()
+    journey.append(time.time(), rfid_data["RFID Tag"], rfid_data["Location"])
     st.write(rfid_data)
 
+tracking_id = st.text_input("Track Parcel by RFID Tag:")
+if tracking_id:
+    latest = journey.where(tracking_id)
+    if latest is not None:
+        st.success(f"{tracking_id} is at {latest['location']}")
+        history = journey.history(tracking_id)
+        history["ts"] = pd.to_datetime(history["ts"], unit="s")
+        st.dataframe(history)
+    else:
+        st.warning("No scans found for this tag.")
+
+st.bar_chart(journey.status_counts())
+
 # Smoke Sensor Monitoring Section
 st.header("Smoke Sensor Monitoring")
 smoke_level = get_smoke_sensor_data()
 st.metric(label="Current Smoke Level (ppm)", value=f"{smoke_level:.2f}")
 
-if smoke_level > 3.0:
+# Streaming detector keeps EWMA/z-score and hysteresis state across reruns
+if "detector" not in st.session_state:
+    st.session_state.detector = AnomalyDetector()
+st.session_state.detector.update(["box-1"], [time.time()], smoke=[smoke_level])
+
+if "smoke_spike" in st.session_state.detector.active_alerts("box-1"):
     st.warning("⚠ High smoke level detected! Potential fire hazard.")
 else:
     st.success("✅ Smoke levels are normal.")
+
+# Live Monitoring Section
+st.header("Live Box Monitoring")
+live_mode = st.checkbox("Live mode (updates in place, without rerunning the page)")
+if live_mode:
+    followed = st.slider("Boxes to follow:", 1, 500, 100)
+    refresh_seconds = st.slider("Refresh every (seconds):", 1, 10, 1)
+    buffer = get_live_buffer(simulate_boxes=500)
+    if "live_detector" not in st.session_state:
+        st.session_state.live_detector = AnomalyDetector()
+    live_detector = st.session_state.live_detector
+
+    alert_slot = st.empty()
+    chart_slot = st.empty()
+    table_slot = st.empty()
+
+    # The loop below only pushes deltas: new chart rows and the latest-value table.
+    # Any widget change reruns the script, which ends the loop.
+    refreshes = 0
+    cursor = buffer.seq
+    # The followed boxes' last minute, scanned from the buffer once and then kept
+    # up from the deltas (held in `pending` until the next chart restart)
+    newest = buffer.latest(buffer.devices[:followed])["ts"].max()
+    window, _ = buffer.since(0, buffer.devices[:followed], until=cursor,
+                             start_ts=None if pd.isna(newest) else newest - 60)
+    pending = []
+    while True:
+        boxes = buffer.devices[:followed]
+        # Every reading since the previous refresh goes through the detector
+        delta, new_cursor = buffer.since(cursor, boxes)
+        if len(delta):
+            live_detector.update(delta["box"], delta["ts"], delta["smoke"],
+                                 delta["temperature"], delta["humidity"])
+            pending.append(delta)
+        if refreshes % 300 == 0:
+            # Start a fresh chart from the last minute so the browser side stays bounded
+            if pending:
+                window = pd.concat([window] + pending, ignore_index=True)
+                pending = []
+            if len(window):
+                window = window[window["ts"] >= window["ts"].max() - 60]
+            chart = chart_slot.line_chart(window.assign(ts=pd.to_datetime(window["ts"], unit="s")),
+                                          x="ts", y="smoke", color="box")
+        elif len(delta):
+            chart.add_rows(delta.assign(ts=pd.to_datetime(delta["ts"], unit="s")))
+        cursor = new_cursor
+
+        alerting = [box for box in boxes if live_detector.active_alerts(box)]
+        if alerting:
+            alert_slot.warning(f"⚠ {len(alerting)} box(es) alerting: {', '.join(alerting[:10])}")
+        else:
+            alert_slot.success(f"✅ All {len(boxes)} followed boxes normal.")
+        table_slot.dataframe(buffer.latest(boxes), use_container_width=True)
+
+        refreshes += 1
+        time.sleep(refresh_seconds)
     
@@ -1,19 +1,19 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import seaborn as sns
 import plotly.express as px
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, r2_score
 
-# Load datasets
-data = pd.read_csv("cleaned_amazon_dataset-2.csv")
-data['Order_Date'] = pd.to_datetime(data['Order_Date'])
-data['Order_Hour'] = pd.to_datetime(data['Order_Time'], format='%H:%M:%S').dt.hour
+from charts import downsample, fingerprint, fit_png, histogram_png, render
+from data_store import data_token, derived, load_orders, load_insurance
+from filter_index import FilterIndex, take_columns
+from order_cube import OrderCube
+from regression import claim_amount_engine, delivery_time_engine
+from summary_stats import FrameSummary
 
-insurance_data = pd.read_csv("insurance_data.csv")
+# Load datasets (shared Arrow cache, dates and hours already parsed)
+data = load_orders("cleaned_amazon_dataset-2.csv")
+insurance_data = load_insurance("insurance_data.csv")
 
 # Configure Streamlit page
 st.set_page_config(
@@ -92,35 +92,44 @@ if selected_dashboard == "📦 Order Analytics":
         "Select Categories:", data['Category'].unique(), default=data['Category'].unique()
     )
 
-    filtered_data = data[(data['Order_Date'] >= pd.Timestamp(date_range[0])) & 
-                         (data['Order_Date'] <= pd.Timestamp(date_range[1])) & 
-                         (data['Vehicle'].isin(vehicle_filter)) & 
-                         (data['Area'].isin(area_filter)) & 
-                         (data['Category'].isin(category_filter))]
+    # Bitmap/date index lookup instead of full-column masks; charts gather
+    # only the columns they plot at the selected positions
+    order_index = derived(data, "filter_index", FilterIndex)
+    filtered_rows = order_index.select(date_range[0], date_range[1], {
+        "Vehicle": vehicle_filter,
+        "Area": area_filter,
+        "Category": category_filter,
+    })
+
+    # Trend charts are rollups over the pre-aggregated cube
+    order_cube = derived(data, "order_cube", OrderCube)
+    cube_filters = {"Vehicle": vehicle_filter, "Area": area_filter, "Category": category_filter}
+
+    # Identifies the filtered rows for the chart caches without hashing them
+    filter_key = (data_token(data), str(date_range[0]), str(date_range[1]),
+                  tuple((column, tuple(selected)) for column, selected in cube_filters.items()))
 
     # Delivery Time Analysis
     st.subheader(":stopwatch: Delivery Time Analysis")
     col1, col2 = st.columns(2)
 
     with col1:
-        fig, ax = plt.subplots(figsize=(8, 5))
-        sns.histplot(filtered_data['Delivery_Time'], bins=30, kde=True, ax=ax, color="dodgerblue")
-        ax.set_title("Distribution of Delivery Times")
-        ax.set_xlabel("Delivery Time (minutes)")
-        ax.set_ylabel("Frequency")
-        st.pyplot(fig)
+        # Rendered once per distinct data/parameters; reruns reuse the PNG
+        st.image(histogram_png(take_columns(data, filtered_rows, ['Delivery_Time'])['Delivery_Time'], 30, "dodgerblue", "Distribution of Delivery Times",
+                               "Delivery Time (minutes)", figsize=(8, 5), key=filter_key))
 
     with col2:
-        correlation_data = filtered_data[['Delivery_Time', 'Agent_Age', 'Agent_Rating', 'Order_Hour']]
+        correlation_data = take_columns(data, filtered_rows, ['Delivery_Time', 'Agent_Age', 'Agent_Rating', 'Order_Hour'])
         corr_matrix = correlation_data.corr()
-        fig, ax = plt.subplots(figsize=(8, 5))
-        sns.heatmap(corr_matrix, annot=True, cmap="coolwarm", ax=ax)
-        ax.set_title("Correlation Matrix")
-        st.pyplot(fig)
+        def draw_correlation(ax):
+            sns.heatmap(corr_matrix, annot=True, cmap="coolwarm", ax=ax)
+            ax.set_title("Correlation Matrix")
+        st.image(render(fingerprint("correlation", corr_matrix, figsize=(8, 5)), draw_correlation, figsize=(8, 5)))
 
     # Order Trends
     st.subheader(":chart_with_upwards_trend: Order Trends Over Time")
-    orders_by_date = filtered_data.groupby('Order_Date').size().reset_index(name='Order_Count')
+    orders_by_date = order_cube.rollup('Order_Date', date_range[0], date_range[1], cube_filters)
+    orders_by_date = orders_by_date[['Order_Date', 'orders']].rename(columns={'orders': 'Order_Count'})
     fig = px.line(orders_by_date, x='Order_Date', y='Order_Count', title="Orders Over Time",
                   labels={"Order_Date": "Date", "Order_Count": "Number of Orders"},
                   template="plotly_dark")
@@ -128,7 +137,8 @@ if selected_dashboard == "📦 Order Analytics":
 
     # Peak Order Times
     st.subheader(":clock3: Peak Order Times (Hourly Breakdown)")
-    orders_by_hour = filtered_data.groupby('Order_Hour').size().reset_index(name='Order_Count')
+    orders_by_hour = order_cube.rollup('Order_Hour', date_range[0], date_range[1], cube_filters)
+    orders_by_hour = orders_by_hour[['Order_Hour', 'orders']].rename(columns={'orders': 'Order_Count'})
     fig = px.bar(orders_by_hour, x='Order_Hour', y='Order_Count', title="Orders by Hour of the Day",
                  labels={"Order_Hour": "Hour of the Day", "Order_Count": "Number of Orders"},
                  template="plotly_dark")
@@ -137,7 +147,8 @@ if selected_dashboard == "📦 Order Analytics":
     # Factors Affecting Delivery Time
     st.subheader(":thinking_face: Factors Affecting Delivery Time")
     selected_factor = st.selectbox("Select Factor to Analyze:", ["Weather", "Traffic", "Area", "Vehicle"])
-    factor_impact = filtered_data.groupby(selected_factor)['Delivery_Time'].mean().reset_index()
+    factor_impact = order_cube.rollup(selected_factor, date_range[0], date_range[1], cube_filters)
+    factor_impact = factor_impact[[selected_factor, 'mean']].rename(columns={'mean': 'Delivery_Time'})
     fig = px.bar(factor_impact, x=selected_factor, y='Delivery_Time',
                  title=f"Impact of {selected_factor} on Delivery Time", template="plotly_dark")
     st.plotly_chart(fig, use_container_width=True)
@@ -145,25 +156,21 @@ if selected_dashboard == "📦 Order Analytics":
     # Delivery Time Prediction
     st.subheader(":crystal_ball: Predictive Analytics")
     st.markdown("### Predict delivery times based on agent performance.")
-    X = filtered_data[['Agent_Rating']]
-    y = filtered_data['Delivery_Time']
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-    model = LinearRegression()
-    model.fit(X_train, y_train)
+    # Fitted from per-cell sufficient statistics; cached per filter selection
+    delivery_engine = derived(data, "delivery_regression", delivery_time_engine)
+    model = delivery_engine.fit(cube_filters, ranges={'Order_Date': (date_range[0], date_range[1])})
+
+    # Plot a bounded sample of the filtered rows against the fitted line
+    plot_rows = downsample(take_columns(data, filtered_rows, ['Agent_Rating', 'Delivery_Time']),
+                           'Agent_Rating', 'Delivery_Time', max_points=2000)
+    X_test, y_test = plot_rows['Agent_Rating'], plot_rows['Delivery_Time']
     y_pred = model.predict(X_test)
 
-    st.markdown(f"**R-squared Value:** {r2_score(y_test, y_pred):.2f}")
-    st.markdown(f"**Mean Squared Error:** {mean_squared_error(y_test, y_pred):.2f}")
+    st.markdown(f"**R-squared Value:** {model.r2:.2f}")
+    st.markdown(f"**Mean Squared Error:** {model.mse:.2f}")
 
-    fig, ax = plt.subplots(figsize=(8, 5))
-    ax.scatter(X_test, y_test, label="Actual Values")
-    ax.plot(X_test, y_pred, color='red', label="Predicted Values")
-    ax.set_title("Agent Rating vs. Predicted Delivery Time")
-    ax.set_xlabel("Agent Rating")
-    ax.set_ylabel("Delivery Time (minutes)")
-    ax.legend()
-    st.pyplot(fig)
+    st.image(fit_png(X_test, y_test, y_pred, "Agent Rating vs. Predicted Delivery Time", "Agent Rating",
+                     "Delivery Time (minutes)", figsize=(8, 5), key=filter_key))
 
 # Insurance Data Dashboard
 elif selected_dashboard == "🏥 Insurance Data":
@@ -176,21 +183,20 @@ elif selected_dashboard == "🏥 Insurance Data":
 
     # Summary statistics
     st.markdown("### Summary Statistics of the Data")
-    st.write(insurance_data.describe())
+    st.write(derived(insurance_data, "summary", FrameSummary).describe())
 
     # Age distribution
     st.subheader(":bust_in_silhouette: Age Distribution")
-    fig, ax = plt.subplots(figsize=(8, 5))
-    sns.histplot(insurance_data['Age'], bins=20, kde=True, ax=ax, color="mediumseagreen")
-    ax.set_title("Age Distribution of Insurance Customers")
-    ax.set_xlabel("Age")
-    ax.set_ylabel("Frequency")
-    st.pyplot(fig)
+    st.image(histogram_png(insurance_data['Age'], 20, "mediumseagreen", "Age Distribution of Insurance Customers",
+                           "Age", figsize=(8, 5), key=data_token(insurance_data)))
 
     # Health Risk vs. Claim Amount
     st.subheader(":bar_chart: Health Risk vs. Claim Amount Analysis")
+    # At most 5000 points reach the browser; outliers and every Region are kept
+    scatter_rows = derived(insurance_data, "risk_claim_points",
+                           lambda d: downsample(d, 'Health_Risk_Score', 'Claim_Amount', group='Region'))
     fig = px.scatter(
-        insurance_data, 
+        scatter_rows, 
         x='Health_Risk_Score', 
         y='Claim_Amount', 
         color='Region', 
@@ -204,22 +210,16 @@ elif selected_dashboard == "🏥 Insurance Data":
     # Predictive Insights: BMI vs Charges
     st.subheader(":crystal_ball: Predictive Insights (Regression Analysis)")
     st.markdown("### Predict Claim Amount based on Health Risk Score.")
-    X = insurance_data[['Health_Risk_Score']]
-    y = insurance_data['Claim_Amount']
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    claim_engine = derived(insurance_data, "claim_regression", claim_amount_engine)
+    model = claim_engine.fit()
 
-    model = LinearRegression()
-    model.fit(X_train, y_train)
+    plot_rows = derived(insurance_data, "claim_fit_points",
+                        lambda d: downsample(d, 'Health_Risk_Score', 'Claim_Amount', max_points=2000))
+    X_test, y_test = plot_rows['Health_Risk_Score'], plot_rows['Claim_Amount']
     y_pred = model.predict(X_test)
 
-    st.markdown(f"**R-squared Value:** {r2_score(y_test, y_pred):.2f}")
-    st.markdown(f"**Mean Squared Error:** {mean_squared_error(y_test, y_pred):.2f}")
-
-    fig, ax = plt.subplots(figsize=(8, 5))
-    ax.scatter(X_test, y_test, label="Actual Values")
-    ax.plot(X_test, y_pred, color='red', label="Predicted Values")
-    ax.set_title("Health Risk Score vs. Predicted Claim Amount")
-    ax.set_xlabel("Health Risk Score")
-    ax.set_ylabel("Claim Amount")
-    ax.legend()
-    st.pyplot(fig)
+    st.markdown(f"**R-squared Value:** {model.r2:.2f}")
+    st.markdown(f"**Mean Squared Error:** {model.mse:.2f}")
+
+    st.image(fit_png(X_test, y_test, y_pred, "Health Risk Score vs. Predicted Claim Amount", "Health Risk Score",
+                     "Claim Amount", figsize=(8, 5), key=data_token(insurance_data)))
@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+
+# Rows of the summary table, in pandas describe() order
+SUMMARY_INDEX = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+class QuantileSketch:
+    """Mergeable KLL-style quantile sketch.
+
+    Values land in level 0; a level holding more than `k` values is sorted
+    and every other value (random offset) moves up a level with twice the
+    weight. Memory stays O(k log(n / k)) and the sketch is exact until more
+    than `k` values have been added.
+    """
+
+    def __init__(self, k=1024, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.levels[0] = np.concatenate([self.levels[0], values[~np.isnan(values)]])
+        self._compress()
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.k:
+                items = np.sort(items)
+                even = len(items) - len(items) % 2
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                promoted = items[self.rng.integers(2):even:2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = items[even:]
+            level += 1
+
+    def quantiles(self, qs):
+        """Approximate quantiles (exact, with linear interpolation, while uncompacted)."""
+        qs = np.asarray(qs, dtype=np.float64)
+        if len(self.levels) == 1:
+            if len(self.levels[0]) == 0:
+                return np.full(len(qs), np.nan)
+            return np.quantile(self.levels[0], qs)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        values, cumulative = values[order], np.cumsum(weights[order])
+        ranks = qs * (cumulative[-1] - 1)
+        return values[np.minimum(np.searchsorted(cumulative, ranks, side="right"), len(values) - 1)]
+
+
+class NumericSummary:
+    """Count, mean, variance (Welford/Chan merge), min, max and quantiles of one column."""
+
+    def __init__(self, k=1024):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sketch = QuantileSketch(k)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        n, mean = len(values), float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.sketch.update(values)
+
+    def row(self):
+        """This column's describe() values."""
+        if self.count == 0:
+            return [0] + [np.nan] * 7
+        std = np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+        q25, q50, q75 = self.sketch.quantiles([0.25, 0.5, 0.75])
+        return [self.count, self.mean, std, self.min, q25, q50, q75, self.max]
+
+
+class FrameSummary:
+    """Running summaries of a table that grows by appended rows.
+
+    Numeric columns keep a NumericSummary; every column also keeps a
+    frequency table until it exceeds `max_categories` distinct values.
+    `update` costs O(new rows); `describe` and `counts` read only the
+    summaries, so serving them does not depend on the number of rows.
+    """
+
+    def __init__(self, data=None, max_categories=1000, k=1024):
+        self.max_categories = max_categories
+        self.k = k
+        self.columns = []
+        self.numeric = {}
+        self.frequencies = {}
+        self.rows = 0
+        self._describe = None
+        if data is not None:
+            self.update(data)
+
+    def update(self, rows):
+        """Fold newly appended rows into the summaries."""
+        for column in rows.columns:
+            if column not in self.columns:
+                self.columns.append(column)
+                if self.rows == 0 and pd.api.types.is_numeric_dtype(rows[column]) \
+                        and not pd.api.types.is_bool_dtype(rows[column]):
+                    self.numeric[column] = NumericSummary(self.k)
+                self.frequencies[column] = pd.Series(dtype="int64")
+            values = rows[column]
+            if column in self.numeric:
+                self.numeric[column].update(pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64))
+            table = self.frequencies.get(column)
+            if table is not None:
+                table = table.add(values.value_counts(), fill_value=0).astype("int64")
+                self.frequencies[column] = table if len(table) <= self.max_categories else None
+        self.rows += len(rows)
+        self._describe = None
+
+    def describe(self):
+        """Summary table in the layout of DataFrame.describe() for numeric columns."""
+        if self._describe is None:
+            names = [column for column in self.columns if column in self.numeric]
+            table = pd.DataFrame({column: self.numeric[column].row() for column in names}, index=SUMMARY_INDEX)
+            self._describe = table.astype("float64")
+        return self._describe
+
+    def counts(self, column):
+        """Value frequencies of `column`, most frequent first (like value_counts())."""
+        table = self.frequencies.get(column)
+        if table is None:
+            raise KeyError(f"no frequency table for {column!r}")
+        counts = table.sort_values(ascending=False, kind="stable")
+        counts.index.name = column
+        return counts.rename("count")
+
@@ -0,0 +1,366 @@
+import os
+import re
+
+import numpy as np
+
+# Channels recorded per parcel box, in column order
+CHANNELS = ["smoke", "temperature", "humidity", "accel_x", "accel_y", "accel_z"]
+
+# RTDB paths written by the firmware -> channel names
+CHANNEL_ALIASES = {
+    "sensor/smoke": "smoke",
+    "sensor/temperature": "temperature",
+    "sensor/humidity": "humidity",
+    "sensor/acceleration_x": "accel_x",
+    "sensor/acceleration_y": "accel_y",
+    "sensor/acceleration_z": "accel_z",
+}
+
+# Rollup resolutions in seconds: 1 minute, 1 hour, 1 day
+RESOLUTIONS = (60, 3600, 86400)
+
+
+class Segments:
+    """Numbered `.npy` blocks in a folder, read back memory-mapped.
+
+    Every block is a float64 array whose first column is its sort key
+    (timestamp or bucket key). Blocks already in the folder are picked up on
+    open and numbering continues after them, so a new process neither
+    overwrites nor loses an earlier one's data.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.blocks = []  # (first key, last key, path)
+        self.next_index = 0
+        if os.path.isdir(folder):
+            for name in sorted(os.listdir(folder)):
+                match = re.fullmatch(r"(\d{8})\.npy", name)
+                if match is None:
+                    continue
+                path = os.path.join(folder, name)
+                keys = np.load(path, mmap_mode="r")[:, 0]
+                if len(keys):
+                    self.blocks.append((float(keys.min()), float(keys.max()), path))
+                self.next_index = int(match.group(1)) + 1
+
+    def write(self, block):
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, f"{self.next_index:08d}.npy")
+        np.save(path, block)
+        self.next_index += 1
+        self.blocks.append((float(block[:, 0].min()), float(block[:, 0].max()), path))
+
+    def read(self, lo, hi):
+        """Rows of every block with first column in [lo, hi], oldest blocks first."""
+        parts = []
+        for first, last, path in self.blocks:
+            if last < lo or first > hi:
+                continue
+            block = np.load(path, mmap_mode="r")
+            keys = block[:, 0]
+            parts.append(np.asarray(block[(keys >= lo) & (keys <= hi)]))
+        return parts
+
+
+class Rollup:
+    """Min/max/sum/count per channel for fixed-width time buckets.
+
+    Buckets live in sorted, amortised-growth NumPy arrays; a batch of
+    samples is reduced with `reduceat` and merged in without Python loops.
+    With a `folder`, at most `capacity` buckets stay in memory: the oldest
+    half is spilled to segments like raw samples, and queries merge them
+    back in.
+    """
+
+    def __init__(self, resolution, n_channels=len(CHANNELS), capacity=64, folder=None, max_buckets=None):
+        self.resolution = resolution
+        self.n_channels = n_channels
+        self.max_buckets = max_buckets
+        self.segments = Segments(folder) if folder is not None else None
+        self.size = 0
+        self.keys = np.empty(capacity, dtype=np.int64)
+        self.mins = np.empty((capacity, n_channels), dtype=np.float32)
+        self.maxs = np.empty((capacity, n_channels), dtype=np.float32)
+        self.sums = np.empty((capacity, n_channels), dtype=np.float64)
+        self.counts = np.empty((capacity, n_channels), dtype=np.int64)
+
+    def _arrays(self):
+        return self.keys, self.mins, self.maxs, self.sums, self.counts
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        if needed <= len(self.keys):
+            return
+        capacity = max(needed, 2 * len(self.keys))
+        for name in ("keys", "mins", "maxs", "sums", "counts"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def add(self, ts, values):
+        keys = np.floor_divide(ts, self.resolution).astype(np.int64)
+        order = np.argsort(keys, kind="stable")
+        keys, values = keys[order], values[order]
+        bucket_keys, starts = np.unique(keys, return_index=True)
+        valid = ~np.isnan(values)
+        counts = np.add.reduceat(valid.astype(np.int64), starts, axis=0)
+        sums = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=0, dtype=np.float64)
+        mins = np.minimum.reduceat(np.where(valid, values, np.inf), starts, axis=0)
+        maxs = np.maximum.reduceat(np.where(valid, values, -np.inf), starts, axis=0)
+
+        # Update buckets that already exist
+        size = self.size
+        pos = np.searchsorted(self.keys[:size], bucket_keys)
+        exists = pos < size
+        exists[exists] = self.keys[pos[exists]] == bucket_keys[exists]
+        if exists.any():
+            at = pos[exists]
+            self.counts[at] += counts[exists]
+            self.sums[at] += sums[exists]
+            self.mins[at] = np.minimum(self.mins[at], mins[exists])
+            self.maxs[at] = np.maximum(self.maxs[at], maxs[exists])
+
+        # Insert the new ones, keeping keys sorted
+        new = ~exists
+        if not new.any():
+            return
+        n_new = int(new.sum())
+        self._reserve(n_new)
+        incoming = (bucket_keys[new], mins[new], maxs[new], sums[new], counts[new])
+        if size == 0 or bucket_keys[new][0] > self.keys[size - 1]:
+            for array, chunk in zip(self._arrays(), incoming):
+                array[size:size + n_new] = chunk
+        else:
+            merged_keys = np.concatenate([self.keys[:size], incoming[0]])
+            order = np.argsort(merged_keys, kind="stable")
+            for array, chunk in zip(self._arrays(), incoming):
+                merged = np.concatenate([array[:size], chunk])
+                array[:size + n_new] = merged[order]
+        self.size = size + n_new
+        if self.segments is not None and self.max_buckets and self.size > self.max_buckets:
+            self.spill(self.size - self.max_buckets // 2)
+
+    def spill(self, count=None):
+        """Move the `count` oldest buckets (default all) to a segment file."""
+        count = self.size if count is None else min(count, self.size)
+        if count == 0:
+            return
+        k = self.n_channels
+        block = np.empty((count, 1 + 4 * k))
+        block[:, 0] = self.keys[:count]
+        for i, array in enumerate(self._arrays()[1:]):
+            block[:, 1 + i * k:1 + (i + 1) * k] = array[:count]
+        self.segments.write(block)
+        for array in self._arrays():
+            array[:self.size - count] = array[count:self.size]
+        self.size -= count
+
+    def _buckets(self, t0, t1):
+        """Sorted (keys, mins, maxs, sums, counts) of the buckets in [t0, t1], spilled ones included."""
+        first = np.floor_divide(t0, self.resolution)
+        last = np.floor_divide(t1, self.resolution)
+        keys = self.keys[:self.size]
+        lo = np.searchsorted(keys, first, side="left")
+        hi = np.searchsorted(keys, last, side="right")
+        buckets = [array[lo:hi] for array in self._arrays()]
+        spilled = self.segments.read(first, last) if self.segments is not None else []
+        if not spilled:
+            return buckets
+        k = self.n_channels
+        block = np.concatenate(spilled)
+        parts = [block[:, 0].astype(np.int64)] + [block[:, 1 + i * k:1 + (i + 1) * k] for i in range(4)]
+        parts[-1] = parts[-1].astype(np.int64)
+        merged = [np.concatenate([part, array]) for part, array in zip(parts, buckets)]
+        # Late samples can land in a bucket that was already spilled: combine duplicates
+        order = np.argsort(merged[0], kind="stable")
+        keys = merged[0][order]
+        unique_keys, starts = np.unique(keys, return_index=True)
+        reduce = (np.minimum, np.maximum, np.add, np.add)
+        return [unique_keys] + [op.reduceat(array[order], starts, axis=0)
+                                for op, array in zip(reduce, merged[1:])]
+
+    def query(self, t0, t1):
+        """Return (bucket start times, min, max, mean) for buckets in [t0, t1]."""
+        keys, mins, maxs, sums, counts = self._buckets(t0, t1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(counts > 0, sums / counts, np.nan)
+        empty = counts == 0
+        mins = np.where(empty, np.nan, mins)
+        maxs = np.where(empty, np.nan, maxs)
+        return keys * self.resolution, mins, maxs, means
+
+
+class DeviceSeries:
+    """Raw samples of one box: a NumPy ring buffer plus spilled mmap segments.
+
+    Rollups keep at most `capacity` buckets each in memory and spill the
+    rest under `<folder>/rollup_<resolution>`.
+    """
+
+    def __init__(self, folder, capacity, resolutions):
+        self.folder = folder
+        self.capacity = capacity
+        # Rings start small and double up to `capacity`, so idle boxes stay cheap
+        self.ts = np.empty(min(capacity, 64), dtype=np.float64)
+        self.values = np.empty((len(self.ts), len(CHANNELS)), dtype=np.float32)
+        self.start = 0
+        self.size = 0
+        self.segments = Segments(folder)
+        self.rollups = {
+            resolution: Rollup(resolution, folder=os.path.join(folder, f"rollup_{resolution}"),
+                               max_buckets=capacity)
+            for resolution in resolutions
+        }
+
+    def _ring_positions(self, offset, count):
+        return (self.start + offset + np.arange(count)) % len(self.ts)
+
+    def _grow(self):
+        positions = self._ring_positions(0, self.size)
+        length = min(2 * len(self.ts), self.capacity)
+        ts = np.empty(length, dtype=np.float64)
+        values = np.empty((length, len(CHANNELS)), dtype=np.float32)
+        ts[:self.size] = self.ts[positions]
+        values[:self.size] = self.values[positions]
+        self.ts, self.values, self.start = ts, values, 0
+
+    def _spill(self, count):
+        """Move the `count` oldest ring samples to a memory-mapped segment file."""
+        if count == 0:
+            return
+        positions = self._ring_positions(0, count)
+        block = np.column_stack([self.ts[positions], self.values[positions].astype(np.float64)])
+        self.segments.write(block)
+        self.start = (self.start + count) % len(self.ts)
+        self.size -= count
+
+    def flush(self):
+        """Spill everything held in memory, so a later store on the same folder sees it all."""
+        self._spill(self.size)
+        for rollup in self.rollups.values():
+            rollup.spill()
+
+    def append(self, ts, values):
+        for rollup in self.rollups.values():
+            rollup.add(ts, values)
+        done = 0
+        while done < len(ts):
+            if self.size == len(self.ts):
+                if len(self.ts) < self.capacity:
+                    self._grow()
+                else:
+                    self._spill(max(self.capacity // 2, 1))
+            count = min(len(self.ts) - self.size, len(ts) - done)
+            positions = self._ring_positions(self.size, count)
+            self.ts[positions] = ts[done:done + count]
+            self.values[positions] = values[done:done + count]
+            self.size += count
+            done += count
+
+    def raw(self, t0, t1):
+        """Return (ts, values) of raw samples in [t0, t1], oldest segments first."""
+        parts_ts, parts_values = [], []
+        for block in self.segments.read(t0, t1):
+            parts_ts.append(block[:, 0])
+            parts_values.append(block[:, 1:].astype(np.float32))
+        positions = self._ring_positions(0, self.size)
+        ts = self.ts[positions]
+        mask = (ts >= t0) & (ts <= t1)
+        parts_ts.append(ts[mask])
+        parts_values.append(self.values[positions][mask])
+        return np.concatenate(parts_ts), np.concatenate(parts_values)
+
+
+class TimeSeriesStore:
+    """In-process sensor history for many parcel boxes.
+
+    Recent samples sit in a per-device ring buffer; older ones are spilled
+    to `.npy` segments under `root` and read back memory-mapped. Every
+    append also updates the 1 min / 1 h / 1 day rollups, so long-range
+    queries read buckets instead of raw samples; rollups are spilled the
+    same way. Segments left under `root` by earlier runs are queried too,
+    and `flush` spills what is still in memory before shutting down.
+    """
+
+    def __init__(self, root="ts_segments", capacity=4096, resolutions=RESOLUTIONS):
+        self.root = root
+        self.capacity = capacity
+        self.resolutions = tuple(resolutions)
+        self.devices = {}
+
+    def _folder(self, device):
+        return os.path.join(self.root, re.sub(r"[^A-Za-z0-9_.-]", "_", str(device)))
+
+    def _device(self, device):
+        series = self.devices.get(device)
+        if series is None:
+            series = self.devices[device] = DeviceSeries(self._folder(device), self.capacity, self.resolutions)
+        return series
+
+    def flush(self):
+        """Spill every device's ring and rollups to disk."""
+        for series in self.devices.values():
+            series.flush()
+
+    def append(self, device, ts, values):
+        """Append samples for one device.
+
+        `values` is an (n, len(CHANNELS)) array, or a dict of channel -> array
+        with NaN standing in for channels that were not sampled.
+        """
+        ts = np.asarray(ts, dtype=np.float64).reshape(-1)
+        if isinstance(values, dict):
+            columns = np.full((len(ts), len(CHANNELS)), np.nan, dtype=np.float32)
+            for channel, column in values.items():
+                columns[:, CHANNELS.index(channel)] = column
+            values = columns
+        values = np.asarray(values, dtype=np.float32).reshape(len(ts), len(CHANNELS))
+        if len(ts):
+            self._device(device).append(ts, values)
+
+    def append_readings(self, readings):
+        """Append ingest-server Readings, one sample row per (device, ts)."""
+        rows = {}
+        for reading in readings:
+            channel = CHANNEL_ALIASES.get(reading.channel, reading.channel)
+            if channel not in CHANNELS or not isinstance(reading.value, (int, float)):
+                continue
+            row = rows.setdefault((reading.device, reading.ts), [np.nan] * len(CHANNELS))
+            row[CHANNELS.index(channel)] = reading.value
+        by_device = {}
+        for (device, ts), row in rows.items():
+            by_device.setdefault(device, ([], []))
+            by_device[device][0].append(ts)
+            by_device[device][1].append(row)
+        for device, (ts, values) in by_device.items():
+            self.append(device, ts, values)
+
+    async def write(self, readings):
+        """Sink interface for IngestServer."""
+        self.append_readings(readings)
+
+    def query(self, device, t0, t1, resolution=None):
+        """Return samples for one device in [t0, t1].
+
+        With `resolution=None` the raw (ts, values) are returned; otherwise
+        (bucket start, min, max, mean) from that rollup.
+        """
+        series = self.devices.get(device)
+        if series is None and os.path.isdir(self._folder(device)):
+            series = self._device(device)
+        if series is None:
+            empty = np.empty((0, len(CHANNELS)), dtype=np.float32)
+            if resolution is None:
+                return np.empty(0), empty
+            return np.empty(0, dtype=np.int64), empty, empty, empty
+        if resolution is None:
+            return series.raw(t0, t1)
+        return series.rollups[resolution].query(t0, t1)
+
+    def query_range(self, devices, t0, t1, max_points=1000):
+        """Query many devices, picking the finest rollup with <= max_points buckets."""
+        span = max(t1 - t0, 0)
+        resolution = next((r for r in self.resolutions if span / r <= max_points), self.resolutions[-1])
+        return resolution, {device: self.query(device, t0, t1, resolution) for device in devices}
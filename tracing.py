@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# DASHBOARD_TRACING=1 traces every rerun; "memory" also starts tracemalloc
+# so allocations are measured exactly (slower). DASHBOARD_METRICS_PORT
+# serves the Prometheus text on http://<host>:<port>/metrics.
+TRACING = os.getenv("DASHBOARD_TRACING", "").lower()
+METRICS_PORT = os.getenv("DASHBOARD_METRICS_PORT")
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_DISABLED = nullcontext()
+
+# One tracer (and metrics server) per process
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def _rss():
+    """Current resident set size in bytes (Linux), or 0 where unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError):
+        return 0
+
+
+class Span:
+    """One timed section of one rerun."""
+
+    __slots__ = ("section", "seconds", "rows", "memory_bytes")
+
+    def __init__(self, section, rows=None):
+        self.section = section
+        self.seconds = 0.0
+        self.rows = rows
+        self.memory_bytes = 0
+
+
+class Run:
+    """The spans recorded during one script rerun."""
+
+    def __init__(self, page=""):
+        self.page = page
+        self.spans = []
+        self.started = time.perf_counter()
+
+    def table(self):
+        """Rows for display: section, milliseconds, rows, MB."""
+        return [{"Section": span.section, "ms": round(span.seconds * 1000, 1),
+                 "Rows": span.rows, "MB": round(span.memory_bytes / 2 ** 20, 2)}
+                for span in self.spans]
+
+
+class Tracer:
+    """Per-section wall time, rows and memory for dashboard reruns.
+
+    `start_run` binds a Run to the calling thread (Streamlit runs each
+    session's script in its own thread); `section` then times a block into
+    it and into process-wide totals for the metrics endpoint. Without an
+    active run `section` returns a shared no-op context manager, so
+    instrumented code costs one thread-local lookup when tracing is off.
+    Memory is RSS growth over the block, or the tracemalloc peak above the
+    starting level while tracemalloc is tracing.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.totals = {}
+
+    def start_run(self, page="", enabled=None):
+        """Begin tracing this thread's rerun (or stop, if disabled); returns the Run or None."""
+        run = Run(page) if (self.enabled if enabled is None else enabled) else None
+        self.local.run = run
+        return run
+
+    def section(self, name, rows=None):
+        run = getattr(self.local, "run", None)
+        if run is None:
+            return _DISABLED
+        return self._timed(run, name, rows)
+
+    @contextmanager
+    def _timed(self, run, name, rows):
+        span = Span(name, rows)
+        traced = tracemalloc.is_tracing()
+        if traced:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        else:
+            base = _rss()
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.seconds = time.perf_counter() - start
+            span.memory_bytes = max(0, (tracemalloc.get_traced_memory()[1] if traced else _rss()) - base)
+            run.spans.append(span)
+            self._record(run.page, span)
+
+    def _record(self, page, span):
+        with self.lock:
+            totals = self.totals.setdefault((page, span.section), [0, 0.0, 0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += span.seconds
+            totals[2] += span.rows or 0
+            totals[3] = span.seconds
+            totals[4] = span.memory_bytes
+
+    def prometheus(self):
+        """All recorded totals in the Prometheus text exposition format."""
+        with self.lock:
+            items = sorted(self.totals.items())
+        metrics = [
+            ("dashboard_section_runs_total", "counter", "Times the section ran", 0),
+            ("dashboard_section_seconds_total", "counter", "Wall time spent in the section", 1),
+            ("dashboard_section_rows_total", "counter", "Rows processed by the section", 2),
+            ("dashboard_section_last_seconds", "gauge", "Wall time of the latest run", 3),
+            ("dashboard_section_last_memory_bytes", "gauge", "Memory allocated by the latest run", 4),
+        ]
+        lines = []
+        for name, kind, help_text, field in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (page, section), totals in items:
+                labels = f'page="{_escape(page)}",section="{_escape(section)}"'
+                lines.append(f"{name}{{{labels}}} {totals[field]}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(label):
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_tracer().prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """Serve /metrics from a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def get_tracer():
+    """Return the process-wide tracer, configured from the environment on first use."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            if TRACING == "memory" and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            _tracer = Tracer(enabled=TRACING not in ("", "0", "false", "off"))
+            if METRICS_PORT:
+                serve_metrics(int(METRICS_PORT))
+        return _tracer
+